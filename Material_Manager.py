@@ -1,18 +1,59 @@
+import time
+
+_startup_time = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
 import os  # Import os module for path operations
-import math  # Import math module for log
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-# Load the Excel data
-try:
-    df = pd.read_excel("sample_material_data.xlsx")
-except FileNotFoundError:
-    messagebox.showerror("Error",
-                         "sample_material_data.xlsx not found. Please make sure the file is in the same directory.")
-    exit()
+
+import material_core as core
+from material_core import profiling
+from material_ui import TaskStatusBar, VirtualTreeview
+from material_core.schema import (COLUMNS, DATA_FILE, FOLDER_WORKBOOK, HARDENING_MODELS, NUMERIC_COLUMNS,
+                                  PROVENANCE_COLUMN, material_types, sort_options)
+
+# Print startup timings (time to first window / first row) when set
+SHOW_TIMINGS = os.environ.get("MATERIAL_MANAGER_TIMING") == "1"
+# Trace every instrumented call to the file named by MATERIAL_MANAGER_PROFILE
+profiling.start_trace_from_env()
+
+# The material table and its query indexes, loaded on a background thread
+# while the window is built
+df = None
+engine = None
+derived_cache = None  # Derived property columns, shared by export and compare
+journal = core.Journal(DATA_FILE)  # Edits not yet compacted into the workbook
+data_source = DATA_FILE  # The workbook, or a folder opened with "Open Folder"
+
+# Every long-running action runs as a background task; results are delivered
+# on the Tk main thread by the status bar's polling loop
+scheduler = core.TaskScheduler()
+
+
+def _query_engine(frame):
+    # The similarity index is built with the engine so "Find Similar" answers at once
+    built = core.QueryEngine(frame)
+    built.similarity_index()
+    return built
+
+
+def _lean(frame):
+    # MATERIAL_MANAGER_LEAN=1 keeps the table in categorical and float32 columns
+    if not core.lean_requested():
+        return frame
+    compacted = core.compact_frame(frame)
+    print(core.memory_report(frame, compacted))
+    return compacted
+
+
+def _load_materials(task):
+    loaded_df = _lean(journal.replay(core.load_materials(DATA_FILE)))
+    return loaded_df, _query_engine(loaded_df), core.DerivedCache(loaded_df)
+
+
+scheduler.submit("Loading materials", _load_materials, cancellable=False,
+                 on_done=lambda result: _on_materials_loaded(result),
+                 on_error=lambda e: _on_load_error(e))
 
 # Create the main window
 root = tk.Tk()
@@ -59,6 +100,10 @@ style.configure('Download.TButton', background='#ADD8E6', foreground='white', fo
 style.map('Download.TButton', background=[('active', '#0056b3')])
 
 # --------- Main Frame Setup ---------
+# --------- Status Bar (task progress and cancel) ---------
+status_bar = TaskStatusBar(root, scheduler)
+status_bar.pack(side='bottom', fill='x')
+
 main_frame = ttk.Frame(root, padding=10)
 main_frame.pack(fill='both', expand=True)
 
@@ -81,7 +126,6 @@ search_entry.pack(side='left', padx=(0, 10))
 ttk.Label(search_filter_controls_frame, text="Sort by:", font=('Segoe UI', 11)).pack(side='left')
 
 sort_var = tk.StringVar()
-sort_options = ["None", "UTS", "Yield strength", "Endurance Strength"]
 
 sort_combobox = ttk.Combobox(
     search_filter_controls_frame,
@@ -98,7 +142,7 @@ sort_combobox.pack(side='left', padx=(0, 10))
 ttk.Label(search_filter_controls_frame, text="Filter Mfg. Process:", font=('Segoe UI', 11)).pack(side='left')
 
 mfg_process_var = tk.StringVar()
-mfg_process_options = ["All"] + sorted(df['Manufacturing process'].dropna().unique().tolist())
+mfg_process_options = ["All"]
 
 mfg_process_combobox = ttk.Combobox(
     search_filter_controls_frame,
@@ -115,7 +159,7 @@ mfg_process_combobox.pack(side='left', padx=(0, 10))
 ttk.Label(search_filter_controls_frame, text="Filter Applications:", font=('Segoe UI', 11)).pack(side='left')
 
 applications_var = tk.StringVar()
-applications_options = ["All"] + sorted(df['Applications'].dropna().unique().tolist())
+applications_options = ["All"]
 
 applications_combobox = ttk.Combobox(
     search_filter_controls_frame,
@@ -129,11 +173,69 @@ applications_combobox.set("All")
 applications_combobox.pack(side='left')
 
 # --------- Treeview Widget Setup ---------
-tree = ttk.Treeview(main_frame, columns=list(df.columns), show='headings')
+tree = ttk.Treeview(main_frame, columns=COLUMNS, show='headings')
+
+
+# --------- Sorting ---------
+# (column, descending) pairs, most significant first. Clicking a heading sorts
+# by that column, clicking it again reverses it; shift-click adds or reverses
+# a secondary key.
+sort_keys = []
+_shift_click = False
+
+
+def _remember_shift(event):
+    global _shift_click
+    _shift_click = bool(event.state & 0x0001)
+
+
+def sort_by_heading(column):
+    global sort_keys
+    directions = dict(sort_keys)
+    if _shift_click and sort_keys:
+        if column in directions:
+            sort_keys = [(c, not d if c == column else d) for c, d in sort_keys]
+        else:
+            sort_keys = sort_keys + [(column, False)]
+    elif len(sort_keys) == 1 and column in directions:
+        sort_keys = [(column, not directions[column])]
+    else:
+        sort_keys = [(column, False)]
+    sort_var.set(sort_keys[0][0])
+    update_sort_headings()
+    update_view(keep_top=True)
+
+
+def on_sort_selected(event=None):
+    global sort_keys
+    column = sort_var.get()
+    sort_keys = [] if column == "None" else [(column, False)]
+    update_sort_headings()
+    update_view()
+
+
+def update_sort_headings():
+    # Arrows show the direction of each sort key, numbered when there are several
+    marks = {column: ("\u25bc" if descending else "\u25b2") + (f"{i + 1}" if len(sort_keys) > 1 else "")
+             for i, (column, descending) in enumerate(sort_keys)}
+    for column in tree['columns']:
+        tree.heading(column, text=f"{column} {marks[column]}" if column in marks else column)
+
+
+tree.bind('<Button-1>', _remember_shift, add='+')
+
+
+def configure_tree_columns(columns):
+    global sort_keys
+    tree.configure(columns=list(columns))
+    sort_keys = [(column, descending) for column, descending in sort_keys if column in list(columns)]
+    for col in columns:
+        tree.heading(col, text=col, command=lambda c=col: sort_by_heading(c))
+        tree.column(col, width=110, anchor='center')
+    update_sort_headings()
+
 
-for col in df.columns:
-    tree.heading(col, text=col)
-    tree.column(col, width=110, anchor='center')
+configure_tree_columns(COLUMNS)
 
 vsb = ttk.Scrollbar(main_frame, orient="vertical", command=tree.yview)
 hsb = ttk.Scrollbar(main_frame, orient="horizontal", command=tree.xview)
@@ -143,6 +245,9 @@ tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
 vsb.pack(side='right', fill='y')
 tree.pack(fill='both', expand=True)
 
+# Only the visible rows exist as Treeview items; scrolling pages rows in
+table = VirtualTreeview(tree, vsb, row_height=25)
+
 # --------- Material Type Buttons Frame (Above horizontal scrollbar) ---------
 material_type_frame = ttk.Frame(main_frame)
 material_type_frame.pack(fill='x', pady=(10, 5))
@@ -152,7 +257,6 @@ ttk.Label(material_type_frame, text="Filter by Material Type:", font=('Segoe UI'
 
 material_type_filter = tk.StringVar(value="")  # No filter initially
 
-material_types = ["Steel", "Aluminum", "Cast Iron"]
 selected_material_button = None  # To track which button is selected
 
 
@@ -194,83 +298,170 @@ for mat in material_types:
     btn.pack(side='left', padx=5)
     material_type_buttons.append(btn)
 
+# --------- Numeric Range Filters ---------
+# Min/max entries for every numeric column, shown below the material types on demand
+range_frame = ttk.Frame(main_frame)
+range_vars = {}  # Column -> (min StringVar, max StringVar)
+RANGES_PER_ROW = 4
+
+for i, column in enumerate(NUMERIC_COLUMNS):
+    cell = ttk.Frame(range_frame)
+    cell.grid(row=i // RANGES_PER_ROW, column=i % RANGES_PER_ROW, sticky='w', padx=(0, 15), pady=2)
+    ttk.Label(cell, text=f"{column}:", width=18).pack(side='left')
+    range_vars[column] = (tk.StringVar(), tk.StringVar())
+    ttk.Entry(cell, textvariable=range_vars[column][0], width=8).pack(side='left')
+    ttk.Label(cell, text="to").pack(side='left', padx=3)
+    ttk.Entry(cell, textvariable=range_vars[column][1], width=8).pack(side='left')
+
+
+def range_filters():
+    """Return ``{column: (min, max)}`` for the range entries holding numbers; a blank bound is open."""
+    ranges = {}
+    invalid = []
+    for column, bound_vars in range_vars.items():
+        bounds = []
+        for var in bound_vars:
+            text = var.get().strip()
+            try:
+                bounds.append(float(text) if text else None)
+            except ValueError:
+                invalid.append(f"{column} '{text}'")
+                bounds.append(None)
+        if bounds != [None, None]:
+            ranges[column] = tuple(bounds)
+    if invalid:
+        status_bar.show_message(f"Ignoring range bounds that are not numbers: {', '.join(invalid)}")
+    return ranges
+
+
+def clear_ranges():
+    for bound_vars in range_vars.values():
+        for var in bound_vars:
+            var.set("")
+
+
+def toggle_ranges():
+    if range_frame.winfo_ismapped():
+        range_frame.pack_forget()
+    else:
+        range_frame.pack(fill='x', pady=(0, 5), after=material_type_frame)
+
+
+ttk.Button(range_frame, text="Clear Ranges", command=clear_ranges).grid(
+    row=(len(NUMERIC_COLUMNS) - 1) // RANGES_PER_ROW, column=RANGES_PER_ROW - 1, sticky='e', pady=2)
+ttk.Button(material_type_frame, text="Ranges...", command=toggle_ranges).pack(side='right', padx=5)
+
 hsb.pack(side='bottom', fill='x')  # Horizontal scrollbar at bottom
 
 
 # --------- Function to Display Data in Treeview ---------
-def display_data(dataframe):
-    tree.delete(*tree.get_children())
-    for i, (_, row) in enumerate(dataframe.iterrows()):
-        tag = 'evenrow' if i % 2 == 0 else 'oddrow'
-        tree.insert('', 'end', values=list(row), tags=(tag,))
-    tree.tag_configure('evenrow', background='white')
-    tree.tag_configure('oddrow', background='#e6f2ff')
+_first_row_time = None
+
+
+store = None  # Typed column arrays of df, rebuilt (without copying) whenever df is replaced
 
 
-# Initial load of all data
-display_data(df)
+def display_data(dataframe, positions=None, keep_top=False):
+    global _first_row_time, store
+    with profiling.span("render", rows=len(dataframe) if positions is None else len(positions)):
+        if store is None or store.frame is not dataframe:
+            store = core.MaterialStore(dataframe)
+        table.set_data(store, positions, keep_top=keep_top)
+
+    if _first_row_time is None and table.row_count():
+        tree.update_idletasks()
+        _first_row_time = time.perf_counter()
+        if SHOW_TIMINGS:
+            print(f"Time to first row: {(_first_row_time - _startup_time) * 1000:.0f} ms")
 
 
 # --------- Update View on Filters/Search/Sort ---------
-def update_view(*args):
-    global df  # Ensure we use the global df
-
-    filtered_df = df.copy()
-
-    # Filter by Material search text
-    search_text = search_var.get().strip().lower()
-    if search_text:
-        filtered_df = filtered_df[filtered_df['Material'].str.lower().str.contains(search_text, na=False)]
-
-    # Filter Manufacturing Process
-    mfg_value = mfg_process_var.get()
-    if mfg_value != "All":
-        filtered_df = filtered_df[filtered_df['Manufacturing process'] == mfg_value]
-
-    # Filter Applications
-    app_value = applications_var.get()
-    if app_value != "All":
-        filtered_df = filtered_df[filtered_df['Applications'] == app_value]
-
-    # Filter Material Type from buttons
-    mat_type = material_type_filter.get()
-    if mat_type:
-        filtered_df = filtered_df[filtered_df['Material'].str.contains(mat_type, case=False, na=False)]
-
-    # Sort data if valid column selected
-    sort_column = sort_var.get()
-    if sort_column and sort_column in sort_options and sort_column != "None":
-        try:
-            # Convert to numeric for proper sorting if applicable
-            if sort_column in ["Youngs modulus", "Poissons ratio", "UTS", "Yield strength", "Endurance Strength"]:
-                # Ensure the column exists before attempting to sort
-                if sort_column in filtered_df.columns:
-                    filtered_df = filtered_df.copy()  # Avoid SettingWithCopyWarning
-                    # Use a custom sort key to handle mixed types by coercing to numeric,
-                    # placing non-numeric values (NaN after coerce) at the end.
-                    filtered_df[sort_column] = pd.to_numeric(filtered_df[sort_column], errors='coerce')
-                    filtered_df = filtered_df.sort_values(by=sort_column, ascending=True, na_position='last')
-                else:
-                    messagebox.showwarning("Column Not Found",
-                                           f"Sorting column '{sort_column}' not found in current data.")
-            else:
-                filtered_df = filtered_df.sort_values(by=sort_column, ascending=True)
-        except Exception as e:
-            messagebox.showerror("Sorting Error", f"Could not sort by {sort_column}: {e}")
+def update_view(*args, keep_top=False):
+    if df is None:  # Still loading
+        return
 
-    display_data(filtered_df)
+    filters = dict(
+        search_text=search_var.get(),
+        mfg_process=selected_category(mfg_process_var),
+        application=selected_category(applications_var),
+        material_type=material_type_filter.get(),
+        ranges=range_filters(),
+    )
+    try:
+        with profiling.span("filter", search=search_var.get(), sort=sort_keys):
+            positions = engine.positions(sort_keys=sort_keys, **filters)
+            update_category_counts(filters)
+    except KeyError as e:
+        column = e.args[0] if e.args else e
+        role = "Range filter" if column in (filters["ranges"] or {}) else "Sorting"
+        messagebox.showwarning("Column Not Found", f"{role} column '{column}' not found in current data.")
+        return
+    except Exception as e:
+        sort_columns = ", ".join(column for column, _ in sort_keys)
+        messagebox.showerror("Sorting Error", f"Could not sort by {sort_columns}: {e}")
+        return
+
+    display_data(df, positions, keep_top=keep_top)
     check_download_button_state()  # Update download button state after view update
+    status_bar.show_timings(f"{profiling.readout('filter', 'render')} / {table.row_count():,} rows")
+
+
+# The category dropdowns read "Forging (1,204)": the rows each choice would
+# show under the other filters. Labels map back to the category values.
+category_labels = {}  # Combobox variable -> {label: category}
+CATEGORY_FILTERS = [(mfg_process_var, mfg_process_combobox, 'Manufacturing process'),
+                    (applications_var, applications_combobox, 'Applications')]
+
+
+def selected_category(var):
+    label = var.get()
+    return category_labels.get(var, {}).get(label, label)
+
+
+def update_category_counts(filters):
+    for var, combobox, column in CATEGORY_FILTERS:
+        selected = selected_category(var)
+        counts = engine.category_counts(column, **filters)
+        labels = {"All": "All"}
+        labels.update((f"{value} ({counts[value]:,})", value) for value in sorted(counts))
+        category_labels[var] = labels
+        combobox.configure(values=list(labels))
+        var.set(next((label for label, value in labels.items() if value == selected), selected))
+
+
+# Coalesce fast typing in the search box into a single update_view
+SEARCH_DEBOUNCE_MS = 150
+_search_after_id = None
+
+
+def schedule_search_update(*args):
+    global _search_after_id
+    if _search_after_id is not None:
+        root.after_cancel(_search_after_id)
+    _search_after_id = root.after(SEARCH_DEBOUNCE_MS, _run_search_update)
+
+
+def _run_search_update():
+    global _search_after_id
+    _search_after_id = None
+    update_view()
 
 
 # Bind events to trigger filtering and sorting
-search_var.trace_add('write', update_view)
-sort_combobox.bind('<<ComboboxSelected>>', update_view)
+search_var.trace_add('write', schedule_search_update)
+for bound_vars in range_vars.values():
+    for bound_var in bound_vars:
+        bound_var.trace_add('write', schedule_search_update)
+sort_combobox.bind('<<ComboboxSelected>>', on_sort_selected)
 mfg_process_combobox.bind('<<ComboboxSelected>>', update_view)
 applications_combobox.bind('<<ComboboxSelected>>', update_view)
 
 
 # --------- Add Data Functionality ---------
 def add_data():
+    if df is None:  # Still loading
+        return
+
     add_window = tk.Toplevel(root)
     add_window.title("Add New Material Data")
     add_window.geometry("500x600")
@@ -281,20 +472,21 @@ def add_data():
     form_frame.pack(fill='both', expand=True)
 
     entries = {}
-    for i, col in enumerate(df.columns):
+    # The provenance of folder rows is filled in, not typed
+    for i, col in enumerate(c for c in df.columns if c != PROVENANCE_COLUMN):
         ttk.Label(form_frame, text=f"{col}:", font=('Segoe UI', 10)).grid(row=i, column=0, sticky='w', pady=5, padx=5)
         entry = ttk.Entry(form_frame, width=40, font=('Segoe UI', 10))
         entry.grid(row=i, column=1, sticky='ew', pady=5, padx=5)
         entries[col] = entry
 
+    @profiling.timed("submit")
     def submit_new_data():
-        global df
+        global df, engine
         new_row_data = {}
         for col, entry_widget in entries.items():
             value = entry_widget.get().strip()
             # Basic type conversion for numeric columns, handle errors gracefully
-            if col in ["Youngs modulus", "Poissons ratio", "UTS", "Yield strength", "Endurance Strength",
-                       "%EL"]:  # Changed %elongation to %EL
+            if col in NUMERIC_COLUMNS:
                 try:
                     new_row_data[col] = float(value) if value else None  # Convert to float, None if empty
                 except ValueError:
@@ -302,21 +494,28 @@ def add_data():
                     return
             else:
                 new_row_data[col] = value if value else None  # Store None for empty strings
+        if PROVENANCE_COLUMN in df.columns:
+            new_row_data[PROVENANCE_COLUMN] = FOLDER_WORKBOOK
 
-        # Create a new DataFrame from the new row
-        new_row_df = pd.DataFrame([new_row_data])
-
-        # Append the new row to the main DataFrame
-        df = pd.concat([df, new_row_df], ignore_index=True)
-
-        # Save the updated DataFrame back to Excel
+        # Journal the new row first so it survives a crash, then apply it in memory
         try:
-            df.to_excel("sample_material_data.xlsx", index=False)
-            messagebox.showinfo("Success", "New data added successfully and saved to Excel.")
-            update_view()  # Refresh the Treeview
-            add_window.destroy()  # Close the add data window
+            journal.record_add(new_row_data)
         except Exception as e:
-            messagebox.showerror("Save Error", f"Could not save data to Excel: {e}")
+            messagebox.showerror("Save Error", f"Could not save data: {e}")
+            return
+
+        df = core.append_material(df, new_row_data)
+        engine.extend(df)
+        derived_cache.update(df)
+        _refresh_scatter_explorer()
+
+        # Compact the journal into the Excel file in the background once enough edits piled up
+        if journal.needs_compaction():
+            compact_journal_in_background()
+
+        messagebox.showinfo("Success", "New data added successfully.")
+        update_view()  # Refresh the Treeview
+        add_window.destroy()  # Close the add data window
 
     submit_button = ttk.Button(
         form_frame,
@@ -327,253 +526,196 @@ def add_data():
     submit_button.grid(row=len(df.columns), column=0, columnspan=2, pady=20)
 
 
-# --------- Download Data Functionality ---------
-def download_selected_row_details():
-    selected_item = tree.selection()
-    if not selected_item:
-        messagebox.showwarning("No Selection", "Please select a row to download details.")
-        return
-
-    # Get the values of the selected row
-    values = tree.item(selected_item, 'values')
-
-    # Create a dictionary of the selected row data using column names
-    selected_row_dict = dict(zip(df.columns, values))
+# --------- Bulk Import ---------
+IMPORT_PREVIEW_ROWS = 500  # Accepted rows listed in the import preview
 
-    # --- Extract required properties ---
-    material_name = selected_row_dict.get('Material', 'N/A')
-    mfg_process = selected_row_dict.get('Manufacturing process', 'N/A')
-    applications = selected_row_dict.get('Applications', 'N/A')
-    density = selected_row_dict.get('Density', 'N/A')
 
-    # Convert extracted values to float, handling potential missing or non-numeric data
-    try:
-        yield_strength = float(selected_row_dict.get('Yield strength')) if selected_row_dict.get(
-            'Yield strength') is not None else None
-        uts = float(selected_row_dict.get('UTS')) if selected_row_dict.get('UTS') is not None else None
-        # Changed from '%elongation' to '%EL'
-        percent_elongation = float(selected_row_dict.get('%EL')) if selected_row_dict.get('%EL') is not None else None
-        youngs_modulus = float(selected_row_dict.get('Youngs modulus')) if selected_row_dict.get(
-            'Youngs modulus') is not None else None
-    except ValueError:
-        messagebox.showerror("Data Error",
-                             "Could not convert one or more required properties to numbers. Please check the data in the Excel file.")
+def import_materials():
+    if df is None:  # Still loading
         return
 
-    # --- Perform Calculations ---
-    calculated_values = []
-    calculation_errors = []
-
-    # 1) Nominal strain at yield = yield strength / young's modulus
-    if yield_strength is not None and youngs_modulus is not None and youngs_modulus != 0:
-        nominal_strain_at_yield = yield_strength / youngs_modulus
-        calculated_values.append(f"Nominal strain at yield: {nominal_strain_at_yield:.9f}")
-    else:
-        nominal_strain_at_yield = None
-        calculation_errors.append(
-            "Nominal strain at yield: Missing Yield Strength or Young's Modulus or Young's Modulus is zero.")
-
-    # 2) Nominal strain at UTS = %elongation/100
-    if percent_elongation is not None:
-        nominal_strain_at_uts = percent_elongation / 100.0
-        calculated_values.append(f"Nominal strain at UTS: {nominal_strain_at_uts:.9f}")
-    else:
-        nominal_strain_at_uts = None
-        calculation_errors.append("Nominal strain at UTS: Missing %EL.")  # Changed message
-
-    # 3) At yield engineering strain = Nominal strain at yield
-    at_yield_engg_strain = nominal_strain_at_yield
-    if at_yield_engg_strain is not None:
-        calculated_values.append(f"At yield engineering strain: {at_yield_engg_strain:.9f}")
-    else:
-        calculated_values.append("At yield engineering strain: Not calculable (see above).")
-
-    # 4) At yield true strain = log base e (1+at yield engineering strain)
-    if at_yield_engg_strain is not None and (1 + at_yield_engg_strain) > 0:
-        at_yield_true_strain = math.log(1 + at_yield_engg_strain)
-        calculated_values.append(f"At yield true strain: {at_yield_true_strain:.5f}")
-    else:
-        at_yield_true_strain = None
-        calculation_errors.append("At yield true strain: Cannot calculate log (1+engg strain <= 0).")
-
-    # 5) At yield true stress = yield strength*(1 + at yield engg strain)
-    if yield_strength is not None and at_yield_engg_strain is not None:
-        at_yield_true_stress = yield_strength * (1 + at_yield_engg_strain)
-        calculated_values.append(f"At yield true stress: {at_yield_true_stress:.2f}")
-    else:
-        at_yield_true_stress = None
-        calculation_errors.append("At yield true stress: Missing Yield Strength or At yield engineering strain.")
-
-    # 6) At UTS true strain = log base e ( 1+ %elongation/100)
-    if nominal_strain_at_uts is not None and (1 + nominal_strain_at_uts) > 0:
-        at_uts_true_strain = math.log(1 + nominal_strain_at_uts)
-        calculated_values.append(f"At UTS true strain: {at_uts_true_strain:.9f}")
-    else:
-        at_uts_true_strain = None
-        calculation_errors.append("At UTS true strain: Cannot calculate log (1+nominal strain at UTS <= 0).")
-
-    # 7) At UTS true stress = UTS * (1+%elongation/100)
-    if uts is not None and nominal_strain_at_uts is not None:
-        at_uts_true_stress = uts * (1 + nominal_strain_at_uts)
-        calculated_values.append(f"At UTS true stress: {at_uts_true_stress:.2f}")
-    else:
-        at_uts_true_stress = None
-        calculation_errors.append("At UTS true stress: Missing UTS or Nominal strain at UTS.")
-
-    # 8) Plastic strain at yield = At yield true strain - (At yield true stress/youngs modulus)
-    if at_yield_true_strain is not None and at_yield_true_stress is not None and youngs_modulus is not None and youngs_modulus != 0:
-        plastic_strain_at_yield = at_yield_true_strain - (at_yield_true_stress / youngs_modulus)
-        calculated_values.append(f"Plastic strain at yield: {plastic_strain_at_yield:.9f}")
-    else:
-        plastic_strain_at_yield = None
-        calculation_errors.append(
-            "Plastic strain at yield: Missing required values for calculation or Young's Modulus is zero.")
-
-    # 9) Plastic strain at UTS = At UTS true strain-(at UTS true stress/youngs modulus)
-    if at_uts_true_strain is not None and at_uts_true_stress is not None and youngs_modulus is not None and youngs_modulus != 0:
-        plastic_strain_at_uts = at_uts_true_strain - (at_uts_true_stress / youngs_modulus)
-        calculated_values.append(f"Plastic strain at UTS: {plastic_strain_at_uts:.5f}")
-    else:
-        plastic_strain_at_uts = None
-        calculation_errors.append(
-            "Plastic strain at UTS: Missing required values for calculation or Young's Modulus is zero.")
-
-    # --- Construct Output Content ---
-    #my code
-
-
-
-
-    #.inp file format 
-    #*****START*****
-    output_content = f"**\n"
-    output_content += f"**HMNAME MATS          1 {material_name}     3\n"
-    output_content += f"*MATERIAL, NAME={material_name}\n"
-    output_content += f"DENSITY\n"
-    output_content += f"{density},0.0 \n"
-    output_content += f"*ELASTIC, TYPE = ISOTROPIC\n"
-    output_content += f"{youngs_modulus}  ,{percent_elongation/100.00}      ,0.0 \n"
-    output_content += f"*PLASTIC\n"
-    output_content += f"{yield_strength:.2f}	  ,0.00000   ,0.0\n"
-    output_content += f"{at_yield_true_stress:.2f}	  ,{at_yield_true_strain:.5f}   ,0.0\n"
-    output_content += f"{at_uts_true_stress:.2f}	  ,{plastic_strain_at_uts:.5f}   ,0.0\n"
-    output_content += f"*****\n"
-    #*****END*****
-
+    import_window = tk.Toplevel(root)
+    import_window.title("Import Materials")
+    import_window.geometry("1000x650")
+    import_window.transient(root)
+    import_window.grab_set()
 
+    form_frame = ttk.Frame(import_window, padding=20)
+    form_frame.pack(fill='both', expand=True)
 
+    preview = None  # The ImportPreview on show
+    summary_var = tk.StringVar(value="Open a .csv/.xlsx file or paste cells copied from a spreadsheet, "
+                                     "including the header row.")
+
+    source_buttons = ttk.Frame(form_frame)
+    source_buttons.pack(fill='x')
+    ttk.Label(form_frame, textvariable=summary_var).pack(anchor='w', pady=(10, 5))
+
+    ttk.Label(form_frame, text="Materials to add:", font=('Segoe UI', 10, 'bold')).pack(anchor='w')
+    accepted = ttk.Treeview(form_frame, columns=COLUMNS, show='headings', height=12)
+    for column in COLUMNS:
+        accepted.heading(column, text=column)
+        accepted.column(column, width=80)
+    accepted.pack(fill='both', expand=True)
+
+    ttk.Label(form_frame, text="Rejected rows:", font=('Segoe UI', 10, 'bold')).pack(anchor='w', pady=(10, 0))
+    rejected = ttk.Treeview(form_frame, columns=("Row", "Material", "Problem"), show='headings', height=6)
+    for column, width in (("Row", 60), ("Material", 200), ("Problem", 600)):
+        rejected.heading(column, text=column)
+        rejected.column(column, width=width, anchor='e' if column == "Row" else 'w')
+    rejected.pack(fill='both', expand=True)
+
+    def show(result):
+        nonlocal preview
+        preview = result
+        accepted.delete(*accepted.get_children())
+        rejected.delete(*rejected.get_children())
+        shown = result.rows.head(IMPORT_PREVIEW_ROWS)
+        for values in shown.astype(object).where(shown.notna(), "").itertuples(index=False):
+            accepted.insert('', 'end', values=values)
+        for reject in result.rejects:
+            rejected.insert('', 'end', values=reject)
+        summary = result.summary()
+        if len(result) > IMPORT_PREVIEW_ROWS:
+            summary += f" (the first {IMPORT_PREVIEW_ROWS:,} are listed)"
+        summary_var.set(summary)
+        add_button.config(text=f"Add {len(result):,} Materials", state='normal' if len(result) else 'disabled')
+
+    def read(reader, source, name):
+        existing = df
+        scheduler.submit("Reading import", lambda task: reader(source, existing), on_done=show,
+                         on_error=lambda e: messagebox.showerror("Import Error", f"Could not read {name}: {e}",
+                                                                 parent=import_window))
+
+    def open_file():
+        path = filedialog.askopenfilename(parent=import_window, title="Import Materials",
+                                          filetypes=[("Material tables", "*.xlsx *.csv"), ("All files", "*.*")])
+        if path:
+            read(core.preview_file, path, os.path.basename(path))
+
+    def paste():
+        try:
+            text = root.clipboard_get()
+        except tk.TclError:
+            text = ""
+        if not text.strip():
+            messagebox.showinfo("Clipboard Empty", "Copy the cells of a table, including its header row, first.",
+                                parent=import_window)
+            return
+        read(core.preview_text, text, "the clipboard")
+
+    def add_rows():
+        global df, engine
+        rows = preview.rows
+        if PROVENANCE_COLUMN in df.columns:
+            rows = rows.assign(**{PROVENANCE_COLUMN: FOLDER_WORKBOOK})
+        with profiling.span("import", rows=len(rows)):
+            # One journal entry for every row, so a crash adds all of them or none
+            try:
+                journal.record_add_many(rows)
+            except Exception as e:
+                messagebox.showerror("Save Error", f"Could not save data: {e}", parent=import_window)
+                return
+            df = core.append_materials(df, rows)
+            engine.extend(df)
+            derived_cache.update(df)
+        _refresh_scatter_explorer()
+        compact_journal_in_background()
+        update_view()
+        status_bar.show_message(f"Imported {len(rows):,} materials")
+        import_window.destroy()
+
+    ttk.Button(source_buttons, text="Open File...", command=open_file).pack(side='left', padx=(0, 5))
+    ttk.Button(source_buttons, text="Paste", command=paste).pack(side='left', padx=5)
+    add_button = ttk.Button(form_frame, text="Add Materials", command=add_rows, style='AddData.TButton',
+                            state='disabled')
+    add_button.pack(pady=(15, 0))
 
 
+# --------- Download Data Functionality ---------
+def selected_materials():
+    """Return ``(label, row dict)`` pairs for the selected table rows."""
+    return [(record.label, record.to_dict()) for record in table.selected_records()]
 
 
+def write_files_in_background(files, description):
+    """Write ``(path, content)`` pairs on a background task and report the outcome."""
+    def write_files(task):
+        written = []
+        for i, (file_path, content) in enumerate(files):
+            task.check_cancelled()
+            with open(file_path, "w") as f:
+                f.write(content)
+            written.append(file_path)
+            task.report(i + 1, len(files))
+        return written
+
+    def on_done(written):
+        names = "\n".join(os.path.basename(path) for path in written)
+        messagebox.showinfo("Download Complete", f"{description} saved to:\n{names}")
+
+    scheduler.submit(f"Saving {description}", write_files, on_done=on_done,
+                     on_error=lambda e: messagebox.showerror("Download Error", f"Failed to save file: {e}"),
+                     on_cancel=lambda: status_bar.show_message("Download cancelled"))
+
+
+@profiling.timed("download")
+def download_selected_files(fmt):
+    """Ask for a file name per selected row and write it in the solver format ``fmt``."""
+    writer = core.get_writer(fmt)
+    if hardening_model():
+        writer = writer.with_hardening(hardening_model())
+    selected_rows = selected_materials()
+    if not selected_rows:
+        messagebox.showwarning("No Selection", f"Please select at least one row to download .{fmt} files.")
+        return
 
-    #my code
-    # output_content += f"Material: {material_name}\n"
-    # output_content += f"Manufacturing Process: {mfg_process}\n"
-    # output_content += f"Applications: {applications}\n\n"
+    files = []
+    for label, selected_row_dict in selected_rows:
+        material_name = selected_row_dict.get('Material', 'N/A')
 
-    # output_content += "--- Input Properties (from selected row) ---\n"
-    # output_content += f"Yield strength: {yield_strength if yield_strength is not None else 'N/A'}\n"
-    # output_content += f"UTS: {uts if uts is not None else 'N/A'}\n"
-    # output_content += f"%EL: {percent_elongation if percent_elongation is not None else 'N/A'}\n"  # Changed %elongation to %EL
-    # output_content += f"Young's modulus: {youngs_modulus if youngs_modulus is not None else 'N/A'}\n\n"
+        try:
+            content = writer.content(selected_row_dict, derived_cache.values(label))
+        except ValueError as e:
+            messagebox.showerror("Data Error",
+                                 f"Could not calculate the material properties. Please check the data in the Excel file.\n{e}")
+            continue
 
-    # output_content += "--- Calculated Mechanical Properties ---\n"
-    # output_content += "\n".join(calculated_values)
+        # Open a file dialog to choose where to save the file
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=f".{fmt}",
+            filetypes=[(writer.description, f"*.{fmt}"), ("All files", "*.*")],
+            initialfile=writer.file_name(str(material_name))
+        )
 
-    if calculation_errors:
-        output_content += "\n\n--- Calculation Warnings/Errors ---\n"
-        output_content += "\n".join(calculation_errors)
+        if file_path:
+            files.append((file_path, content))
 
-    # Open a file dialog to choose where to save the file
-    initial_filename = f"NL_{material_name.replace(' ', '_')}.inp"
-    file_path = filedialog.asksaveasfilename(
-        defaultextension=".inp",
-        filetypes=[("INP files", "*.inp"), ("All files", "*.*")],
-        initialfile=initial_filename
-    )
+    if files:
+        write_files_in_background(files, f".{fmt} files")
 
-    if file_path:
-        try:
-            with open(file_path, "w") as f:
-                f.write(output_content)
-            messagebox.showinfo("Download Complete", f"Calculated details saved to:\n{os.path.basename(file_path)}")
-        except Exception as e:
-            messagebox.showerror("Download Error", f"Failed to save file: {e}")
 
+def download_selected_row_details():
+    download_selected_files("inp")
 
 
 #**********BDF file Generator***************
 
 def download_bdf_files():
-    selected_items = tree.selection()
-    if not selected_items:
-        messagebox.showwarning("No Selection", "Please select at least one row to download .bdf files.")
-        return
-
-    for item in selected_items:
-        values = tree.item(item, 'values')
-        selected_row_dict = dict(zip(df.columns, values))
-
-        material_name = selected_row_dict.get('Material', 'UNKNOWN')
-        youngs_modulus = selected_row_dict.get("Youngs modulus", "0.0")
-        poissons_ratio = selected_row_dict.get("Poissons ratio", "0.0")
-        density = selected_row_dict.get("Density", "0.0")
-
-        try:
-            youngs_modulus = float(youngs_modulus)
-        except:
-            youngs_modulus = 0.0
-        try:
-            poissons_ratio = float(poissons_ratio)
-        except:
-            poissons_ratio = 0.0
-        try:
-            density = float(density)
-        except:
-            density = 0.0
-
-        # Construct BDF content
-        bdf_content = ""
-        bdf_content += f'$HMNAME MAT                    1"{material_name}" "MAT1"\n'
-        bdf_content += f"$HWCOLOR MAT                   1       3\n"
-        exp_density = f"{density:.2e}"       # e.g., '1.12e+09'
-        mantissa, exponent = exp_density.split('e')  # '1.12', '+09'
-        sign = '+' if int(exponent) >= 0 else '-'    # get sign based on exponent
-        bdf_density = f"{mantissa}{sign}{abs(int(exponent)):02d}"  # '1.12+09' or '1.12-09'
-
-        bdf_content += f"MAT1    1       {youngs_modulus:<10.1f}      {poissons_ratio:<6.2f}  {bdf_density}\n"
-        bdf_content += f"$2345678$2345678$2345678$2345678$2345678$2345678\n"
-        bdf_content += f"| material name |  ID(1)   |  Young's modulus| blank | poissons ratio|density|\n"
-
-        # Save file
-        initial_filename = f"{material_name.replace(' ', '_')}.bdf"
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".bdf",
-            filetypes=[("BDF files", "*.bdf"), ("All files", "*.*")],
-            initialfile=initial_filename
-        )
-
-        if file_path:
-            try:
-                with open(file_path, "w") as f:
-                    f.write(bdf_content)
-                messagebox.showinfo("Download Complete", f".bdf file saved: {os.path.basename(file_path)}")
-            except Exception as e:
-                messagebox.showerror("Download Error", f"Failed to save .bdf file: {e}")
+    download_selected_files("bdf")
 
 
 
 # Function to enable/disable download button based on selection
 def check_download_button_state(*args):
-    if tree.selection():
+    if table.selection():
         download_menu_button.config(state='normal')
     else:
         download_menu_button.config(state='disabled')
 
 
 # Bind the Treeview selection event to the state checker
-tree.bind('<<TreeviewSelect>>', check_download_button_state)
+tree.bind('<<TreeviewSelect>>', check_download_button_state, add='+')
 
 # --------- Add Data Button to Main Window ---------
 add_data_button = ttk.Button(
@@ -584,70 +726,72 @@ add_data_button = ttk.Button(
 )
 add_data_button.pack(side='right', padx=(10, 5))  # Pack it to the right of controls
 
+import_button = ttk.Button(
+    search_filter_add_frame,
+    text="Import",
+    command=import_materials,
+    style='AddData.TButton'
+)
+import_button.pack(side='right', padx=(10, 5))
 
-#*******graphs for comparison************
-def show_stress_strain_plot(mat1, mat2):
-    compare_window = tk.Toplevel(root)
-    compare_window.title("Stress-Strain Curve Comparison")
-    compare_window.geometry("800x600")
 
-    fig, ax = plt.subplots(figsize=(8, 5))
+#*******graphs for comparison************
+def _import_matplotlib(task):
+    # Imported on a background task the first time a comparison is opened
+    import matplotlib.backends.backend_tkagg
+    import matplotlib.collections
 
-    for mat in [mat1, mat2]:
-        # Elastic line: from (0, 0) to (ε_yield, σ_yield)
-        x1 = [0, mat['yield_strain']]
-        y1 = [0, mat['yield_strength']]
 
-        # Plastic line: from (ε_yield, σ_yield) to (ε_final, σ_uts)
-        x2 = [mat['yield_strain'], mat['elongation']]
-        y2 = [mat['yield_strength'], mat['uts']]
+comparison_plot = None  # Created on first use and reused afterwards
 
-        ax.plot(x1 + x2, y1 + y2, label=mat['name'], linewidth=2)
 
-    ax.set_title("Stress-Strain Comparison")
-    ax.set_xlabel("Strain")
-    ax.set_ylabel("Stress (MPa)")
-    ax.legend()
-    ax.grid(True)
+def show_stress_strain_plot(names, points):
+    """Overlay the ``(n, 3, 2)`` stress-strain polylines ``points`` in the comparison window."""
+    if comparison_plot is not None:
+        _draw_stress_strain_plot(names, points)
+        return
+    scheduler.submit("Preparing plot", _import_matplotlib, cancellable=False,
+                     on_done=lambda result: _draw_stress_strain_plot(names, points),
+                     on_error=lambda e: messagebox.showerror("Plot Error", f"Could not draw the plot: {e}"))
 
-    canvas = FigureCanvasTkAgg(fig, master=compare_window)
-    canvas.draw()
-    canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
+def _draw_stress_strain_plot(names, points):
+    global comparison_plot
+    with profiling.span("plot", curves=len(names)):
+        if comparison_plot is None:
+            from material_ui.compare_plot import ComparisonPlot
+            comparison_plot = ComparisonPlot(root)
+        comparison_plot.show(names, points)
+    status_bar.show_timings(f"{profiling.readout('plot')} / {len(names):,} curves")
 
 
 def compare_selected_materials():
-    selected = tree.selection()
-    if len(selected) != 2:
-        messagebox.showwarning("Invalid Selection", "Please select exactly two rows to compare.")
+    if df is None:  # Still loading
         return
 
-    materials = []
-    for item in selected:
-        values = tree.item(item, 'values')
-        material = dict(zip(df.columns, values))
-        try:
-            youngs = float(material.get('Youngs modulus'))
-            yield_strength = float(material.get('Yield strength'))
-            uts = float(material.get('UTS'))
-            elongation = float(material.get('%EL')) / 100.0
-        except (ValueError, TypeError):
-            messagebox.showerror("Invalid Data", "Selected materials must have numeric mechanical properties.")
-            return
+    labels = table.selection()
+    if not labels:
+        messagebox.showwarning("No Selection", "Please select one or more rows to compare.")
+        return
 
-        # Calculate yield strain
-        yield_strain = yield_strength / youngs
-        stress_strain_data = {
-            'name': material['Material'],
-            'youngs': youngs,
-            'yield_strength': yield_strength,
-            'yield_strain': yield_strain,
-            'uts': uts,
-            'elongation': elongation
-        }
-        materials.append(stress_strain_data)
+    model = hardening_model()
+    points, valid = derived_cache.hardening_curves(labels, model) if model else derived_cache.curves(labels)
+    if model:
+        problem = (f"cannot be fitted with the {model} curve (it needs UTS above the yield strength and a "
+                   "positive plastic strain at UTS)")
+    else:
+        problem = "have missing mechanical properties"
+    if not valid.any():
+        messagebox.showerror("Invalid Data", f"The selected materials {problem}.")
+        return
+    if not valid.all():
+        messagebox.showwarning(
+            "Incomplete Data",
+            f"{int((~valid).sum())} of {len(labels)} selected materials {problem} and are not plotted."
+        )
 
-    show_stress_strain_plot(materials[0], materials[1])
+    names = df.loc[labels, 'Material'].astype(str).to_numpy()[valid]
+    show_stress_strain_plot(names, points[valid])
 
 
 compare_button = ttk.Button(
@@ -658,6 +802,186 @@ compare_button = ttk.Button(
 )
 compare_button.pack(side='right', padx=(10, 5))
 
+# Hardening model of the compared curves and of the exported *PLASTIC tables
+THREE_POINT_CURVE = "3-point"
+curve_var = tk.StringVar(value=THREE_POINT_CURVE)
+curve_combobox = ttk.Combobox(
+    search_filter_add_frame,
+    textvariable=curve_var,
+    values=[THREE_POINT_CURVE] + HARDENING_MODELS,
+    state='readonly',
+    width=14,
+    font=('Segoe UI', 10)
+)
+curve_combobox.pack(side='right')
+ttk.Label(search_filter_add_frame, text="Curve:", font=('Segoe UI', 11)).pack(side='right', padx=(10, 5))
+
+
+def hardening_model():
+    """Return the selected hardening model, or None for the three-point table."""
+    model = curve_var.get()
+    return None if model == THREE_POINT_CURVE else model
+
+
+# --------- Property Scatter Explorer ---------
+scatter_explorer = None  # Created on first use and reused afterwards
+
+
+def open_scatter_explorer():
+    if df is None:  # Still loading
+        return
+    if scatter_explorer is not None:
+        _show_scatter_explorer()
+        return
+    scheduler.submit("Preparing plot", _import_matplotlib, cancellable=False,
+                     on_done=lambda result: _show_scatter_explorer(),
+                     on_error=lambda e: messagebox.showerror("Plot Error", f"Could not draw the plot: {e}"))
+
+
+def _show_scatter_explorer():
+    global scatter_explorer
+    if scatter_explorer is None:
+        from material_ui.scatter_plot import ScatterExplorer
+        scatter_explorer = ScatterExplorer(root, on_brush=_on_scatter_brush)
+        scatter_explorer.set_data(df)
+    scatter_explorer.highlight(table.selection())
+    scatter_explorer.show()
+
+
+def _on_scatter_brush(labels):
+    # Select the brushed rows that are part of the current table view
+    table.set_selection(labels)
+    shown = table.selection()
+    if shown:
+        table.see(shown[0])
+    status_bar.show_message(f"{len(labels):,} materials brushed, {len(shown):,} shown in the table")
+
+
+def _on_table_select(event=None):
+    if scatter_explorer is not None:
+        scatter_explorer.highlight(table.selection())
+
+
+def _refresh_scatter_explorer():
+    if scatter_explorer is not None:
+        scatter_explorer.set_data(df)
+
+
+tree.bind('<<TreeviewSelect>>', _on_table_select, add='+')
+
+explore_button = ttk.Button(
+    search_filter_add_frame,
+    text="Explore",
+    command=open_scatter_explorer,
+    style='AddData.TButton'
+)
+explore_button.pack(side='right', padx=(10, 5))
+
+
+# --------- Find Similar Materials ---------
+def find_similar():
+    """Open a dialog listing the materials closest to the selected one, or to typed target values."""
+    if df is None:  # Still loading
+        return
+    index = engine.similarity_index()
+    labels = table.selection()
+    reference = labels[0] if labels else None
+
+    similar_window = tk.Toplevel(root)
+    similar_window.title("Find Similar Materials")
+    similar_window.transient(root)
+
+    form_frame = ttk.Frame(similar_window, padding=20)
+    form_frame.pack(fill='both', expand=True)
+
+    title = (f"Materials like: {df.at[reference, 'Material']}" if reference is not None
+             else "Materials closest to the target values")
+    ttk.Label(form_frame, text=title, font=('Segoe UI', 10, 'bold')).grid(row=0, column=0, columnspan=3,
+                                                                          sticky='w')
+    ttk.Label(form_frame, text="Target").grid(row=1, column=1, sticky='w', padx=5)
+    ttk.Label(form_frame, text="Weight").grid(row=1, column=2, sticky='w', padx=5)
+
+    # Targets start at the reference row's values; a blank target is not compared
+    reference_values = index.values(reference) if reference is not None else {}
+    prefilled = {}
+    target_entries = {}
+    weight_entries = {}
+    for i, column in enumerate(index.columns):
+        value = reference_values.get(column)
+        prefilled[column] = "" if value is None else f"{value:g}"
+        ttk.Label(form_frame, text=f"{column}:").grid(row=2 + i, column=0, sticky='w', pady=2)
+        target_entries[column] = ttk.Entry(form_frame, width=14)
+        target_entries[column].insert(0, prefilled[column])
+        target_entries[column].grid(row=2 + i, column=1, padx=5, pady=2)
+        weight_entries[column] = ttk.Entry(form_frame, width=6)
+        weight_entries[column].insert(0, "1")
+        weight_entries[column].grid(row=2 + i, column=2, padx=5, pady=2)
+
+    row = 2 + len(index.columns)
+    ttk.Label(form_frame, text="Results:").grid(row=row, column=0, sticky='w', pady=(10, 0))
+    count_var = tk.StringVar(value="10")
+    ttk.Spinbox(form_frame, from_=1, to=500, textvariable=count_var, width=6).grid(row=row, column=1, sticky='w',
+                                                                                 padx=5, pady=(10, 0))
+
+    results = ttk.Treeview(form_frame, columns=("Material", "Distance"), show='headings', height=10)
+    results.heading("Material", text="Material")
+    results.heading("Distance", text="Distance")
+    results.column("Material", width=280)
+    results.column("Distance", width=80, anchor='e')
+    results.grid(row=row + 2, column=0, columnspan=3, sticky='nsew', pady=(10, 0))
+
+    result_labels = {}  # Result item id -> table label
+
+    def search():
+        try:
+            k = int(count_var.get())
+            weights = {column: float(entry.get() or 0) for column, entry in weight_entries.items()}
+            targets = {column: float(entry.get()) if entry.get().strip() else None
+                       for column, entry in target_entries.items()}
+            if k < 1:
+                raise ValueError("The number of results must be at least 1")
+            with profiling.span("similar", k=k):
+                if reference is not None and reference in df.index:
+                    # Only the edited targets are passed on; the rest come from the indexed row
+                    changes = {column: targets[column] for column, entry in target_entries.items()
+                               if entry.get().strip() != prefilled[column]}
+                    found, distances = index.like(reference, k, weights, changes)
+                else:
+                    found, distances = index.query(targets, k, weights)
+        except ValueError as e:
+            messagebox.showerror("Invalid Input", str(e), parent=similar_window)
+            return
+        results.delete(*results.get_children())
+        result_labels.clear()
+        for label, distance in zip(found, distances):
+            result_labels[str(label)] = label
+            results.insert('', 'end', iid=str(label), values=(df.at[label, 'Material'], f"{distance:.3f}"))
+        status_bar.show_timings(f"{profiling.readout('similar')} / {len(index):,} materials searched")
+
+    def select_in_table():
+        found = [result_labels[item] for item in results.selection() or results.get_children()]
+        table.set_selection(found)
+        shown = table.selection()
+        if shown:
+            table.see(shown[0])
+        status_bar.show_message(f"{len(shown):,} of {len(found):,} similar materials shown in the table")
+
+    buttons = ttk.Frame(form_frame)
+    buttons.grid(row=row + 1, column=0, columnspan=3, pady=(10, 0))
+    ttk.Button(buttons, text="Find", command=search, style='AddData.TButton').pack(side='left', padx=5)
+    ttk.Button(buttons, text="Select in Table", command=select_in_table).pack(side='left', padx=5)
+    if reference is not None:
+        search()
+
+
+similar_button = ttk.Button(
+    search_filter_add_frame,
+    text="Find Similar",
+    command=find_similar,
+    style='AddData.TButton'
+)
+similar_button.pack(side='right', padx=(10, 5))
+
 
 # --------- Download Data Button to Main Window ---------
 # --------- Download Dropdown Menu ---------
@@ -670,9 +994,7 @@ download_menu = tk.Menu(download_menu_button, tearoff=0)
 download_menu_button["menu"] = download_menu
 
 def download_inp_for_selected():
-    for item in tree.selection():
-        tree.selection_set(item)
-        download_selected_row_details()
+    download_selected_row_details()
 
 def download_bdf_for_selected():
     download_bdf_files()
@@ -683,7 +1005,303 @@ download_menu.add_command(label="Download .bdf file", command=download_bdf_for_s
 download_menu_button.pack(side='right', padx=(5, 10))
 
 
+# --------- Batch Export ---------
+def batch_export():
+    if df is None:  # Still loading
+        return
+
+    export_window = tk.Toplevel(root)
+    export_window.title("Batch Export")
+    export_window.transient(root)
+    export_window.grab_set()
+
+    form_frame = ttk.Frame(export_window, padding=20)
+    form_frame.pack(fill='both', expand=True)
+
+    scope_var = tk.StringVar(value="selected" if table.selection() else "filtered")
+    ttk.Label(form_frame, text="Materials:", font=('Segoe UI', 10, 'bold')).grid(row=0, column=0, sticky='w')
+    ttk.Radiobutton(form_frame, text=f"Selected rows ({len(table.selection())})", variable=scope_var,
+                    value="selected").grid(row=1, column=0, sticky='w', padx=10)
+    ttk.Radiobutton(form_frame, text=f"All filtered rows ({table.row_count()})", variable=scope_var,
+                    value="filtered").grid(row=2, column=0, sticky='w', padx=10)
+
+    ttk.Label(form_frame, text="Formats:", font=('Segoe UI', 10, 'bold')).grid(row=3, column=0, sticky='w',
+                                                                              pady=(10, 0))
+    format_vars = {}
+    for i, fmt in enumerate(core.WRITERS):
+        format_vars[fmt] = tk.BooleanVar(value=True)
+        ttk.Checkbutton(form_frame, text=f".{fmt}", variable=format_vars[fmt]).grid(row=4 + i, column=0,
+                                                                                  sticky='w', padx=10)
+
+    combined_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(form_frame, text="Single combined include deck per format",
+                    variable=combined_var).grid(row=4 + len(format_vars), column=0, sticky='w', pady=(10, 0))
+    bundle_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(form_frame, text="Bundle the files into one ZIP archive",
+                    variable=bundle_var).grid(row=5 + len(format_vars), column=0, sticky='w')
+
+    def run_export():
+        formats = [fmt for fmt, var in format_vars.items() if var.get()]
+        if not formats:
+            messagebox.showwarning("No Format", "Please choose at least one export format.", parent=export_window)
+            return
+        labels = table.selection() if scope_var.get() == "selected" else list(table.labels)
+        if not labels:
+            messagebox.showwarning("No Materials", "There are no materials to export.", parent=export_window)
+            return
+
+        if bundle_var.get():
+            # A target ending in .zip makes export_materials write the archive
+            directory = filedialog.asksaveasfilename(parent=export_window, title="Save ZIP Bundle",
+                                                     defaultextension=".zip", initialfile="materials.zip",
+                                                     filetypes=[("ZIP archives", "*.zip")])
+        else:
+            directory = filedialog.askdirectory(parent=export_window, title="Choose Export Folder")
+        if not directory:
+            return
+
+        def on_done(result):
+            summary = (f"Exported {result.materials} materials to {len(result.files)} files "
+                       f"in {result.seconds:.2f} s ({result.rate:,.0f} materials/s).")
+            if result.unchanged:
+                summary += f"\n{result.unchanged:,} files were already up to date and were not written again."
+            if result.errors:
+                skipped = "\n".join(f"{name} (.{fmt})" for name, fmt, _ in result.errors[:10])
+                summary += f"\n\nSkipped {len(result.errors)} exports with missing data:\n{skipped}"
+            messagebox.showinfo("Batch Export Complete", summary)
+
+        export_df, export_cache, combined, hardening = df, derived_cache, combined_var.get(), hardening_model()
+        scheduler.submit(
+            "Exporting materials",
+            lambda task: core.export_materials(export_df, labels, directory, formats=formats,
+                                               derived_cache=export_cache, combined=combined,
+                                               progress=task.report, cancelled=task.cancelled,
+                                               hardening=hardening),
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("Export Error", f"Failed to export materials: {e}"),
+            on_cancel=lambda: status_bar.show_message("Export cancelled"),
+        )
+        export_window.destroy()
+
+    ttk.Button(form_frame, text="Export...", command=run_export,
+               style='AddData.TButton').grid(row=6 + len(format_vars), column=0, pady=(15, 0))
+
+
+batch_export_button = ttk.Button(
+    search_filter_add_frame,
+    text="Batch Export",
+    command=batch_export,
+    style='Download.TButton'
+)
+batch_export_button.pack(side='right', padx=(5, 5))
+
+
+# --------- Open a Folder of Workbooks ---------
+def _load_folder(directory, snapshot, old_journal, task):
+    # Save pending edits of the current source before switching away from it
+    if snapshot is not None:
+        old_journal.compact(snapshot)
+    result = core.ingest_in_subprocess(directory, progress=task.report, cancelled=task.cancelled)
+    task.check_cancelled()
+    folder_journal = core.Journal(os.path.join(directory, FOLDER_WORKBOOK))
+    loaded_df = _lean(folder_journal.replay(result.frame))
+    return (loaded_df, _query_engine(loaded_df), core.DerivedCache(loaded_df)), folder_journal, result
+
+
+def open_folder():
+    if df is None or scheduler.running("Opening folder"):
+        return
+    directory = filedialog.askdirectory(title="Open a folder of material workbooks")
+    if not directory:
+        return
+    if scheduler.running("Saving to Excel"):
+        messagebox.showinfo("Busy", "Please wait until the data has been saved to Excel.")
+        return
+
+    snapshot = _rows_to_save(df.copy()) if journal.pending() else None
+    scheduler.submit("Opening folder", _load_folder, directory, snapshot, journal,
+                     on_done=lambda result: _on_folder_loaded(directory, *result),
+                     on_error=lambda e: messagebox.showerror("Open Folder Error", f"Could not open {directory}: {e}"),
+                     on_cancel=lambda: status_bar.show_message("Opening folder cancelled"))
+
+
+def _on_folder_loaded(directory, loaded, folder_journal, result):
+    global data_source, journal
+    data_source, journal = directory, folder_journal
+    _on_materials_loaded(loaded)
+    root.title(f"Material Data - {os.path.basename(directory)}")
+    status_bar.show_message(f"Loaded {len(df):,} materials from {len(result.sources)} sources")
+    if result.problems:
+        messagebox.showwarning(
+            "Skipped Sources",
+            "These sources were not loaded:\n\n" + "\n".join(f"{name}: {message}" for name, message in result.problems)
+        )
+
+
+open_folder_button = ttk.Button(
+    search_filter_add_frame,
+    text="Open Folder",
+    command=open_folder,
+    style='Download.TButton'
+)
+open_folder_button.pack(side='right', padx=(5, 5))
+
+
 # Initial check for download button state
 check_download_button_state()
 
+
+# --------- Journal Compaction ---------
+def _rows_to_save(frame):
+    # A folder keeps its added rows in its own workbook; the other sources are never written
+    if os.path.isdir(data_source):
+        return core.added_rows(frame, data_source)
+    return frame
+
+
+def compact_journal_in_background():
+    if scheduler.running("Saving to Excel"):
+        return  # The next batch picks up the newer edits
+    snapshot, upto = _rows_to_save(df.copy()), journal.sequence()
+    target = journal
+    scheduler.submit("Saving to Excel", lambda task: target.compact(snapshot, upto), cancellable=False,
+                     on_done=lambda result: _on_saved(),
+                     on_error=lambda e: messagebox.showerror("Save Error", f"Could not save data to Excel: {e}"))
+
+
+def on_close():
+    # Compact any journaled edits into the Excel file before exiting; this
+    # waits for a compaction that is already running
+    if df is not None and journal.pending():
+        try:
+            journal.compact(_rows_to_save(df))
+        except Exception as e:
+            if not messagebox.askyesno("Save Error",
+                                       f"Could not save data to Excel: {e}\n\n"
+                                       "The edits are kept in the journal and will be recovered on the next "
+                                       "start. Exit anyway?"):
+                return
+    scheduler.shutdown(wait=False)
+    root.destroy()
+
+
+root.protocol("WM_DELETE_WINDOW", on_close)
+
+
+# --------- Profiling ---------
+def toggle_profiling(event=None):
+    """Start or stop writing a trace of every instrumented call (Ctrl+Shift+P)."""
+    path = profiling.stop_trace()
+    if path is not None:
+        status_bar.show_message(f"Profiling stopped; trace saved to {os.path.abspath(path)}")
+        return
+    try:
+        path = profiling.start_trace(time.strftime("material_manager_trace_%Y%m%d_%H%M%S.json"))
+    except OSError as e:
+        messagebox.showerror("Profiling Error", f"Could not create the trace file: {e}")
+        return
+    status_bar.show_message(f"Profiling to {os.path.abspath(path)}; press Ctrl+Shift+P to stop")
+
+
+root.bind('<Control-Shift-P>', toggle_profiling)
+root.bind('<Control-Shift-p>', toggle_profiling)
+
+
+# --------- Live Reload of the Data Source ---------
+SOURCE_POLL_MS = 2000
+watcher = None  # Watches data_source once the data is loaded
+
+
+def _on_saved():
+    # Our own save changed the source; there is nothing to reload
+    if watcher is not None:
+        watcher.acknowledge()
+    status_bar.show_message("Saved to Excel")
+
+
+def _watch_source():
+    root.after(SOURCE_POLL_MS, _watch_source)
+    if watcher is None or any(scheduler.running(name) for name in ("Saving to Excel", "Opening folder", "Reloading")):
+        return
+    signature = watcher.changed()
+    if signature is not None:
+        reload_source(signature)
+
+
+def _reload_source(snapshot, source, reload_journal, task):
+    if os.path.isdir(source):
+        result = core.ingest_in_subprocess(source, progress=task.report, cancelled=task.cancelled)
+        task.check_cancelled()
+        loaded = result.frame
+    else:
+        loaded = core.load_materials(source)
+    # Edits not yet saved to the source are applied on top of its new contents
+    merged, changes = core.reconcile(snapshot, _lean(reload_journal.apply(loaded)))
+    return merged, changes, (_query_engine(merged) if changes else None)
+
+
+def reload_source(signature=None):
+    """Re-read the data source and apply only the differences to the table."""
+    snapshot, source = df, data_source
+    scheduler.submit("Reloading", _reload_source, snapshot, source, journal,
+                     on_done=lambda result: _on_source_reloaded(snapshot, source, signature, *result),
+                     on_error=lambda e: status_bar.show_message(f"Could not reload {os.path.basename(source)}: {e}"))
+
+
+def _on_source_reloaded(snapshot, source, signature, merged, changes, reloaded_engine):
+    global df, engine
+    if source != data_source:
+        return  # Another source was opened meanwhile
+    if df is not snapshot:
+        reload_source(signature)  # Rows were added meanwhile; they are in the journal
+        return
+    watcher.acknowledge(signature)
+    if not changes:
+        status_bar.show_message(f"{os.path.basename(source)} changed on disk; no material changes")
+        return
+
+    df, engine = merged, reloaded_engine
+    derived_cache.update(df)  # Recomputes only added and updated rows
+    if list(df.columns) != list(tree['columns']):
+        configure_tree_columns(df.columns)
+    _refresh_scatter_explorer()
+    # Filter, sort, selection and the top row of the table carry over
+    update_view(keep_top=True)
+    status_bar.show_message(f"Reloaded {os.path.basename(source)}: {changes}")
+
+
+# --------- Background Data Loading ---------
+def _on_load_error(e):
+    if isinstance(e, FileNotFoundError):
+        messagebox.showerror("Error",
+                             f"{DATA_FILE} not found. Please make sure the file is in the same directory.")
+    else:
+        messagebox.showerror("Error", f"Could not load {DATA_FILE}: {e}")
+    scheduler.shutdown(wait=False)
+    root.destroy()
+
+
+def _on_materials_loaded(result):
+    global df, engine, derived_cache, watcher
+    df, engine, derived_cache = result
+    if watcher is None:
+        root.after(SOURCE_POLL_MS, _watch_source)
+    watcher = core.SourceWatcher(data_source)
+    if list(df.columns) != list(tree['columns']):
+        configure_tree_columns(df.columns)
+    root.title("Material Data")
+    status_bar.show_message(f"Loaded {len(df):,} materials")
+    _refresh_scatter_explorer()
+    update_view()
+
+
+def _on_first_window(event):
+    root.unbind('<Map>')
+    if SHOW_TIMINGS:
+        print(f"Time to first window: {(time.perf_counter() - _startup_time) * 1000:.0f} ms")
+
+
+root.title("Material Data (loading...)")
+root.bind('<Map>', _on_first_window)
+
 root.mainloop()
\ No newline at end of file
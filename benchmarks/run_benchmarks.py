@@ -0,0 +1,429 @@
+"""Benchmark the Material Manager hot paths on synthetic libraries.
+
+Times, at every requested table size:
+
+* ``load_excel``       - parsing the workbook (``load_materials`` without cache)
+* ``load_cache``       - loading the same table from the binary cache
+* ``engine_build``     - building the ``QueryEngine`` indexes
+* ``filter_sort_cold`` - the ``update_view`` queries on a fresh engine
+* ``filter_sort_warm`` - the same queries again, with the engine's caches filled
+* ``resort_cold`` / ``resort_warm`` - heading-click sorts (descending, multi-key) of a
+  filtered view, building and then reusing the per-column sort permutations
+* ``ranges_counts_cold`` / ``ranges_counts_warm`` - numeric range filters plus the
+  category counts of the filter dropdowns, on a fresh and on a warm engine
+* ``similarity_build`` - building the nearest-neighbour ``SimilarityIndex``
+* ``similar_queries``  - "find similar" for ``SIMILAR_QUERIES`` rows plus a partial target
+* ``display``          - ``display_data``: showing a query result and scrolling through it
+* ``derived_build``    - computing the derived properties of the whole table
+* ``derived_update``   - ``DerivedCache.update`` after 1% of the rows changed
+* ``curves_<model>``   - fitting and sampling a hardening model for every row, uncached
+* ``export_inp`` / ``export_bdf`` - writing every material to one combined deck, uncached
+* ``export_unchanged`` - exporting both decks again into a folder that already holds them
+
+and writes a JSON report. Pass the report of an earlier run as
+``--baseline`` to flag every benchmark that got slower by more than
+``--threshold``; the script then exits with status 1.
+
+    python benchmarks/run_benchmarks.py --scales 1000,10000 -o report.json
+    python benchmarks/run_benchmarks.py --baseline report.json
+
+``display`` drives ``VirtualTreeview`` with an in-memory stand-in for the
+``ttk.Treeview`` so it runs headless; ``--tk`` uses a real (withdrawn) Tk
+window instead, which needs a display.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from material_core.cache import write_cache  # noqa: E402
+from material_core.curves import CurveCache, material_curves  # noqa: E402
+from material_core.data import load_materials  # noqa: E402
+from material_core.derived import DerivedCache  # noqa: E402
+from material_core.export import export_materials  # noqa: E402
+from material_core.export_cache import ExportCache  # noqa: E402
+from material_core.lean import compact_frame, memory_usage  # noqa: E402
+from material_core.query import CATEGORY_COLUMNS, QueryEngine  # noqa: E402
+from material_core.schema import HARDENING_MODELS  # noqa: E402
+from material_core.similarity import SimilarityIndex  # noqa: E402
+from material_core.store import MaterialStore  # noqa: E402
+from material_ui.virtual_tree import VirtualTreeview  # noqa: E402
+
+from synthetic import synthetic_materials  # noqa: E402
+
+DEFAULT_SCALES = [1_000, 10_000, 100_000, 1_000_000]
+# Writing and parsing workbooks beyond this size takes minutes per run
+MAX_EXCEL_ROWS = 100_000
+# Slowdowns smaller than this are treated as timer noise, whatever the ratio
+NOISE_FLOOR = 0.002
+REPORT_VERSION = 1
+
+# (search text, process, application, material type, sort column), as sent by update_view
+QUERIES = [
+    ("", "All", "All", "", "None"),
+    ("", "All", "All", "", "UTS"),
+    ("steel", "All", "All", "", "None"),
+    ("ste", "All", "All", "Steel", "Yield strength"),
+    ("", "Forging", "All", "", "Youngs modulus"),
+    ("", "Casting", "Automotive", "Aluminum", "UTS"),
+    ("al 1", "Rolling", "All", "", "Material"),
+]
+# Heading-click sort keys of the resort benchmarks: (column, descending), most significant first
+SORT_KEYS = [
+    [("UTS", True)],
+    [("Material", False)],
+    [("Manufacturing process", False), ("UTS", True)],
+    [("Density", False), ("Yield strength", True), ("Material", False)],
+]
+# Range filters of the ranges_counts benchmarks, each also run with a process filter
+RANGE_QUERIES = [
+    {"UTS": (500, 800)},
+    {"UTS": (500, 800), "Density": (None, 3)},
+    {"Yield strength": (300, None), "%EL": (10, 30)},
+]
+# Rows looked up by the similar_queries benchmark, and the partial target it also searches
+SIMILAR_QUERIES = 100
+SIMILAR_TARGET = {"UTS": 600, "Yield strength": 450, "Density": 7.8}
+# Scroll positions visited by the display benchmark, as fractions of the result
+SCROLL_STEPS = 50
+
+
+class StandInTree:
+    """The part of the ``ttk.Treeview`` interface ``VirtualTreeview`` uses.
+
+    Keeps items in a dict so rendering costs what the table code itself
+    costs, without a Tk interpreter.
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.order = []
+        self._selection = ()
+        self._focus = ''
+
+    def insert(self, parent, index, iid=None, **options):
+        self.items[iid] = options
+        self.order.append(iid)
+        return iid
+
+    def item(self, iid, **options):
+        self.items[iid].update(options)
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.items[iid]
+            self.order.remove(iid)
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+    def selection_set(self, items):
+        self._selection = tuple(items)
+
+    def selection(self):
+        return self._selection
+
+    def event_generate(self, sequence):
+        pass
+
+    def identify_region(self, x, y):
+        return 'cell'
+
+    def focus(self, iid=None):
+        if iid is None:
+            return self._focus
+        self._focus = iid
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def tag_configure(self, *args, **options):
+        pass
+
+    def configure(self, **options):
+        pass
+
+    def bind(self, sequence, func, add=None):
+        pass
+
+
+class StandInScrollbar:
+    def configure(self, **options):
+        pass
+
+    def set(self, first, last):
+        pass
+
+
+def make_table_widget(use_tk):
+    """Return ``(VirtualTreeview, cleanup)`` on a stand-in or real Treeview."""
+    if not use_tk:
+        return VirtualTreeview(StandInTree(), StandInScrollbar()), lambda: None
+
+    import tkinter as tk
+    from tkinter import ttk
+
+    root = tk.Tk()
+    root.withdraw()
+    tree = ttk.Treeview(root, columns=list(range(12)), show="headings", height=20)
+    scrollbar = ttk.Scrollbar(root, orient="vertical")
+    table = VirtualTreeview(tree, scrollbar)
+    table.render = _flushing(table.render, tree)
+    return table, root.destroy
+
+
+def _flushing(render, tree):
+    # Include Tk's own redraw work in the timing of every render
+    def wrapper():
+        render()
+        tree.update_idletasks()
+    return wrapper
+
+
+def timed(fn, repeats, setup=None):
+    """Return ``(best seconds, result of the last call)`` over ``repeats`` calls of ``fn``.
+
+    ``setup`` runs untimed before every call and its result is passed to ``fn``.
+    """
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        argument = setup() if setup is not None else None
+        gc.collect()
+        start = time.perf_counter()
+        result = fn(argument) if setup is not None else fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_queries(engine):
+    for search, process, application, material_type, sort_column in QUERIES:
+        engine.positions(search, process, application, material_type, sort_column)
+
+
+def run_resorts(engine):
+    for sort_keys in SORT_KEYS:
+        engine.positions("steel", "All", "All", "", sort_keys=sort_keys)
+
+
+def run_range_queries(engine):
+    for ranges in RANGE_QUERIES:
+        for process in ("All", "Forging"):
+            filters = dict(mfg_process=process, ranges=ranges)
+            engine.positions(sort_column="UTS", **filters)
+            for column in CATEGORY_COLUMNS:
+                engine.category_counts(column, **filters)
+
+
+def run_similar_queries(index):
+    for label in index.df.index[::max(1, len(index) // SIMILAR_QUERIES)][:SIMILAR_QUERIES]:
+        index.like(label)
+    index.query(SIMILAR_TARGET)
+
+
+def scroll_through(table, df, positions):
+    store = MaterialStore(df)
+    table.set_data(store, positions)
+    total = table.row_count()
+    for step in range(1, SCROLL_STEPS + 1):
+        table.scroll_to(total * step // SCROLL_STEPS)
+    table.set_data(store, positions[::-1], keep_top=True)
+
+
+def benchmark_scale(rows, repeats, workdir, max_excel_rows, use_tk, log):
+    """Run every benchmark on a ``rows``-row table; return a list of result dicts."""
+    results = []
+
+    def record(name, seconds, runs):
+        results.append({"benchmark": name, "rows": rows, "seconds": seconds, "runs": runs})
+        log(f"  {name:<22} {seconds * 1000:>11.1f} ms")
+
+    df = synthetic_materials(rows)
+    path = os.path.join(workdir, f"materials_{rows}.xlsx")
+
+    # --------- Loading ---------
+    if rows <= max_excel_rows:
+        df.to_excel(path, index=False)
+        excel_repeats = 1 if rows >= 100_000 else repeats
+        seconds, loaded = timed(lambda: load_materials(path, use_cache=False), excel_repeats)
+        record("load_excel", seconds, excel_repeats)
+    else:
+        # The cache is keyed by the workbook's mtime and size only, so an
+        # empty placeholder stands in for a workbook too large to write
+        open(path, 'wb').close()
+        loaded = df
+    write_cache(loaded, path)
+    seconds, df = timed(lambda: load_materials(path), repeats)
+    record("load_cache", seconds, repeats)
+
+    # --------- Lean dtypes ---------
+    seconds, lean = timed(lambda: compact_frame(df), repeats)
+    record("lean_compact", seconds, repeats)
+    log(f"  {'memory':<22} {memory_usage(df).sum() / 1e6:>8.1f} MB -> {memory_usage(lean).sum() / 1e6:.1f} MB lean")
+    del lean
+
+    # --------- Filter / sort ---------
+    seconds, engine = timed(lambda: QueryEngine(df), repeats)
+    record("engine_build", seconds, repeats)
+    seconds, _ = timed(run_queries, repeats, setup=lambda: QueryEngine(df))
+    record("filter_sort_cold", seconds, repeats)
+    run_queries(engine)
+    seconds, _ = timed(lambda: run_queries(engine), repeats)
+    record("filter_sort_warm", seconds, repeats)
+    seconds, _ = timed(run_resorts, repeats, setup=lambda: QueryEngine(df))
+    record("resort_cold", seconds, repeats)
+    run_resorts(engine)
+    seconds, _ = timed(lambda: run_resorts(engine), repeats)
+    record("resort_warm", seconds, repeats)
+    seconds, _ = timed(run_range_queries, repeats, setup=lambda: QueryEngine(df))
+    record("ranges_counts_cold", seconds, repeats)
+    run_range_queries(engine)
+    seconds, _ = timed(lambda: run_range_queries(engine), repeats)
+    record("ranges_counts_warm", seconds, repeats)
+
+    # --------- Find similar ---------
+    seconds, index = timed(lambda: SimilarityIndex(df), repeats)
+    record("similarity_build", seconds, repeats)
+    seconds, _ = timed(lambda: run_similar_queries(index), repeats)
+    record("similar_queries", seconds, repeats)
+
+    # --------- Rendering ---------
+    table, cleanup = make_table_widget(use_tk)
+    try:
+        positions = engine.positions("", "All", "All", "", "UTS")
+        seconds, _ = timed(lambda: scroll_through(table, df, positions), repeats)
+        record("display", seconds, repeats)
+    finally:
+        cleanup()
+
+    # --------- Derived properties ---------
+    seconds, derived = timed(lambda: DerivedCache(df), repeats)
+    record("derived_build", seconds, repeats)
+
+    def edited_table(_):
+        cache = DerivedCache(df)
+        edited = df.copy()
+        changed = np.random.default_rng(1).choice(rows, size=max(1, rows // 100), replace=False)
+        column = edited.columns.get_loc("UTS")
+        edited.iloc[changed, column] = edited.iloc[changed, column] + 1
+        return cache, edited
+    seconds, _ = timed(lambda args: args[0].update(args[1]), repeats, setup=lambda: edited_table(None))
+    record("derived_update", seconds, repeats)
+    for model in HARDENING_MODELS:
+        seconds, _ = timed(lambda cache: material_curves(df, model, cache=cache), repeats, setup=CurveCache)
+        record(f"curves_{model}", seconds, repeats)
+
+    # --------- Export ---------
+    export_repeats = 1 if rows >= 100_000 else repeats
+    for fmt in ("inp", "bdf"):
+        directory = os.path.join(workdir, f"export_{fmt}_{rows}")
+        seconds, _ = timed(lambda: export_materials(df, df.index, directory, formats=(fmt,), derived_cache=derived,
+                                                    combined=True, cache=None), export_repeats)
+        record(f"export_{fmt}", seconds, export_repeats)
+    # Both decks again, into a folder that already holds them
+    directory = os.path.join(workdir, f"export_unchanged_{rows}")
+    export_materials(df, df.index, directory, formats=("inp", "bdf"), derived_cache=derived, combined=True,
+                     cache=ExportCache())
+    seconds, _ = timed(lambda: export_materials(df, df.index, directory, formats=("inp", "bdf"),
+                                                derived_cache=derived, combined=True), repeats)
+    record("export_unchanged", seconds, repeats)
+    return results
+
+
+# --------- Report ---------
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def compare(results, baseline, threshold, noise_floor=NOISE_FLOOR):
+    """Return the entries of ``results`` that are more than ``threshold`` slower than ``baseline``.
+
+    Each regression is the result dict plus ``baseline`` seconds and the
+    ``ratio`` of new to old time. Benchmarks missing from either side are
+    not compared.
+    """
+    previous = {(entry["benchmark"], entry["rows"]): entry["seconds"] for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["benchmark"], entry["rows"]))
+        if old is None:
+            continue
+        if entry["seconds"] > old * (1 + threshold) and entry["seconds"] - old > noise_floor:
+            regressions.append(dict(entry, baseline=old, ratio=entry["seconds"] / old if old else float('inf')))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the material table on synthetic libraries.")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="comma-separated table sizes (default: %(default)s)")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="runs per benchmark below 1M rows; the best is reported (default: %(default)s)")
+    parser.add_argument("--max-excel-rows", type=int, default=MAX_EXCEL_ROWS,
+                        help="largest table that is written to and parsed from a workbook (default: %(default)s)")
+    parser.add_argument("--tk", action="store_true", help="render into a real Tk Treeview (needs a display)")
+    parser.add_argument("-o", "--output", default="benchmark_report.json", help="JSON report (default: %(default)s)")
+    parser.add_argument("--baseline", help="earlier JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown reported as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    scales = [int(value.replace("_", "")) for value in args.scales.split(",") if value.strip()]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    def log(message):
+        print(message, flush=True)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="material_bench_") as workdir:
+        for rows in scales:
+            log(f"{rows:,} rows")
+            repeats = 1 if rows >= 1_000_000 else args.repeats
+            results.extend(benchmark_scale(rows, repeats, workdir, args.max_excel_rows, args.tk, log))
+
+    report = {"version": REPORT_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "environment": environment(), "results": results}
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        report["baseline"] = {"path": os.path.abspath(args.baseline), "threshold": args.threshold,
+                              "regressions": regressions}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    log(f"Report written to {args.output}")
+
+    if baseline is None:
+        return 0
+    if not report["baseline"]["regressions"]:
+        log(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+        return 0
+    log(f"Regressions beyond {args.threshold:.0%}:")
+    for entry in report["baseline"]["regressions"]:
+        log(f"  {entry['benchmark']} @ {entry['rows']:,} rows: {entry['baseline'] * 1000:.1f} ms -> "
+            f"{entry['seconds'] * 1000:.1f} ms ({entry['ratio']:.2f}x)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""Synthetic material libraries for benchmarking.
+
+``synthetic_materials(rows)`` returns a table with the real column layout
+whose values follow the property ranges of the material families in the
+sample workbook (steels near 200 GPa and 7.85 g/cc, aluminium near 70 GPa
+and 2.7 g/cc, ...). Yield strength stays below UTS, the endurance strength
+follows the usual fraction of UTS, and about one row in a hundred has a
+missing mechanical property so the missing-data paths are exercised too.
+The output only depends on ``rows`` and ``seed``.
+"""
+
+import numpy as np
+import pandas as pd
+
+from material_core.schema import COLUMNS
+
+# name, standards, E (GPa), Poisson's ratio, density (g/cc), UTS range (MPa), %EL range, Brinell range
+FAMILIES = [
+    ("Steel", ["ASTM A36", "S355", "AISI 1045", "AISI 4140"], 205, 0.29, 7.85, (400, 1200), (8, 30), (120, 350)),
+    ("Stainless Steel", ["304", "316L", "17-4PH"], 193, 0.29, 8.0, (500, 1100), (10, 50), (150, 330)),
+    ("Aluminum", ["AA 6061", "AA 7075", "AA 2024"], 70, 0.33, 2.7, (150, 570), (5, 20), (40, 150)),
+    ("Cast Iron", ["EN-GJL-250", "EN-GJS-400"], 110, 0.26, 7.2, (160, 450), (0.5, 18), (150, 260)),
+    ("Titanium", ["Grade 2", "Grade 5"], 110, 0.34, 4.43, (340, 1000), (10, 25), (150, 350)),
+    ("Magnesium", ["AZ31", "AZ91"], 45, 0.35, 1.8, (160, 300), (3, 15), (50, 80)),
+    ("Brass", ["C26000", "C36000"], 100, 0.34, 8.5, (300, 600), (15, 50), (60, 160)),
+    ("Bronze", ["C93200", "C95400"], 110, 0.34, 8.8, (240, 650), (10, 35), (60, 190)),
+    ("Copper", ["C11000"], 117, 0.34, 8.9, (210, 380), (10, 45), (40, 110)),
+    ("Nickel", ["UNS N06600", "UNS N07718"], 205, 0.31, 8.4, (550, 1400), (12, 45), (150, 380)),
+]
+PROCESSES = ["Casting", "Machining", "Welding", "Extrusion", "Rolling", "Forging", "Chemical"]
+APPLICATIONS = ["Medical implants", "Chemical equipment", "Pipes", "Construction", "Decorative", "Automotive",
+                "Marine", "Kitchenware", "Aerospace", "Electrical wiring", "Equipments", "Cars"]
+# Fraction of rows with one mechanical property missing
+MISSING_FRACTION = 0.01
+
+
+def synthetic_materials(rows, seed=0):
+    """Return a synthetic material table with ``rows`` rows and the ``COLUMNS`` layout."""
+    rng = np.random.default_rng(seed)
+    family = rng.integers(len(FAMILIES), size=rows)
+
+    def per_family(index):
+        return np.array([f[index] for f in FAMILIES], dtype=float)[family]
+
+    def spread(values, relative):
+        return values * (1 + rng.normal(0, relative, rows))
+
+    uts_low, uts_high = (np.array([f[5][i] for f in FAMILIES])[family] for i in (0, 1))
+    el_low, el_high = (np.array([f[6][i] for f in FAMILIES])[family] for i in (0, 1))
+    hb_low, hb_high = (np.array([f[7][i] for f in FAMILIES])[family] for i in (0, 1))
+    uts = np.round(rng.uniform(uts_low, uts_high))
+
+    # Variants of every family/standard give many distinct names, as in a real library
+    names = np.array([f[0] for f in FAMILIES], dtype=object)[family]
+    variant = rng.integers(1, max(2, rows // 50), size=rows).astype(str)
+    standards = np.array([f[1][i % len(f[1])] for i, f in
+                          zip(rng.integers(4, size=rows), (FAMILIES[k] for k in family))], dtype=object)
+
+    frame = pd.DataFrame({
+        "Material": names + " " + variant,
+        "Youngs modulus": np.round(spread(per_family(2), 0.03), 1),
+        "Poissons ratio": np.round(spread(per_family(3), 0.02), 3),
+        "Density": np.round(spread(per_family(4), 0.01), 2),
+        "%EL": np.round(rng.uniform(el_low, el_high), 1),
+        "UTS": uts,
+        "Yield strength": np.round(uts * rng.uniform(0.55, 0.95, rows)),
+        "Endurance Strength": np.round(uts * rng.uniform(0.35, 0.5, rows)),
+        "Standard": standards,
+        "Hardness": np.round(rng.uniform(hb_low, hb_high)),
+        "Manufacturing process": rng.choice(PROCESSES, size=rows),
+        "Applications": rng.choice(APPLICATIONS, size=rows),
+    }, columns=COLUMNS)
+
+    missing = np.flatnonzero(rng.random(rows) < MISSING_FRACTION)
+    columns = rng.choice(["Youngs modulus", "%EL", "UTS", "Yield strength"], size=len(missing))
+    for column in set(columns):
+        frame.loc[missing[columns == column], column] = np.nan
+    return frame
@@ -0,0 +1,87 @@
+"""Headless material engine used by the Material Manager GUI.
+
+Nothing in this package imports Tk or matplotlib, so it can be used from
+scripts and batch jobs as well as from ``Material_Manager.py``. The
+submodules are imported on first attribute access, which keeps
+``import material_core`` (and ``material_core.schema``) free of the pandas
+import cost until data is actually needed.
+"""
+
+import importlib
+
+from .schema import COLUMNS, DATA_FILE, HARDENING_MODELS, NUMERIC_COLUMNS, material_types, sort_options
+
+# Public name -> submodule that defines it
+_LAZY_EXPORTS = {
+    "load_materials": "data",
+    "save_materials": "data",
+    "append_material": "data",
+    "append_materials": "data",
+    "update_material": "data",
+    "Journal": "journal",
+    "TaskScheduler": "tasks",
+    "TaskCancelled": "tasks",
+    "read_cache": "cache",
+    "write_cache": "cache",
+    "calculate_properties": "derived",
+    "DERIVED_PROPERTIES": "derived",
+    "DerivedCache": "derived",
+    "derived_frame": "derived",
+    "hardening_curves": "curves",
+    "material_curves": "curves",
+    "CurveCache": "curves",
+    "ingest_directory": "ingest",
+    "ingest_in_subprocess": "ingest",
+    "IngestResult": "ingest",
+    "added_rows": "ingest",
+    "ImportPreview": "bulk",
+    "preview_file": "bulk",
+    "preview_text": "bulk",
+    "span": "profiling",
+    "timed": "profiling",
+    "start_trace": "profiling",
+    "stop_trace": "profiling",
+    "filter_materials": "query",
+    "filter_options": "query",
+    "QueryEngine": "query",
+    "SimilarityIndex": "similarity",
+    "MaterialStore": "store",
+    "MaterialRecord": "store",
+    "compact_frame": "lean",
+    "expanded_frame": "lean",
+    "float_values": "lean",
+    "lean_requested": "lean",
+    "memory_report": "lean",
+    "export_materials": "export",
+    "ExportCache": "export_cache",
+    "record_hashes": "export_cache",
+    "MaterialService": "server",
+    "SourceWatcher": "sync",
+    "reconcile": "sync",
+    "ScatterData": "scatter",
+    "WRITERS": "writers",
+    "MaterialWriter": "writers",
+    "register_writer": "writers",
+    "get_writer": "writers",
+    "write_deck": "writers",
+    "inp_content": "writers",
+    "bdf_content": "writers",
+    "inp_filename": "writers",
+    "bdf_filename": "writers",
+}
+
+__all__ = (["COLUMNS", "DATA_FILE", "HARDENING_MODELS", "NUMERIC_COLUMNS", "material_types", "sort_options"]
+           + list(_LAZY_EXPORTS))
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(__all__)
@@ -0,0 +1,158 @@
+"""Bulk import of materials from CSV/XLSX files and pasted tables.
+
+A supplier catalogue is read like a folder source (see ``ingest``): the
+header row may sit below a title block and header spellings are mapped
+onto ``COLUMNS``. Every column is validated at once -- numbers with
+``pd.to_numeric`` and its error mask, names and plausibility checks as
+boolean masks -- and the result is an ``ImportPreview`` holding the
+accepted rows and a reason for every rejected one. Nothing is written
+until the caller adds ``preview.rows`` to the table in one step
+(``append_materials`` and, in the GUI, one journal entry).
+
+Run as ``python -m material_core.bulk catalogue.csv`` to list the rejects
+of a file, or add ``--add-to workbook.xlsx`` to import the accepted rows.
+"""
+
+import argparse
+import csv
+import io
+
+import numpy as np
+import pandas as pd
+
+from .data import append_materials, load_materials, material_keys
+from .ingest import find_header, read_raw
+from .journal import Journal
+from .schema import COLUMNS, NUMERIC_COLUMNS
+
+IMPORT_EXTENSIONS = ('.xlsx', '.csv')
+
+
+class ImportPreview:
+    """Validated rows of an import, before anything is added to the table."""
+
+    def __init__(self, rows, rejects, ignored):
+        self.rows = rows  # Accepted rows in the COLUMNS layout, in source order
+        self.rejects = rejects  # (row number, material, reason) triples
+        self.ignored = ignored  # Headers that match no column
+
+    def __len__(self):
+        return len(self.rows)
+
+    def summary(self):
+        text = f"{len(self.rows):,} materials to add, {len(self.rejects):,} rows rejected"
+        if self.ignored:
+            text += f"; ignored columns: {', '.join(self.ignored)}"
+        return text
+
+
+def _text(values):
+    # Stripped text of a column of cells, NaN where the cell is empty
+    text = values.astype("string").str.strip().replace("", pd.NA)
+    return text.astype(object).where(text.notna(), np.nan).infer_objects()
+
+
+def validate_rows(raw, existing=None):
+    """Validate the table ``raw`` (cells read without a header) for import.
+
+    Numeric columns, and the columns that are numeric in ``existing``
+    (such as a numeric ``Hardness``), are parsed as numbers. Rows are
+    rejected when such a cell is not a number or is negative,
+    the material name is missing, the yield strength exceeds the UTS, the
+    material (name and standard, compared as in ``material_keys``) repeats
+    an earlier row of the file or -- with an ``existing`` table -- is
+    already in it. Empty rows are skipped. Raises
+    ``ValueError`` if ``raw`` has no ``Material`` header.
+    """
+    mapped, header_row = find_header(raw)
+    body = raw.iloc[header_row + 1:]
+    body = body[body.notna().to_numpy().any(axis=1)]
+    # Spreadsheet row numbers: 1-based, counting the header row
+    row_numbers = body.index.to_numpy() + 1
+
+    numeric = [column for column in COLUMNS if column in NUMERIC_COLUMNS or (
+        existing is not None and column in existing.columns and pd.api.types.is_numeric_dtype(existing[column]))]
+    columns = {}
+    problems = []  # (mask, reason) pairs, one mask per check
+    for column in COLUMNS:
+        if column not in mapped:
+            columns[column] = np.full(len(body), np.nan)
+            continue
+        # The first source column wins when two headers map to the same column
+        values = body.iloc[:, mapped.index(column)].reset_index(drop=True)
+        text = _text(values)
+        if column in numeric:
+            # Cells that are already numbers are taken as they are; only text is parsed
+            numbers = pd.to_numeric(values.where(text.notna()), errors='coerce').astype(float)
+            problems.append(((numbers.isna() & text.notna()).to_numpy(), f"{column} is not a number"))
+            problems.append(((numbers < 0).to_numpy(), f"{column} is negative"))
+            columns[column] = numbers
+        else:
+            columns[column] = text
+    rows = pd.DataFrame(columns, index=pd.RangeIndex(len(body)))
+
+    problems.append((rows["Material"].isna().to_numpy(), "No material name"))
+    problems.append(((rows["Yield strength"] > rows["UTS"]).to_numpy(), "Yield strength is above UTS"))
+    # Name and standard only: the repeat counter of material_keys would let second copies through
+    keys = material_keys(rows).droplevel(2)
+    named = rows["Material"].notna().to_numpy()
+    problems.append((keys.duplicated() & named, "Repeated in the file"))
+    if existing is not None and len(existing):
+        problems.append((keys.isin(material_keys(existing).droplevel(2)) & named, "Already in the table"))
+
+    rejected = np.zeros(len(rows), dtype=bool)
+    for mask, _ in problems:
+        rejected |= mask
+    reasons = {position: [] for position in np.flatnonzero(rejected).tolist()}
+    for mask, reason in problems:
+        for position in np.flatnonzero(mask).tolist():
+            reasons[position].append(reason)
+    names = rows["Material"]
+    rejects = [(int(row_numbers[position]), "" if pd.isna(names[position]) else names[position], "; ".join(reason))
+               for position, reason in reasons.items()]
+
+    ignored = [str(header) for header, column in zip(raw.iloc[header_row], mapped)
+               if column is None and pd.notna(header)]
+    return ImportPreview(rows[~rejected].reset_index(drop=True), rejects, ignored)
+
+
+def preview_file(path, existing=None, sheet=0):
+    """Return the ``ImportPreview`` of a CSV file or of one sheet of a workbook (the first by default)."""
+    if not path.lower().endswith(IMPORT_EXTENSIONS):
+        raise ValueError(f"Cannot import {path}: only .xlsx and .csv files are supported")
+    return validate_rows(read_raw(path, None if path.lower().endswith('.csv') else sheet), existing)
+
+
+def preview_text(text, existing=None):
+    """Return the ``ImportPreview`` of a pasted table.
+
+    Cells copied from a spreadsheet are tab-separated; text without tabs
+    is read as CSV.
+    """
+    delimiter = "\t" if "\t" in text else ","
+    lines = list(csv.reader(io.StringIO(text.strip("\r\n")), delimiter=delimiter))
+    raw = pd.DataFrame(lines, dtype=object).replace("", np.nan)
+    return validate_rows(raw, existing)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m material_core.bulk",
+                                     description="Validate a catalogue of materials and optionally import it.")
+    parser.add_argument("catalogue", help="Catalogue to import (.xlsx or .csv)")
+    parser.add_argument("--add-to", metavar="WORKBOOK",
+                        help="Add the accepted rows to this material workbook in one write")
+    args = parser.parse_args(argv)
+
+    journal = Journal(args.add_to) if args.add_to else None
+    existing = journal.replay(load_materials(args.add_to)) if journal else None
+    preview = preview_file(args.catalogue, existing)
+    for row, material, reason in preview.rejects:
+        print(f"Row {row} ({material or 'no name'}): {reason}")
+    print(preview.summary())
+    if journal is not None and len(preview):
+        journal.compact(append_materials(existing, preview.rows))
+        print(f"Added {len(preview):,} materials to {args.add_to}")
+
+
+if __name__ == "__main__":
+    main()
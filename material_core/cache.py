@@ -0,0 +1,123 @@
+"""Binary columnar cache in front of the material workbook.
+
+Parsing the workbook with openpyxl is by far the slowest part of loading.
+The parsed table is therefore stored next to the workbook in a hidden
+directory with one ``.npy`` file per column: numeric columns are stored as
+they are and memory-mapped on load, text columns as integer codes plus a
+JSON list of their distinct values. The cache is keyed on the workbook's
+absolute path, modification time and size and is ignored as soon as any
+of them changes.
+
+Every write goes to a new subdirectory, and a small ``current`` file is
+then switched to name it. The tables loaded earlier keep their memory maps
+of the previous subdirectory, which is deleted on a later write once
+nothing maps it any more (Windows cannot delete or replace mapped files).
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 1
+
+# File in the cache directory naming the subdirectory of the current cache
+POINTER_NAME = "current"
+
+
+def cache_dir(path):
+    """Return the cache directory used for the workbook ``path``."""
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, f".{name}.cache")
+
+
+def source_key(path):
+    """Return the (path, mtime, size) key identifying the current workbook contents."""
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def read_cache(path):
+    """Return the cached table for ``path``, or None if there is no valid cache."""
+    try:
+        with open(os.path.join(cache_dir(path), POINTER_NAME)) as f:
+            directory = os.path.join(cache_dir(path), os.path.basename(f.read().strip()))
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_VERSION or meta.get("key") != source_key(path):
+            return None
+
+        columns = {}
+        for i, column in enumerate(meta["columns"]):
+            array = np.load(os.path.join(directory, f"{i}.npy"), mmap_mode='c')
+            if column["kind"] == "values":
+                columns[column["name"]] = pd.Series(array, dtype=column["dtype"], copy=False)
+            else:
+                values = np.array(column["categories"] + [np.nan], dtype=object)[array]
+                columns[column["name"]] = pd.Series(values, dtype=column["dtype"])
+        return pd.DataFrame(columns, copy=False)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _remove_stale(directory, keep):
+    # Earlier caches in ``directory``; those still memory-mapped (on Windows) are left for a later write
+    for name in os.listdir(directory):
+        if name not in keep:
+            entry = os.path.join(directory, name)
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                try:
+                    os.remove(entry)
+                except OSError:
+                    pass
+
+
+def write_cache(df, path):
+    """Store ``df`` as the cache of the workbook ``path``.
+
+    Returns False (leaving the previous cache in place) if a column cannot
+    be stored.
+    """
+    directory = cache_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    version_directory = tempfile.mkdtemp(prefix="v", dir=directory)
+
+    try:
+        columns = []
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            if series.dtype.kind in "biufcmM":
+                array = series.to_numpy()
+                columns.append({"name": name, "kind": "values", "dtype": str(series.dtype)})
+            else:
+                codes, uniques = pd.factorize(series)
+                array = codes.astype(np.int32)
+                categories = [value.item() if hasattr(value, "item") else value for value in uniques]
+                json.dumps(categories)  # Only JSON-representable values are cached
+                columns.append({"name": name, "kind": "codes", "dtype": str(series.dtype),
+                                "categories": categories})
+            np.save(os.path.join(version_directory, f"{i}.npy"), array, allow_pickle=False)
+
+        meta = {"version": CACHE_VERSION, "key": source_key(path), "columns": columns}
+        with open(os.path.join(version_directory, "meta.json"), "w") as f:
+            json.dump(meta, f)
+    except (OSError, ValueError, TypeError):
+        shutil.rmtree(version_directory, ignore_errors=True)
+        try:
+            os.rmdir(directory)  # Only if no earlier cache is in it
+        except OSError:
+            pass
+        return False
+
+    version = os.path.basename(version_directory)
+    pointer_path = os.path.join(directory, POINTER_NAME)
+    with open(f"{pointer_path}.{version}.tmp", "w") as f:
+        f.write(version)
+    os.replace(f"{pointer_path}.{version}.tmp", pointer_path)
+    _remove_stale(directory, {POINTER_NAME, version})
+    return True
@@ -0,0 +1,225 @@
+"""Multi-point hardening curves for the ``*PLASTIC`` table.
+
+Every model is fitted through the same two anchors the three-point table
+uses: the true yield stress at zero plastic strain and the true UTS at the
+plastic strain at UTS (see ``compute_derived``). The models differ in the
+shape between the anchors:
+
+* ``bilinear``        - linear hardening, as in ``Bi-Linear_curve.xlsx``
+* ``hollomon``        - power law ``sigma = K * eps^n`` in total true strain
+* ``ramberg-osgood``  - ``eps_p = a * ((sigma / sigma_y)^m - 1)`` with the usual
+  0.2% offset ``a``, so plastic flow starts at the yield point
+* ``voce``            - saturating ``sigma = sigma_y + Q * (1 - exp(-b * eps_p))``,
+  with ``b`` chosen so the curve meets the Considere necking condition
+  (slope equal to stress) at UTS
+
+``hardening_curves`` fits and samples all rows at once with NumPy.
+``CurveCache`` memoizes the tables per (properties, model, points), so
+materials that appear repeatedly, or are exported and plotted in turn, are
+only fitted once.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .derived import SOURCE_COLUMNS, compute_derived, source_values
+from .schema import HARDENING_MODELS
+
+# Points per generated table, including the yield and UTS anchors
+DEFAULT_POINTS = 20
+
+# Tables kept by a CurveCache
+CURVE_CACHE_SIZE = 16384
+
+# Plastic strain at the proof stress in the Ramberg-Osgood fit
+_PROOF_STRAIN = 0.002
+
+# Newton steps solving for the Voce saturation rate (converges in about four)
+_VOCE_ITERATIONS = 6
+
+
+def _anchors(yield_strength, uts, percent_elongation, youngs_modulus):
+    derived = compute_derived(yield_strength, uts, percent_elongation, youngs_modulus)
+    yield_stress = derived["at_yield_true_stress"]
+    uts_stress = derived["at_uts_true_stress"]
+    uts_plastic = derived["plastic_strain_at_uts"]
+    with np.errstate(invalid='ignore'):
+        valid = ((yield_stress > 0) & (uts_stress > yield_stress) & (uts_plastic > 0)
+                 & (derived["at_yield_true_strain"] > 0) & (youngs_modulus > 0))
+    return derived, yield_stress, uts_stress, uts_plastic, valid
+
+
+def _voce_rate(yield_stress, uts_stress, uts_plastic):
+    # x = b * eps_u solves x / (e^x - 1) = c with c = sigma_u * eps_u / (sigma_u - sigma_y).
+    # The left side falls from 1 (x -> 0, linear hardening) towards 0; Newton
+    # runs on its logarithm, which is close to linear in x. For c >= 1 there
+    # is no solution and x stays at the linear limit.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_target = np.log(uts_stress * uts_plastic / (uts_stress - yield_stress))
+        x = np.maximum(np.maximum(-2 * np.expm1(log_target), -log_target), 1e-9)
+        for _ in range(_VOCE_ITERATIONS):
+            growth = np.expm1(x)
+            residual = np.log(x) - np.log(growth) - log_target
+            slope = 1 / x - (growth + 1) / growth
+            x = np.maximum(x - residual / slope, 1e-9)
+    return x / uts_plastic
+
+
+def hardening_curves(yield_strength, uts, percent_elongation, youngs_modulus, model="bilinear",
+                     points=DEFAULT_POINTS):
+    """Fit ``model`` to every row and sample it at ``points`` points.
+
+    Takes equal-length float arrays of the source properties. Returns
+    ``(stress, plastic_strain, valid)``: two ``(n, points)`` arrays holding
+    the true stress / plastic strain table of every row, running from the
+    yield anchor (plastic strain 0) to the UTS anchor, and a mask of the
+    rows that could be fitted. Rows that cannot be fitted are NaN.
+    Raises ``ValueError`` for an unknown model or fewer than two points.
+    """
+    if model not in HARDENING_MODELS:
+        raise ValueError(f"Unknown hardening model {model!r}; expected one of: {', '.join(HARDENING_MODELS)}")
+    if points < 2:
+        raise ValueError("A hardening table needs at least two points")
+    arrays = [np.asarray(values, dtype=float) for values in
+              (yield_strength, uts, percent_elongation, youngs_modulus)]
+    derived, yield_stress, uts_stress, uts_plastic, valid = _anchors(*arrays)
+    modulus = arrays[3]
+
+    grid = np.linspace(0.0, 1.0, points)
+    col = np.s_[:, None]
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        if model == "bilinear":
+            plastic = uts_plastic[col] * grid
+            stress = yield_stress[col] + (uts_stress - yield_stress)[col] * grid
+        elif model == "hollomon":
+            # Power law through both anchors in total true strain
+            yield_strain = derived["at_yield_true_strain"]
+            uts_strain = derived["at_uts_true_strain"]
+            exponent = np.log(uts_stress / yield_stress) / np.log(uts_strain / yield_strain)
+            strain = yield_strain[col] * (uts_strain / yield_strain)[col] ** grid
+            stress = yield_stress[col] * (strain / yield_strain[col]) ** exponent[col]
+            plastic = strain - stress / modulus[col]
+            # Elastic strain makes the ends miss the anchors slightly: the table is mapped linearly
+            # onto zero plastic strain at yield and the plastic strain at UTS
+            span = plastic[:, -1] - plastic[:, 0]
+            valid &= span > 0
+            plastic = np.clip((plastic - plastic[:, :1]) * (uts_plastic / span)[col], 0.0, None)
+        elif model == "ramberg-osgood":
+            ratio = uts_stress / yield_stress
+            exponent = np.log1p(uts_plastic / _PROOF_STRAIN) / np.log(ratio)
+            stress = yield_stress[col] * ratio[col] ** grid
+            plastic = _PROOF_STRAIN * ((stress / yield_stress[col]) ** exponent[col] - 1)
+        else:  # voce
+            rate = _voce_rate(yield_stress, uts_stress, uts_plastic)
+            saturation = (uts_stress - yield_stress) / -np.expm1(-rate * uts_plastic)
+            plastic = uts_plastic[col] * grid
+            stress = yield_stress[col] + saturation[col] * -np.expm1(-rate[col] * plastic)
+
+    valid &= np.isfinite(stress).all(axis=1) & np.isfinite(plastic).all(axis=1)
+    stress[~valid] = np.nan
+    plastic[~valid] = np.nan
+    return stress, plastic, valid
+
+
+def true_curve_points(stress, plastic, youngs_modulus):
+    """Return ``(n, points + 1, 2)`` (total true strain, true stress) polylines from the origin."""
+    n, points = stress.shape
+    result = np.zeros((n, points + 1, 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result[:, 1:, 0] = plastic + stress / np.asarray(youngs_modulus, dtype=float)[:, None]
+    result[:, 1:, 1] = stress
+    return result
+
+
+class CurveCache:
+    """LRU cache of hardening tables keyed by (source properties, model, points).
+
+    ``tables`` looks rows up in bulk: the distinct property tuples among
+    the requested rows are found with one hash pass, only those not in the
+    cache are fitted (in one ``hardening_curves`` call) and every row then
+    reads its table from the cache. Requests with more distinct materials
+    than the cache holds are fitted directly without caching. Safe to use
+    from export threads and the GUI.
+    """
+
+    def __init__(self, maxsize=CURVE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._tables = OrderedDict()  # Key -> (stress, plastic strain), or None if not fittable
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tables)
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+    def tables(self, source, model="bilinear", points=DEFAULT_POINTS):
+        """Return ``hardening_curves`` output for the rows of ``source``.
+
+        ``source`` is a ``source_values`` frame, or an ``(n, 4)`` array of
+        yield strength, UTS, %EL and Young's modulus.
+        """
+        values = source[list(SOURCE_COLUMNS)].to_numpy(dtype=float) if isinstance(source, pd.DataFrame) \
+            else np.asarray(source, dtype=float).reshape(-1, len(SOURCE_COLUMNS))
+        stress = np.full((len(values), points), np.nan)
+        plastic = np.full((len(values), points), np.nan)
+        valid = np.zeros(len(values), dtype=bool)
+        if not len(values):
+            return stress, plastic, valid
+
+        # Rows are keyed by their raw bytes; NaN never equals itself, so it
+        # is replaced by a sentinel first
+        keyed = np.ascontiguousarray(np.where(np.isnan(values), -np.inf, values))
+        inverse, row_bytes = pd.factorize(keyed.view(f"S{keyed.shape[1] * keyed.itemsize}").ravel())
+        if len(row_bytes) > self.maxsize:
+            return hardening_curves(*values.T, model=model, points=points)
+        unique = keyed[np.unique(inverse, return_index=True)[1]]
+        keys = [(model, points, key) for key in row_bytes.tolist()]
+
+        with self._lock:
+            cached = [self._tables.get(key, False) for key in keys]
+            for key, table in zip(keys, cached):
+                if table is not False:
+                    self._tables.move_to_end(key)
+            missing = [i for i, table in enumerate(cached) if table is False]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            rows = np.where(np.isneginf(unique[missing]), np.nan, unique[missing])
+            new_stress, new_plastic, new_valid = hardening_curves(*rows.T, model=model, points=points)
+            with self._lock:
+                for j, i in enumerate(missing):
+                    table = (new_stress[j], new_plastic[j]) if new_valid[j] else None
+                    cached[i] = table
+                    self._tables[keys[i]] = table
+                while len(self._tables) > self.maxsize:
+                    self._tables.popitem(last=False)
+
+        fitted = np.array([table is not None for table in cached])
+        if fitted.any():
+            ids = np.flatnonzero(fitted)
+            unique_stress = np.stack([cached[i][0] for i in ids])
+            unique_plastic = np.stack([cached[i][1] for i in ids])
+            slot = np.full(len(cached), -1)
+            slot[ids] = np.arange(len(ids))
+            rows = slot[inverse]
+            valid = rows >= 0
+            stress[valid] = unique_stress[rows[valid]]
+            plastic[valid] = unique_plastic[rows[valid]]
+        return stress, plastic, valid
+
+
+# Shared by the .inp export and the comparison plot
+curve_cache = CurveCache()
+
+
+def material_curves(df, model="bilinear", points=DEFAULT_POINTS, cache=curve_cache):
+    """Return ``(stress, plastic_strain, valid)`` hardening tables for every row of ``df``."""
+    return cache.tables(source_values(df), model, points)
@@ -0,0 +1,159 @@
+"""Loading and saving of the material workbook."""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import read_cache, write_cache
+from .lean import expanded_frame, fits_float32
+from .profiling import timed
+from .schema import DATA_FILE
+
+
+@timed("load")
+def load_materials(path=DATA_FILE, use_cache=True):
+    """Read the material table from ``path``.
+
+    With ``use_cache`` the table comes from the binary cache next to the
+    workbook when the workbook has not changed since it was written, and
+    the cache is refreshed after a full Excel parse otherwise.
+    """
+    if use_cache:
+        df = read_cache(path)
+        if df is not None:
+            return df
+
+    df = pd.read_excel(path)
+    if use_cache:
+        try:
+            write_cache(df, path)
+        except OSError:
+            pass  # A read-only data folder just means no cache
+    return df
+
+
+@timed("save")
+def save_materials(df, path=DATA_FILE, use_cache=True, before_replace=None):
+    """Write the material table back to ``path`` and refresh its cache.
+
+    The workbook is written to a temporary file first and then moved over
+    ``path``, so a crash mid-write never leaves a truncated workbook.
+    ``before_replace(temp_path)`` is called with the complete temporary
+    workbook just before the move. Lean dtypes are written as the values
+    they stand for.
+    """
+    df = expanded_frame(df)
+    directory, name = os.path.split(os.path.abspath(path))
+    temp_path = os.path.join(directory, f"~{name}")
+    df.to_excel(temp_path, index=False)
+    if before_replace is not None:
+        before_replace(temp_path)
+    os.replace(temp_path, path)
+    if use_cache:
+        try:
+            write_cache(df, path)
+        except OSError:
+            pass
+
+
+def append_material(df, row):
+    """Return ``df`` with ``row`` (a column -> value mapping) appended.
+
+    pandas cannot grow a frame in place, so this is a single column-wise
+    copy; the existing column dtypes are kept where the new values allow.
+    Categorical columns gain the new values as categories.
+    """
+    return append_materials(df, pd.DataFrame([row], columns=df.columns))
+
+
+def append_materials(df, rows):
+    """Return ``df`` with the rows of the frame ``rows`` appended, in one copy.
+
+    Columns of ``df`` that ``rows`` lacks are left empty and other columns
+    of ``rows`` are dropped. Dtypes are kept as in ``append_material``.
+    """
+    new_rows = rows.reindex(columns=df.columns)
+    for column in df.columns:
+        dtype = df[column].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            new_values = new_rows[column].dropna()
+            added = new_values[~new_values.isin(dtype.categories)].unique().tolist()
+            if added:
+                df = df.assign(**{column: df[column].cat.add_categories(added)})
+            new_rows[column] = new_rows[column].astype(df[column].dtype)
+        elif new_rows[column].isna().all():
+            new_rows[column] = new_rows[column].astype(dtype if dtype.kind not in 'iu' else float)
+        elif dtype == np.float32:
+            # Stays float32 only if the new values fit exactly; otherwise concat widens the column
+            values = pd.to_numeric(new_rows[column], errors='coerce')
+            if fits_float32(values):
+                new_rows[column] = values.astype(np.float32)
+    return pd.concat([df, new_rows], ignore_index=True)
+
+
+def _normalized_text(df, column):
+    # Case- and whitespace-insensitive text of a column; only the distinct
+    # values go through the string operations
+    if column not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    codes, uniques = pd.factorize(df[column])
+    normalized = pd.Index(uniques, dtype=object).astype(str).str.strip().str.casefold()
+    normalized = normalized.str.replace(r"\s+", " ", regex=True).to_numpy(dtype=object)
+    return np.append(normalized, "")[codes]  # Missing values (code -1) become ""
+
+
+def material_keys(df, groups=None):
+    """Return a stable identity for every row of ``df`` as a MultiIndex.
+
+    The key is the case- and whitespace-insensitive material name and
+    standard, plus a running count that tells apart repeats of the same
+    material. With ``groups`` (an array the length of ``df``) the count
+    restarts in every group, so the n-th repeat in one group gets the same
+    key as the n-th repeat in another.
+    """
+    name = _normalized_text(df, "Material")
+    standard = _normalized_text(df, "Standard")
+    by = [pd.factorize(name)[0], pd.factorize(standard)[0]]
+    if groups is not None:
+        by.insert(0, groups)
+    occurrence = pd.Series(np.zeros(len(df))).groupby(by).cumcount().to_numpy()
+    return pd.MultiIndex.from_arrays([name, standard, occurrence])
+
+
+def _widened(column, value):
+    # ``column`` in a dtype that can hold ``value``, or None if its own dtype can
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return None if value in dtype.categories else column.cat.add_categories([value])
+    if dtype.kind not in "iuf" or dtype.itemsize >= 8:
+        return None
+    number = pd.to_numeric(pd.Series([value]), errors='coerce').to_numpy(dtype=float)
+    if np.isnan(number[0]):
+        return None
+    if dtype.kind == "f":
+        return None if fits_float32(number) else column.astype(float)
+    limits = np.iinfo(dtype)
+    if number[0] == int(number[0]) and limits.min <= number[0] <= limits.max:
+        return None
+    return column.astype(np.int64 if number[0] == int(number[0]) else float)
+
+
+def update_material(df, label, row):
+    """Set the columns in ``row`` of the row ``label`` of ``df`` in place.
+
+    A categorical column gains the value as a category, and a float32 or
+    small integer column is widened if the value does not fit exactly.
+    Raises ``KeyError`` (before changing anything) if a column of ``row`` is
+    not a column of ``df``.
+    """
+    unknown = [column for column in row if column not in df.columns]
+    if unknown:
+        raise KeyError(f"Unknown columns: {', '.join(map(str, unknown))}")
+    for column, value in row.items():
+        if value is not None:
+            widened = _widened(df[column], value)
+            if widened is not None:
+                df[column] = widened
+        df.loc[label, column] = np.nan if value is None else value
+
@@ -0,0 +1,228 @@
+"""Derived mechanical properties (true stress/strain) of materials.
+
+All quantities are computed column-wise with NumPy for any number of rows
+at once; a quantity that cannot be calculated for a row is NaN.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from .lean import float_value, float_values
+
+# Keys of the derived quantities, in calculation order
+DERIVED_PROPERTIES = [
+    "nominal_strain_at_yield",
+    "nominal_strain_at_uts",
+    "at_yield_engg_strain",
+    "at_yield_true_strain",
+    "at_yield_true_stress",
+    "at_uts_true_strain",
+    "at_uts_true_stress",
+    "plastic_strain_at_yield",
+    "plastic_strain_at_uts",
+]
+
+# Table columns the derived quantities are calculated from
+SOURCE_COLUMNS = {
+    "yield_strength": "Yield strength",
+    "uts": "UTS",
+    "percent_elongation": "%EL",
+    "youngs_modulus": "Youngs modulus",
+}
+
+# Message reported for each derived quantity that is NaN
+_ERRORS = {
+    "nominal_strain_at_yield":
+        "Nominal strain at yield: Missing Yield Strength or Young's Modulus or Young's Modulus is zero.",
+    "nominal_strain_at_uts": "Nominal strain at UTS: Missing %EL.",
+    "at_yield_true_strain": "At yield true strain: Cannot calculate log (1+engg strain <= 0).",
+    "at_yield_true_stress": "At yield true stress: Missing Yield Strength or At yield engineering strain.",
+    "at_uts_true_strain": "At UTS true strain: Cannot calculate log (1+nominal strain at UTS <= 0).",
+    "at_uts_true_stress": "At UTS true stress: Missing UTS or Nominal strain at UTS.",
+    "plastic_strain_at_yield":
+        "Plastic strain at yield: Missing required values for calculation or Young's Modulus is zero.",
+    "plastic_strain_at_uts":
+        "Plastic strain at UTS: Missing required values for calculation or Young's Modulus is zero.",
+}
+
+
+def to_float(value):
+    """Convert a table value to float, returning None for missing values.
+
+    Raises ``ValueError`` for values that are present but not numeric.
+    """
+    if value is None or value == "":
+        return None
+    value = float_value(value)
+    if math.isnan(value):
+        return None
+    return value
+
+
+def compute_derived(yield_strength, uts, percent_elongation, youngs_modulus):
+    """Calculate every derived quantity from equal-length float arrays.
+
+    Returns a dict of float arrays keyed by ``DERIVED_PROPERTIES``.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        modulus = np.where(youngs_modulus == 0, np.nan, youngs_modulus)
+
+        # 1) Nominal strain at yield = yield strength / young's modulus
+        nominal_strain_at_yield = yield_strength / modulus
+        # 2) Nominal strain at UTS = %elongation/100
+        nominal_strain_at_uts = percent_elongation / 100.0
+        # 3) At yield engineering strain = Nominal strain at yield
+        at_yield_engg_strain = nominal_strain_at_yield
+        # 4) At yield true strain = log base e (1+at yield engineering strain)
+        at_yield_true_strain = _log1p_positive(at_yield_engg_strain)
+        # 5) At yield true stress = yield strength*(1 + at yield engg strain)
+        at_yield_true_stress = yield_strength * (1 + at_yield_engg_strain)
+        # 6) At UTS true strain = log base e ( 1+ %elongation/100)
+        at_uts_true_strain = _log1p_positive(nominal_strain_at_uts)
+        # 7) At UTS true stress = UTS * (1+%elongation/100)
+        at_uts_true_stress = uts * (1 + nominal_strain_at_uts)
+        # 8) Plastic strain at yield = At yield true strain - (At yield true stress/youngs modulus)
+        plastic_strain_at_yield = at_yield_true_strain - at_yield_true_stress / modulus
+        # 9) Plastic strain at UTS = At UTS true strain-(at UTS true stress/youngs modulus)
+        plastic_strain_at_uts = at_uts_true_strain - at_uts_true_stress / modulus
+
+    return {
+        "nominal_strain_at_yield": nominal_strain_at_yield,
+        "nominal_strain_at_uts": nominal_strain_at_uts,
+        "at_yield_engg_strain": at_yield_engg_strain,
+        "at_yield_true_strain": at_yield_true_strain,
+        "at_yield_true_stress": at_yield_true_stress,
+        "at_uts_true_strain": at_uts_true_strain,
+        "at_uts_true_stress": at_uts_true_stress,
+        "plastic_strain_at_yield": plastic_strain_at_yield,
+        "plastic_strain_at_uts": plastic_strain_at_uts,
+    }
+
+
+def _log1p_positive(strain):
+    # log(1 + strain), NaN where 1 + strain <= 0
+    return np.where(1 + strain > 0, np.log1p(np.where(1 + strain > 0, strain, 0.0)), np.nan)
+
+
+def source_values(df):
+    """Return the source columns of ``df`` as a float frame (NaN when not numeric)."""
+    return pd.DataFrame({
+        key: float_values(df[column]) if column in df.columns else np.full(len(df), np.nan)
+        for key, column in SOURCE_COLUMNS.items()
+    }, index=df.index)
+
+
+def derived_frame(df):
+    """Return the derived quantities of every row of ``df`` as a float frame."""
+    source = source_values(df)
+    values = compute_derived(*(source[key].to_numpy() for key in SOURCE_COLUMNS))
+    return pd.DataFrame(values, index=df.index, columns=DERIVED_PROPERTIES)
+
+
+def stress_strain_points(source, derived):
+    """Return the engineering stress-strain polyline of every row.
+
+    ``source`` is a ``source_values`` frame and ``derived`` the matching
+    derived frame. Returns ``(points, valid)``: an ``(n, 3, 2)`` array of
+    (strain, stress) points -- origin, yield, UTS at elongation -- and a
+    mask of the rows whose curve could be calculated.
+    """
+    yield_strain = derived['nominal_strain_at_yield'].to_numpy(dtype=float)
+    elongation = derived['nominal_strain_at_uts'].to_numpy(dtype=float)
+    yield_strength = source['yield_strength'].to_numpy(dtype=float)
+    uts = source['uts'].to_numpy(dtype=float)
+
+    points = np.zeros((len(source), 3, 2))
+    points[:, 1, 0] = yield_strain
+    points[:, 1, 1] = yield_strength
+    points[:, 2, 0] = elongation
+    points[:, 2, 1] = uts
+    valid = ~np.isnan(points).any(axis=(1, 2))
+    return points, valid
+
+
+def derived_errors(values):
+    """Return the error message of every derived quantity that is missing in ``values``."""
+    return [message for key, message in _ERRORS.items()
+            if values.get(key) is None or math.isnan(values[key])]
+
+
+def _row_values(source, derived):
+    # Input and derived quantities of one row, None where not available
+    values = {key: to_float(value) for key, value in source.items()}
+    values.update((key, to_float(derived[key])) for key in DERIVED_PROPERTIES)
+    return values
+
+
+def calculate_properties(row):
+    """Calculate the derived properties of one material row.
+
+    ``row`` maps column names to values. Returns ``(values, errors)`` where
+    ``values`` holds the input properties plus every key of
+    ``DERIVED_PROPERTIES`` (None when not calculable) and ``errors`` lists
+    a message for each quantity that could not be calculated.
+    Raises ``ValueError`` if a required property is not numeric.
+    """
+    source = {key: to_float(row.get(column)) for key, column in SOURCE_COLUMNS.items()}
+    arrays = [np.array([np.nan if value is None else value]) for value in source.values()]
+    derived = {key: array[0] for key, array in compute_derived(*arrays).items()}
+    values = _row_values(source, derived)
+    return values, derived_errors(values)
+
+
+class DerivedCache:
+    """Derived property columns of a material table, cached between uses.
+
+    The columns are computed for the whole table in one vectorized pass.
+    ``update`` recomputes only the rows whose source properties changed
+    (or were added), so exports and plots can read from the cache freely.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._source = source_values(df)
+        self.frame = self._compute(self._source)
+
+    @staticmethod
+    def _compute(source):
+        values = compute_derived(*(source[key].to_numpy() for key in SOURCE_COLUMNS))
+        return pd.DataFrame(values, index=source.index, columns=DERIVED_PROPERTIES)
+
+    def update(self, df):
+        """Point the cache at ``df``, recomputing rows whose source properties changed."""
+        source = source_values(df)
+        old = self._source.reindex(source.index)
+        same = (old == source) | (old.isna() & source.isna())
+        changed = ~same.all(axis=1).to_numpy()
+
+        frame = self.frame.reindex(source.index)
+        if changed.any():
+            frame.loc[changed] = self._compute(source.loc[changed]).to_numpy()
+        self.df = df
+        self._source = source
+        self.frame = frame
+
+    def invalidate(self):
+        """Recompute every row on the next ``update``."""
+        self._source = self._source.iloc[0:0]
+
+    def curves(self, labels):
+        """Return ``stress_strain_points`` for the rows ``labels``."""
+        return stress_strain_points(self._source.loc[labels], self.frame.loc[labels])
+
+    def hardening_curves(self, labels, model, points=None):
+        """Return ``(points, valid)`` true stress-strain polylines of the rows ``labels`` under ``model``.
+
+        The tables come from ``curves.curve_cache``; see ``true_curve_points``.
+        """
+        from .curves import DEFAULT_POINTS, curve_cache, true_curve_points
+        source = self._source.loc[labels]
+        stress, plastic, valid = curve_cache.tables(source, model, points or DEFAULT_POINTS)
+        return true_curve_points(stress, plastic, source['youngs_modulus'].to_numpy()), valid
+
+    def values(self, label):
+        """Return ``calculate_properties``-style ``(values, errors)`` for the row ``label``."""
+        values = _row_values(self._source.loc[label].to_dict(), self.frame.loc[label])
+        return values, derived_errors(values)
@@ -0,0 +1,283 @@
+"""Batch export of many materials to solver decks."""
+
+import io
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from .curves import DEFAULT_POINTS
+from .derived import derived_frame
+from .export_cache import Manifest, bundle_key, export_cache, export_keys, record_hashes
+from .profiling import timed
+from .writers import BUFFER_SIZE, CHUNK_SIZE, WRITERS, get_writer
+
+# Deflate level of ZIP bundles: text decks compress well already at low levels
+ZIP_LEVEL = 1
+
+# Largest archive comment a ZIP file can hold, and the record it follows at the end of the file
+MAX_COMMENT = 65535
+END_RECORD_SIGNATURE = b"PK\x05\x06"
+END_RECORD_SIZE = 22
+
+
+class ExportResult:
+    """Outcome of a batch export."""
+
+    def __init__(self):
+        self.files = []  # Paths written
+        self.errors = []  # (material name, format, message)
+        self.unchanged = 0  # Files (or a whole bundle) not written again because nothing changed
+        self.materials = 0
+        self.seconds = 0.0
+
+    @property
+    def rate(self):
+        """Materials exported per second."""
+        return self.materials / self.seconds if self.seconds else 0.0
+
+
+def _unique_names(writer, names):
+    # File name per material; repeated material names get a numeric suffix
+    used = {}
+    result = []
+    for name in names:
+        file_name = writer.file_name(str(name))
+        count = used.get(file_name, 0)
+        used[file_name] = count + 1
+        if count:
+            stem, ext = os.path.splitext(file_name)
+            file_name = f"{stem}_{count + 1}{ext}"
+        result.append(file_name)
+    return result
+
+
+def _bundle_comment(key, skipped):
+    # Archive comment of a ZIP bundle: the key of its contents and the materials left out
+    comment = json.dumps({"key": key, "skipped": skipped}).encode()
+    return comment if len(comment) <= MAX_COMMENT else b""
+
+
+def _read_bundle_comment(path):
+    # The comment ends the file, so only the tail is read rather than the whole member list
+    try:
+        with open(path, "rb") as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - MAX_COMMENT - END_RECORD_SIZE))
+            tail = f.read()
+    except OSError:
+        return None
+    end = tail.rfind(END_RECORD_SIGNATURE)
+    if end < 0:
+        return None
+    length = int.from_bytes(tail[end + END_RECORD_SIZE - 2:end + END_RECORD_SIZE], "little")
+    try:
+        return json.loads(tail[end + END_RECORD_SIZE:end + END_RECORD_SIZE + length] or b"null")
+    except ValueError:
+        return None
+
+
+@timed("export")
+def export_materials(df, labels, directory, formats=tuple(WRITERS), derived_cache=None, combined=False,
+                     workers=None, progress=None, cancelled=None, chunk_size=CHUNK_SIZE, hardening=None,
+                     curve_points=DEFAULT_POINTS, cache=export_cache):
+    """Write the rows ``labels`` of ``df`` to ``directory`` in every format of ``formats``.
+
+    Each material gets its own file unless ``combined`` is set, in which
+    case one include deck per format is streamed with consecutive material
+    IDs. Per-material files are rendered and written in chunks by a pool of
+    ``workers`` threads. If ``directory`` ends in ``.zip`` the same files
+    are streamed as the members of that ZIP archive instead.
+    ``progress(done, total)`` is called as chunks complete and
+    ``cancelled()`` is polled between chunks; a cancelled export leaves
+    the combined decks or the bundle it was writing as they were. With a
+    ``hardening`` model (see ``curves.HARDENING_MODELS``) the plastic
+    tables have ``curve_points`` points of that model instead of three.
+
+    Materials are rendered through ``cache`` (an ``ExportCache``; None
+    renders everything), and files or bundles whose contents are unchanged
+    since the last export to the same place are not written again (see
+    ``export_cache``). Returns an ``ExportResult``.
+    """
+    start = time.perf_counter()
+    result = ExportResult()
+    bundle = directory if directory.lower().endswith(".zip") else None
+    os.makedirs(os.path.dirname(os.path.abspath(bundle)) if bundle else directory, exist_ok=True)
+
+    frame = df.loc[list(labels)]
+    derived = derived_cache.frame.loc[frame.index] if derived_cache is not None else derived_frame(frame)
+    names = frame['Material'].astype(str).tolist() if 'Material' in frame.columns else ['UNKNOWN'] * len(frame)
+    writers = [get_writer(fmt) for fmt in formats]
+    if hardening:
+        writers = [writer.with_hardening(hardening, curve_points) for writer in writers]
+    total = len(frame)
+    chunks = range(0, total, chunk_size)
+    steps = len(writers) * len(chunks)  # Progress is reported per (format, chunk)
+    # Blocks are cached by record, whatever their position; every export numbers its materials 1..total
+    hashes = record_hashes(frame) if cache is not None else None
+    keys = {writer.name: export_keys(writer, hashes) if cache is not None else None for writer in writers}
+    if combined:
+        file_names = {writer.name: [writer.combined_file_name()] for writer in writers}
+        file_keys = {writer.name: [bundle_key(names, keys[writer.name])] if cache is not None else [None]
+                     for writer in writers}
+    else:
+        # A material's own file also holds its ID
+        file_names = {writer.name: _unique_names(writer, names) for writer in writers}
+        file_keys = {writer.name: [f"{key}:{material_id}" for material_id, key in enumerate(keys[writer.name], 1)]
+                     if cache is not None else None for writer in writers}
+    manifest = Manifest(directory) if cache is not None and bundle is None else None
+    # An export larger than the cache would only evict itself, so its blocks are not kept
+    keep_blocks = cache is not None and total * len(writers) <= cache.maxsize
+
+    def stopped():
+        return cancelled is not None and cancelled()
+
+    def report(step):
+        if progress is not None:
+            progress(min(total, total * step // steps), total)
+
+    def skipped(writer, positions, offset=0):
+        result.errors.extend((names[offset + i], writer.name, writer.missing_data_message) for i in positions)
+
+    def render(writer, chunk_start, rows=None):
+        # Blocks of the chunk's rows (or of the positions ``rows`` within it), from the cache where possible
+        end = chunk_start + chunk_size
+        chunk, chunk_derived = frame.iloc[chunk_start:end], derived.iloc[chunk_start:end]
+        if rows is not None:
+            chunk, chunk_derived = chunk.iloc[rows], chunk_derived.iloc[rows]
+        ids = [chunk_start + i + 1 for i in (range(len(chunk)) if rows is None else rows)]
+        if not keep_blocks:
+            return writer.render(chunk, chunk_derived, first_id=ids)
+        chunk_keys = keys[writer.name][chunk_start:end]
+        return cache.blocks(writer, chunk, chunk_derived, ids,
+                            chunk_keys if rows is None else [chunk_keys[i] for i in rows])
+
+    def write_combined(writer, f, step):
+        # Stream the whole deck into ``f``; returns the positions of the materials left out
+        missing = []
+        for chunk_start in chunks:
+            if stopped():
+                break
+            blocks = render(writer, chunk_start)
+            f.writelines(block for block in blocks if block is not None)
+            missing.extend(chunk_start + i for i, block in enumerate(blocks) if block is None)
+            step += 1
+            report(step)
+        return missing
+
+    if bundle is not None:
+        bundle_files = [(writer, name, key) for writer in writers
+                        for name, key in zip(file_names[writer.name], file_keys[writer.name])]
+        contents_key = bundle_key([name for _, name, _ in bundle_files], [key for _, _, key in bundle_files]) \
+            if cache is not None else None
+        previous = _read_bundle_comment(bundle) if cache is not None else None
+        if previous is not None and previous.get("key") == contents_key:
+            # Unchanged since the last export: only the report is repeated
+            for writer in writers:
+                skipped(writer, previous["skipped"].get(writer.name, []))
+            result.unchanged = len(bundle_files) if combined else \
+                len(bundle_files) - sum(len(rows) for rows in previous["skipped"].values())
+            report(steps)
+        else:
+            missing = {}
+            directory_name, archive_name = os.path.split(os.path.abspath(bundle))
+            temp_path = os.path.join(directory_name, f"~{archive_name}")
+            with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED, compresslevel=ZIP_LEVEL) as archive:
+                step = 0
+                for writer in writers:
+                    if combined:
+                        with archive.open(file_names[writer.name][0], "w", force_zip64=True) as member, \
+                                io.TextIOWrapper(member, encoding="utf-8", newline="") as f:
+                            missing[writer.name] = write_combined(writer, f, step)
+                        step += len(chunks)
+                        continue
+                    missing[writer.name] = []
+                    for chunk_start in chunks:
+                        if stopped():
+                            break
+                        for i, block in enumerate(render(writer, chunk_start)):
+                            if block is None:
+                                missing[writer.name].append(chunk_start + i)
+                            else:
+                                archive.writestr(file_names[writer.name][chunk_start + i], block)
+                        step += 1
+                        report(step)
+                for writer in writers:
+                    skipped(writer, missing[writer.name])
+                if contents_key is not None and not stopped():
+                    archive.comment = _bundle_comment(contents_key, missing)
+            # A cancelled export leaves the previous bundle as it was
+            if stopped():
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, bundle)
+                result.files.append(bundle)
+
+    elif combined:
+        step = 0
+        for writer in writers:
+            name, key = file_names[writer.name][0], file_keys[writer.name][0]
+            path = os.path.join(directory, name)
+            if manifest is not None and manifest.unchanged(name, key):
+                skipped(writer, manifest.skipped(name))
+                result.unchanged += 1
+                step += len(chunks)
+                report(step)
+            else:
+                # Written next to the deck and moved over it once complete, so a cancel leaves the old deck
+                temp_path = os.path.join(directory, f"~{name}")
+                with open(temp_path, "w", buffering=BUFFER_SIZE) as f:
+                    missing = write_combined(writer, f, step)
+                    if manifest is not None and not stopped():
+                        manifest.record(name, key, f, missing)
+                if stopped():
+                    os.remove(temp_path)
+                    break
+                os.replace(temp_path, path)
+                skipped(writer, missing)
+                step += len(chunks)
+            result.files.append(path)
+    else:
+        def write_chunk(writer, chunk_start):
+            end = min(chunk_start + chunk_size, total)
+            chunk_names = file_names[writer.name][chunk_start:end]
+            paths = [os.path.join(directory, name) for name in chunk_names]
+            if manifest is not None:
+                chunk_keys = file_keys[writer.name][chunk_start:end]
+                rows = [i for i, (name, key) in enumerate(zip(chunk_names, chunk_keys))
+                        if not manifest.unchanged(name, key)]
+            else:
+                rows = list(range(end - chunk_start))
+            missing = []
+            for i, block in zip(rows, render(writer, chunk_start, rows) if rows else []):
+                if block is None:
+                    missing.append(i)
+                    continue
+                with open(paths[i], "w") as f:
+                    f.write(block)
+                    if manifest is not None:
+                        manifest.record(chunk_names[i], file_keys[writer.name][chunk_start + i], f)
+            # Files left as they were are part of the export too
+            left_out = set(missing)
+            return (writer, chunk_start, [path for i, path in enumerate(paths) if i not in left_out], missing,
+                    len(paths) - len(rows))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(write_chunk, writer, chunk_start) for writer in writers for chunk_start in chunks]
+            for step, future in enumerate(futures, 1):
+                if stopped():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+                writer, chunk_start, paths, missing, unchanged = future.result()
+                result.files.extend(paths)
+                result.unchanged += unchanged
+                skipped(writer, missing, chunk_start)
+                report(step)
+
+    if manifest is not None:
+        manifest.save()
+    result.materials = total
+    result.seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,193 @@
+"""Content-addressed cache of exported material blocks.
+
+Every material an export writes is identified by a key made of the
+writer's ``cache_key`` (format, writer version and settings such as the
+hardening model) and a hash of the material's row (``record_hashes``).
+Identical rows exported again with the same writer get the same key,
+wherever they are exported to and in whatever order.
+
+``ExportCache`` keeps the rendered template of every key it has seen (an
+LRU shared by all exports of a session) and fills in the material ID the
+block gets in each export, so only new or changed materials go through
+the writers, however the library was sorted, filtered or selected. Export folders keep a small manifest of the key of
+every file they hold (``Manifest``): a file whose key, size and
+modification time are unchanged is not written again, so re-exporting an
+unchanged library into the same folder only hashes the rows and checks
+the files. A ZIP bundle keeps the key of its whole contents in its
+archive comment and is not rewritten either.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .lean import float_values
+
+# Rendered blocks kept by the shared cache
+EXPORT_CACHE_SIZE = 100_000
+
+# (seed of numbers, SipHash key of text) of each 64-bit lane of the row hashes
+HASH_LANES = ((0x2545F4914F6CDD1D, "material-lane-1."), (0x5851F42D4C957F2D, "material-lane-2."))
+
+MANIFEST_NAME = ".export_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _mix(values):
+    # splitmix64 finaliser: scrambles every bit of uint64 values into every other, bijectively
+    values = values ^ (values >> 30)
+    values = values * 0xBF58476D1CE4E5B9
+    values = values ^ (values >> 27)
+    values = values * 0x94D049BB133111EB
+    return values ^ (values >> 31)
+
+
+def _seed(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+
+
+def record_hashes(frame):
+    """Return a 128-bit hex digest of every row of ``frame``.
+
+    The digests are computed column-wise in two independent 64-bit lanes.
+    Numbers are hashed by value whatever their dtype (a float32 7.85 or an
+    int 520 hash like their float64 values), text by its characters (with
+    pandas' keyed SipHash, ``hash_array``); the column names and their
+    order are part of every digest.
+    """
+    lanes = [np.zeros(len(frame), dtype=np.uint64) for _ in HASH_LANES]
+    for column in frame.columns:
+        values = frame[column]
+        if values.dtype.kind in "iufb":
+            numbers = float_values(values).astype(np.float64)
+            # NaN has many bit patterns, so every NaN is hashed as one sentinel
+            numbers = np.where(np.isnan(numbers), -np.inf, numbers).view(np.uint64)
+        else:
+            # Text is hashed once per distinct value; missing text (code -1) gets the last slot
+            codes, uniques = pd.factorize(values)
+            uniques = np.append(uniques.astype(object), None)
+        for lane, (seed, text_key) in enumerate(HASH_LANES):
+            if values.dtype.kind in "iufb":
+                bits = _mix(numbers + seed)
+            else:
+                bits = pd.util.hash_array(uniques, hash_key=text_key, categorize=False)[codes]
+            lanes[lane] = _mix(lanes[lane] * 0x9E3779B97F4A7C15 + (bits ^ _seed(f"{lane}\x1f{column}")))
+    digests = np.column_stack(lanes).astype(">u8")
+    return [digest.hex() for digest in digests.view("V16").ravel().tolist()]
+
+
+def export_keys(writer, hashes):
+    """Return the cache key of every material: writer and row hash."""
+    writer_key = writer.cache_key()
+    return [f"{writer_key}:{digest}" for digest in hashes]
+
+
+def bundle_key(names, keys):
+    """Return one digest for a set of output files (file names and their keys)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\x1e".join(names).encode())
+    digest.update(b"\x1d")
+    digest.update("\x1e".join(keys).encode())
+    return digest.hexdigest()
+
+
+class ExportCache:
+    """LRU cache of material block templates keyed by ``export_keys``.
+
+    ``blocks`` renders only the rows whose keys are not cached, in one
+    ``templates`` call, and returns the blocks of all rows with their
+    material IDs filled in. Rows that cannot be written are cached as
+    None. Safe to use from export threads.
+    """
+
+    def __init__(self, maxsize=EXPORT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+
+    def blocks(self, writer, frame, derived, ids, keys):
+        """Return ``writer.render`` output for the rows of ``frame`` with material IDs ``ids``."""
+        with self._lock:
+            templates = [self._blocks.get(key, False) for key in keys]
+            for key, template in zip(keys, templates):
+                if template is not False:
+                    self._blocks.move_to_end(key)
+            missing = [i for i, template in enumerate(templates) if template is False]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            rendered = writer.templates(frame.iloc[missing], None if derived is None else derived.iloc[missing])
+            with self._lock:
+                for i, template in zip(missing, rendered):
+                    templates[i] = template
+                    self._blocks[keys[i]] = template
+                while len(self._blocks) > self.maxsize:
+                    self._blocks.popitem(last=False)
+        return [None if template is None else writer.fill_id(template, material_id)
+                for template, material_id in zip(templates, ids)]
+
+
+# Shared by every export of the session
+export_cache = ExportCache()
+
+
+class Manifest:
+    """Keys and sizes of the files an export wrote to ``directory``."""
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.directory = directory
+        self.changed = False
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.files = data["files"] if data.get("version") == MANIFEST_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            self.files = {}
+
+    def unchanged(self, name, key):
+        """Return True if the file ``name`` still holds the export with ``key``, untouched since."""
+        entry = self.files.get(name)
+        if entry is None or entry[0] != key:
+            return False
+        try:
+            stat = os.stat(os.path.join(self.directory, name))
+        except OSError:
+            return False
+        return [stat.st_size, stat.st_mtime_ns] == entry[1:3]
+
+    def skipped(self, name):
+        """Positions of the materials that were left out of the file ``name``."""
+        return self.files[name][3]
+
+    def record(self, name, key, f, skipped=()):
+        """Remember that the open file ``f`` (written completely) holds the export with ``key``."""
+        f.flush()
+        stat = os.fstat(f.fileno())
+        self.files[name] = [key, stat.st_size, stat.st_mtime_ns, list(skipped)]
+        self.changed = True
+
+    def save(self):
+        """Write the manifest if files were recorded (to a temporary file first, like the workbook)."""
+        if not self.changed:
+            return
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(json.dumps({"version": MANIFEST_VERSION, "files": self.files}))
+        os.replace(temp_path, self.path)
+        self.changed = False
@@ -0,0 +1,359 @@
+"""Ingest a folder of material workbooks and CSV files into one table.
+
+Every ``.xlsx`` sheet and ``.csv`` file in the folder is a separate source
+and is parsed by its own worker process. Header spellings are mapped onto
+the canonical ``COLUMNS`` (``"Young's Modulus (GPa)"`` -> ``Youngs
+modulus``, ``"Elongation %"`` -> ``%EL``, ...), the header row may sit
+below a title block, and rows describing the same material (same name and
+standard) in several sources are merged into one. The ``Source`` column
+records where every row came from as ``file:sheet:row``; merged rows list
+all their sources separated by ``"; "``.
+
+Run as ``python -m material_core.ingest FOLDER -o merged.xlsx`` to merge a
+folder from the command line. The GUI ingests through this entry point in
+a subprocess, because a process pool started from the unguarded GUI script
+would re-run the script in every worker.
+"""
+
+import argparse
+import csv
+import os
+import pickle
+import re
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .data import material_keys
+from .lean import expanded_frame, text_values
+from .schema import COLUMNS, FOLDER_WORKBOOK, NUMERIC_COLUMNS, PROVENANCE_COLUMN
+
+SOURCE_EXTENSIONS = ('.xlsx', '.csv')
+# The header row is searched for in this many leading rows of a sheet
+HEADER_SEARCH_ROWS = 20
+# Seconds between polls of ``cancelled`` while an ingest subprocess runs
+CANCEL_POLL_SECONDS = 0.1
+
+# Other spellings of the canonical headers, compared after _header_key
+HEADER_ALIASES = {
+    "Material": ["material name", "name", "grade", "alloy", "designation"],
+    "Youngs modulus": ["young modulus", "E", "elastic modulus", "modulus of elasticity", "E modulus"],
+    "Poissons ratio": ["poisson ratio", "poisson", "nu"],
+    "Density": ["rho", "mass density"],
+    "%EL": ["EL", "elongation", "elongation %", "% elongation", "percent elongation",
+            "elongation at break", "A%", "A5"],
+    "UTS": ["ultimate tensile strength", "tensile strength", "ultimate strength", "Rm"],
+    "Yield strength": ["yield", "yield stress", "YS", "Rp0.2", "0.2% proof stress", "proof stress"],
+    "Endurance Strength": ["endurance limit", "fatigue strength", "fatigue limit"],
+    "Standard": ["spec", "specification"],
+    "Hardness": ["HB", "HV", "brinell hardness"],
+    "Manufacturing process": ["process", "mfg process", "manufacturing"],
+    "Applications": ["application", "uses", "typical applications"],
+}
+
+
+def _header_key(header):
+    # Drop units in brackets, case, spacing and punctuation: "UTS (MPa)" -> "uts"
+    text = re.sub(r"[\(\[].*?[\)\]]", "", str(header)).lower()
+    return re.sub(r"[^a-z0-9%]", "", text)
+
+
+_CANONICAL = {_header_key(column): column for column in COLUMNS}
+for _column, _aliases in HEADER_ALIASES.items():
+    _CANONICAL.update((_header_key(alias), _column) for alias in _aliases)
+
+
+def canonical_column(header):
+    """Return the canonical column for ``header``, or None if it is not recognised."""
+    return _CANONICAL.get(_header_key(header))
+
+
+class IngestResult:
+    """Merged table of an ingest plus what was read and what was skipped."""
+
+    def __init__(self, frame, sources, problems):
+        self.frame = frame
+        self.sources = sources  # Source names that contributed rows
+        self.problems = problems  # (source name, message) pairs
+
+
+def find_sources(directory):
+    """Return the ``(path, sheet)`` units to read from ``directory``.
+
+    Every sheet of a workbook is its own unit; ``sheet`` is None for CSV
+    files. Hidden files and Excel lock files (``~$...``) are ignored.
+    """
+    sources = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.startswith(('.', '~')) or not name.lower().endswith(SOURCE_EXTENSIONS) or not os.path.isfile(path):
+            continue
+        if name.lower().endswith('.csv'):
+            sources.append((path, None))
+            continue
+        sources.extend((path, sheet) for sheet in _sheet_names(path))
+    return sources
+
+
+def _sheet_names(path):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def source_name(path, sheet=None):
+    name = os.path.basename(path)
+    return name if sheet is None else f"{name}:{sheet}"
+
+
+def find_header(raw):
+    """Find the header row of ``raw`` (read without a header).
+
+    Returns ``(mapped, header_row)``: the canonical column of every column
+    of ``raw`` (None where the header is not recognised) and the position
+    of the header row. Raises ``ValueError`` when no row within
+    ``HEADER_SEARCH_ROWS`` names a ``Material`` column.
+    """
+    for header_row in range(min(HEADER_SEARCH_ROWS, len(raw))):
+        mapped = [canonical_column(value) if isinstance(value, str) else None
+                  for value in raw.iloc[header_row]]
+        if "Material" in mapped:
+            return mapped, header_row
+    raise ValueError("No 'Material' column found")
+
+
+def normalize_columns(raw):
+    """Map the header row of ``raw`` (read without a header) onto ``COLUMNS``.
+
+    Returns ``(frame, header_row)``: a frame with exactly the canonical
+    columns, and the position of the header row in ``raw``. Raises
+    ``ValueError`` as ``find_header`` does.
+    """
+    mapped, header_row = find_header(raw)
+    body = raw.iloc[header_row + 1:]
+    frame = pd.DataFrame(index=body.index)
+    for column in COLUMNS:
+        # The first source column wins when two headers map to the same column
+        position = mapped.index(column) if column in mapped else None
+        if position is None:
+            frame[column] = np.nan
+        elif column in NUMERIC_COLUMNS:
+            frame[column] = pd.to_numeric(body.iloc[:, position], errors='coerce')
+        else:
+            frame[column] = body.iloc[:, position].infer_objects()
+    return frame, header_row
+
+
+def read_raw(path, sheet=None):
+    """Read one sheet or CSV file without a header, every cell as an object.
+
+    ``sheet`` is None for CSV files. Empty cells are NaN.
+    """
+    if sheet is None:
+        try:
+            return pd.read_csv(path, header=None, dtype=object, skip_blank_lines=False)
+        except pd.errors.ParserError:
+            # Ragged rows, typically a title line above the header
+            with open(path, newline='') as f:
+                return pd.DataFrame(list(csv.reader(f)), dtype=object).replace("", np.nan)
+    return pd.read_excel(path, sheet_name=sheet, header=None, dtype=object)
+
+
+def read_source(path, sheet=None):
+    """Read one sheet or CSV file into a canonical frame with provenance.
+
+    Rows without a material name are dropped.
+    """
+    frame, header_row = normalize_columns(read_raw(path, sheet))
+
+    name = frame["Material"]
+    frame = frame[name.notna() & (name.astype(str).str.strip() != "")]
+    # Spreadsheet row numbers: 1-based, counting the header row
+    rows = frame.index.to_numpy() + 1
+    frame.insert(len(COLUMNS), PROVENANCE_COLUMN, [f"{source_name(path, sheet)}:{row}" for row in rows])
+    return frame.reset_index(drop=True)
+
+
+def _read_unit(unit):
+    # Worker entry point; problems are returned rather than raised so one
+    # bad sheet does not abort the whole ingest
+    path, sheet = unit
+    try:
+        return read_source(path, sheet), None
+    except Exception as e:
+        return None, str(e)
+
+
+def merge_sources(frames):
+    """Concatenate canonical frames and merge rows describing the same material.
+
+    Rows of different sources match on the case- and whitespace-insensitive
+    material name and standard. A merged row takes the first non-missing
+    value of every column in source order, sits where the material first
+    appeared and lists every source it came from.
+    """
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS + [PROVENANCE_COLUMN])
+    frame = pd.concat(frames, ignore_index=True)
+    source_ids = np.repeat(np.arange(len(frames)), [len(f) for f in frames])
+    # Repeats inside one source stay separate rows: the n-th occurrence of a
+    # material in one source merges with the n-th occurrence in another
+    key = material_keys(frame, groups=source_ids)
+    duplicated = key.duplicated(keep=False)
+    if not duplicated.any():
+        return frame
+
+    # Group by the position of each key's first row, which is also where
+    # the merged row goes; factorize numbers keys in order of appearance
+    positions = np.flatnonzero(duplicated)
+    codes = key[duplicated].factorize()[0]
+    first_position = positions[np.unique(codes, return_index=True)[1]][codes]
+    groups = frame[duplicated].groupby(first_position, sort=False)
+    merged = groups.first()
+    merged[PROVENANCE_COLUMN] = groups[PROVENANCE_COLUMN].agg("; ".join)
+
+    combined = pd.concat([frame[~duplicated], merged[frame.columns]]).sort_index(kind='stable')
+    return combined.reset_index(drop=True)
+
+
+def ingest_directory(directory, workers=None, progress=None):
+    """Read every source in ``directory`` in a process pool and merge them.
+
+    ``progress(done, total)`` is called as sources finish. The caller's
+    ``__main__`` must be safe to import in worker processes (see the module
+    docstring).
+    """
+    units = find_sources(directory)
+    frames, sources, problems = [], [], []
+    if units:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(units))) as pool:
+            for done, (unit, (frame, error)) in enumerate(zip(units, pool.map(_read_unit, units)), 1):
+                name = source_name(*unit)
+                if error is not None:
+                    problems.append((name, error))
+                elif frame.empty:
+                    problems.append((name, "No material rows"))
+                else:
+                    frames.append(frame)
+                    sources.append(name)
+                if progress is not None:
+                    progress(done, len(units))
+    return IngestResult(merge_sources(frames), sources, problems)
+
+
+def ingest_in_subprocess(directory, workers=None, progress=None, cancelled=None):
+    """Run ``ingest_directory`` in a fresh ``python -m material_core.ingest`` process.
+
+    Safe to call from any program, including unguarded scripts. ``cancelled()``
+    is polled every ``CANCEL_POLL_SECONDS``, also while a large source is
+    being parsed, and terminates the ingest when it returns true; the
+    return value is then None.
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_root, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output = os.path.join(temp_dir, "ingest.pkl")
+        command = [sys.executable, "-m", "material_core.ingest", directory, "-o", output, "--progress"]
+        if workers:
+            command += ["--workers", str(workers)]
+        # Progress lines go to a file rather than a pipe, so waiting for them never blocks a cancel
+        progress_path = os.path.join(temp_dir, "progress.txt")
+        with open(progress_path, "wb") as progress_output, open(progress_path, "rb") as progress_lines, \
+                open(os.path.join(temp_dir, "stderr.txt"), "w+") as errors:
+            process = subprocess.Popen(command, stdout=progress_output, stderr=errors, env=env)
+            unfinished = b""
+            while process.returncode is None:
+                try:
+                    process.wait(timeout=CANCEL_POLL_SECONDS)
+                except subprocess.TimeoutExpired:
+                    pass
+                if cancelled is not None and cancelled():
+                    process.terminate()
+                    process.wait()
+                    return None
+                *lines, unfinished = (unfinished + progress_lines.read()).split(b"\n")
+                for line in lines:
+                    parts = line.split()
+                    if progress is not None and len(parts) == 3 and parts[0] == b"progress":
+                        progress(int(parts[1]), int(parts[2]))
+            if process.returncode != 0:
+                errors.seek(0)
+                lines = errors.read().strip().splitlines()
+                raise RuntimeError(lines[-1] if lines else f"Ingest failed with exit code {process.returncode}")
+        with open(output, "rb") as f:
+            return pickle.load(f)
+
+
+def _source_file(entry):
+    # File name of a provenance entry: "file:sheet:row", "file:row", or just the file for rows added in the app
+    return entry.split(":", 1)[0]
+
+
+def added_rows(frame, directory):
+    """Return the rows of an ingested ``frame`` that are saved to ``FOLDER_WORKBOOK``.
+
+    These are the rows read from that workbook of ``directory`` or added
+    since, without the provenance column. Rows merged with rows of other
+    sources get the workbook's own cells back (read from it again), so
+    values filled in from other files are not written into it.
+    """
+    entries = [provenance.split("; ") if provenance else [] for provenance in text_values(frame[PROVENANCE_COLUMN])]
+    own = [[entry for entry in row if _source_file(entry) == FOLDER_WORKBOOK] for row in entries]
+    keep = np.array([bool(row) for row in own], dtype=bool)
+    rows = expanded_frame(frame.loc[keep, COLUMNS]).reset_index(drop=True)
+
+    merged = [row_own[0] if len(row_own) < len(row_entries) else None
+              for row_own, row_entries in zip(own, entries) if row_own]
+    if any(merged):
+        path = os.path.join(directory, FOLDER_WORKBOOK)
+        cells = pd.concat([read_source(path, sheet) for sheet in _sheet_names(path)], ignore_index=True)
+        cells = cells.drop_duplicates(PROVENANCE_COLUMN).set_index(PROVENANCE_COLUMN)
+        found = pd.Series([entry is not None and entry in cells.index for entry in merged])
+        own_cells = cells.reindex(merged)[COLUMNS].set_axis(rows.index)
+        for column in COLUMNS:
+            rows[column] = rows[column].mask(found, own_cells[column])
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m material_core.ingest",
+                                     description="Merge a folder of material workbooks and CSV files.")
+    parser.add_argument("directory")
+    parser.add_argument("-o", "--output", default="merged_materials.xlsx",
+                        help="Output file: .xlsx, .csv, or .pkl for a pickled IngestResult")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--progress", action="store_true",
+                        help="Print 'progress DONE TOTAL' lines while reading")
+    args = parser.parse_args(argv)
+
+    def report(done, total):
+        if args.progress:
+            print(f"progress {done} {total}", flush=True)
+
+    result = ingest_directory(args.directory, workers=args.workers, progress=report)
+    if args.output.endswith(".pkl"):
+        with open(args.output, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    elif args.output.endswith(".csv"):
+        result.frame.to_csv(args.output, index=False)
+    else:
+        result.frame.to_excel(args.output, index=False)
+
+    for name, message in result.problems:
+        print(f"Skipped {name}: {message}", file=sys.stderr)
+    print(f"{len(result.frame)} materials from {len(result.sources)} sources written to {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    # Run the imported module so pickled results refer to material_core.ingest
+    from material_core.ingest import main as _main
+    _main()
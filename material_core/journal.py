@@ -0,0 +1,196 @@
+"""Append-only journal of table edits made through the app.
+
+Adding or editing a material used to rewrite the whole workbook on the UI
+thread. Edits are now appended to a small JSON-lines journal next to the
+workbook (flushed and fsync'd per entry) and applied to the in-memory
+table, and the journal is compacted into the workbook in batches (the GUI
+runs ``compact`` as a background task) or on exit. Replaying the journal after loading the
+workbook recovers any edits that were never compacted.
+
+Compaction records the last sequence number it wrote in a small sidecar
+(``<workbook>.journal.seq``) together with the size and modification time
+of the new workbook, before the workbook is moved into place. Replay
+skips the entries up to that number only while the workbook still
+matches, so a crash between saving the workbook and rewriting the journal
+neither loses nor repeats edits.
+"""
+
+import json
+import os
+import threading
+
+import pandas as pd
+
+from .data import append_material, append_materials, save_materials, update_material
+from .schema import DATA_FILE
+
+# Number of journaled edits that triggers a background compaction
+COMPACT_BATCH = 20
+
+
+class Journal:
+    """Write-ahead journal for the workbook ``path``."""
+
+    def __init__(self, path=DATA_FILE, batch_size=COMPACT_BATCH):
+        self.workbook = path
+        self.path = f"{path}.journal"
+        self.marker_path = f"{self.path}.seq"
+        self.batch_size = batch_size
+        self._lock = threading.Lock()  # Guards the journal file and sequence numbers
+        self._compact_lock = threading.Lock()  # One compaction at a time
+        self._seq = 0
+        self._pending = 0
+
+    # --------- Reading ---------
+    def _read(self):
+        # Intact entries and their length in bytes; a torn final write from a crash ends the journal
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return [], 0
+
+        entries, end = [], 0
+        for line in data.split(b"\n")[:-1]:  # The last piece has no newline: empty or torn
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+            end += len(line) + 1
+        return entries, end
+
+    def _entries(self):
+        return self._read()[0]
+
+    def _compacted(self):
+        # (sequence number, whether the workbook holds the entries up to it) from the last compaction
+        try:
+            with open(self.marker_path) as f:
+                marker = json.load(f)
+            stat = os.stat(self.workbook)
+            return marker["seq"], [stat.st_size, stat.st_mtime_ns] == marker["workbook"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0, False
+
+    def _uncompacted(self, entries):
+        # The entries the workbook does not hold yet, and the last compacted sequence number
+        compacted, in_workbook = self._compacted()
+        if in_workbook:
+            entries = [entry for entry in entries if entry["seq"] > compacted]
+        return entries, compacted
+
+    @staticmethod
+    def _applied(df, entries):
+        for entry in entries:
+            if entry["op"] == "add":
+                df = append_material(df, entry["row"])
+            elif entry["op"] == "add_many":
+                df = append_materials(df, pd.DataFrame(entry["rows"]))
+            elif entry["op"] == "update":
+                update_material(df, entry["label"], entry["row"])
+        return df
+
+    def replay(self, df):
+        """Apply the journaled edits that are not yet in the workbook to ``df``.
+
+        Run once at startup, before anything is journaled: a torn final
+        entry is cut off the journal, so later edits are appended after the
+        last intact one, and the sequence numbers continue from the journal.
+        """
+        with self._lock:
+            entries, end = self._read()
+            if os.path.exists(self.path) and os.path.getsize(self.path) > end:
+                with open(self.path, "r+b") as f:
+                    f.truncate(end)
+                    os.fsync(f.fileno())
+        entries, compacted = self._uncompacted(entries)
+        df = self._applied(df, entries)
+        with self._lock:
+            # New entries are numbered after every compacted one, or replay would skip them
+            self._seq = max([compacted] + [entry["seq"] for entry in entries])
+            self._pending = len(entries)
+        return df
+
+    def apply(self, df):
+        """Apply the journaled edits that are not yet in the workbook to ``df``, read-only.
+
+        For reloads while edits are being journaled: unlike ``replay`` it
+        leaves the journal file, the sequence numbers and ``pending`` as
+        they are. An entry still being written is not applied.
+        """
+        with self._lock:
+            entries = self._entries()
+        return self._applied(df, self._uncompacted(entries)[0])
+
+    def pending(self):
+        """Number of journaled edits not yet compacted into the workbook."""
+        return self._pending
+
+    # --------- Writing ---------
+    def _append(self, entry):
+        with self._lock:
+            self._seq += 1
+            entry["seq"] = self._seq
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending += 1
+
+    def record_add(self, row):
+        """Journal a new material row (a column -> value mapping)."""
+        self._append({"op": "add", "row": row})
+
+    def record_add_many(self, rows):
+        """Journal the rows of the frame ``rows`` as one entry, so they are added all or not at all."""
+        records = rows.astype(object).where(rows.notna(), None).to_dict('records')
+        self._append({"op": "add_many", "rows": records})
+
+    def record_update(self, label, row):
+        """Journal new values for some columns of the row ``label``."""
+        self._append({"op": "update", "label": label, "row": row})
+
+    def needs_compaction(self):
+        return self._pending >= self.batch_size
+
+    # --------- Compaction ---------
+    def sequence(self):
+        """Sequence number of the last journaled edit."""
+        return self._seq
+
+    def compact(self, df, upto=None):
+        """Write ``df`` to the workbook and drop the journal entries it contains.
+
+        ``df`` must include every edit up to sequence number ``upto``
+        (default: all journaled edits), which is the case for the app's
+        table since edits are applied right after they are journaled. To
+        compact from a worker thread pass a snapshot of the table together
+        with the ``sequence()`` taken at snapshot time. Concurrent
+        compactions run one after the other.
+        """
+        with self._compact_lock:
+            if upto is None:
+                upto = self._seq
+            save_materials(df, self.workbook,
+                           before_replace=lambda temp_path: self._mark_compacted(upto, temp_path))
+
+            with self._lock:
+                remaining = [entry for entry in self._entries() if entry["seq"] > upto]
+                temp_path = self.path + ".tmp"
+                with open(temp_path, "w") as f:
+                    for entry in remaining:
+                        f.write(json.dumps(entry) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+                self._pending = len(remaining)
+
+    def _mark_compacted(self, upto, workbook):
+        # Written before ``workbook`` replaces the old one; a rename keeps its size and modification time
+        stat = os.stat(workbook)
+        temp_path = self.marker_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"seq": upto, "workbook": [stat.st_size, stat.st_mtime_ns]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.marker_path)
@@ -0,0 +1,137 @@
+"""Memory-lean dtypes for large material tables (opt-in).
+
+``compact_frame`` stores repetitive text columns (process, application,
+material family names, ...) as categoricals, integer columns in the
+smallest integer type and float columns as float32 where that loses
+nothing: a column is only downcast if every value reads back as the same
+decimal number (7.85 stays 7.85, 7.123456789 keeps float64).
+
+float32 values are still not the float64 values they print as
+(``float(np.float32(7.85))`` is 7.849999904632568), so code that computes
+with or writes table numbers reads them through ``float_values``, which
+goes through the shortest decimal form. ``expanded_frame`` restores the
+default dtypes for writing the workbook.
+
+The GUI uses the lean dtypes when ``MATERIAL_MANAGER_LEAN=1`` is set;
+``python -m material_core.lean workbook.xlsx`` prints the memory report
+for a workbook.
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+LEAN_ENV = "MATERIAL_MANAGER_LEAN"
+
+# Text columns become categoricals when at most this share of their values are distinct
+CATEGORY_MAX_RATIO = 0.5
+
+
+def lean_requested():
+    """Return True if ``MATERIAL_MANAGER_LEAN`` asks for the lean dtypes."""
+    return os.environ.get(LEAN_ENV, "").strip().lower() not in ("", "0", "false", "no")
+
+
+def _is_float32(values):
+    return getattr(values, "dtype", None) == np.float32
+
+
+def fits_float32(values):
+    """Return True if every value of the float array reads back from float32 as the same decimal."""
+    values = np.asarray(values, dtype=float)
+    distinct = pd.unique(values[~np.isnan(values)])
+    narrow = distinct.astype(np.float32)
+    return np.array_equal(np.array(narrow.astype(str), dtype=float), distinct)
+
+
+def float_values(column):
+    """Return ``column`` as a float64 array, NaN where it is not numeric.
+
+    float32 columns convert through their shortest decimal form, so a
+    stored 7.85 comes back as 7.85.
+    """
+    if _is_float32(column):
+        distinct, inverse = np.unique(np.asarray(column), return_inverse=True)
+        return np.array(distinct.astype(str), dtype=float)[inverse]
+    return pd.to_numeric(column, errors='coerce').to_numpy(dtype=float)
+
+
+def float_value(value):
+    """Return one table number as a Python float (float32 through its decimal form)."""
+    return float(str(value)) if isinstance(value, np.float32) else float(value)
+
+
+def text_values(column, missing=""):
+    """Return a text column with missing values replaced by ``missing`` (categoricals included)."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        column = column.astype(object)
+    return column.fillna(missing)
+
+
+def compact_column(column):
+    """Return ``column`` in its lean dtype, or unchanged if none applies."""
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or dtype.kind in "bmM":
+        return column
+    if dtype.kind in "iu":
+        return pd.to_numeric(column, downcast='integer')
+    if dtype.kind == "f":
+        if dtype == np.float32:
+            return column
+        return column.astype(np.float32) if fits_float32(column.to_numpy()) else column
+    if column.nunique() <= CATEGORY_MAX_RATIO * len(column):
+        return column.astype('category')
+    return column
+
+
+def compact_frame(df):
+    """Return ``df`` with every column in its lean dtype (see the module docstring)."""
+    return pd.DataFrame({column: compact_column(df[column]) for column in df.columns}, index=df.index)
+
+
+def expanded_frame(df):
+    """Return ``df`` with categoricals as text and float32 columns as their decimal float64 values."""
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(values.cat.categories.dtype)
+        elif _is_float32(values):
+            values = pd.Series(float_values(values), index=df.index, name=column)
+        columns[column] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def memory_usage(df):
+    """Return the bytes held by each column of ``df`` (strings included)."""
+    return df.memory_usage(index=False, deep=True)
+
+
+def memory_report(before, after):
+    """Return a text table of the bytes per column of ``before`` and ``after``, with totals."""
+    old, new = memory_usage(before), memory_usage(after)
+    width = max([len("Total")] + [len(str(column)) for column in old.index])
+    lines = [f"{'Column':<{width}}  {'Before':>12}  {'After':>12}  {'Dtype':<10}"]
+    for column in old.index:
+        dtype = str(after[column].dtype) if column in after.columns else ""
+        lines.append(f"{column:<{width}}  {old[column]:>12,}  {new.get(column, 0):>12,}  {dtype:<10}")
+    total_old, total_new = int(old.sum()), int(new.sum())
+    saved = 1 - total_new / total_old if total_old else 0.0
+    lines.append(f"{'Total':<{width}}  {total_old:>12,}  {total_new:>12,}  ({saved:.0%} smaller)")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show how much memory the lean dtypes save for a workbook.")
+    parser.add_argument("workbook", help="Material workbook (.xlsx)")
+    args = parser.parse_args(argv)
+
+    from .data import load_materials
+    df = load_materials(args.workbook)
+    print(memory_report(df, compact_frame(df)))
+
+
+if __name__ == "__main__":
+    main()
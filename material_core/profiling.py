@@ -0,0 +1,160 @@
+"""Timing spans around the hot paths.
+
+``span(name)`` times a block and ``timed(name)`` a function. The duration
+of the latest run of every span name is always kept, which costs two
+``perf_counter`` calls and a dict store per span, so the GUI can show a
+live latency readout. Tracing additionally writes every span to a file in
+the Chrome trace event format (open it in chrome://tracing or
+https://ui.perfetto.dev); it is off unless ``start_trace`` is called or
+``MATERIAL_MANAGER_PROFILE`` names a trace file.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+# Trace file written from startup when set
+PROFILE_ENV = "MATERIAL_MANAGER_PROFILE"
+
+_last = {}  # Span name -> seconds taken by its latest run
+_trace = None  # The open Trace while tracing
+
+
+class Trace:
+    """Trace file receiving one complete ("X") event per finished span.
+
+    Lines are flushed as they are written, so the trace of a session that
+    crashed is still readable (the trace viewers accept a missing ``]``).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.events = 0
+        self._file = open(path, "w", buffering=1)
+        self._file.write("[")
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._threads = set()
+
+    def _write(self, event):
+        self._file.write(("\n" if not self.events else ",\n") + json.dumps(event, default=str))
+        self.events += 1
+
+    def add(self, name, start, end, args):
+        thread = threading.current_thread()
+        event = {"name": name, "ph": "X", "pid": self._pid, "tid": thread.ident,
+                 "ts": round((start - self._origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+        if args:
+            event["args"] = args
+        with self._lock:
+            if self._file.closed:
+                return
+            if thread.ident not in self._threads:
+                self._threads.add(thread.ident)
+                self._write({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": thread.ident,
+                             "args": {"name": thread.name}})
+            self._write(event)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.write("\n]\n")
+                self._file.close()
+
+
+def _finish(name, start, args):
+    end = time.perf_counter()
+    _last[name] = end - start
+    trace = _trace
+    if trace is not None:
+        trace.add(name, start, end, args)
+
+
+class span:
+    """Context manager timing the enclosed block as ``name``.
+
+    Keyword arguments, and anything added to ``args`` inside the block,
+    are stored with the span in the trace.
+    """
+
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, **args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        _finish(self.name, self.start, self.args)
+        return False
+
+
+def timed(name):
+    """Decorator timing every call of the function as the span ``name``."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _finish(name, start, None)
+        return wrapper
+    return decorate
+
+
+def last(name):
+    """Return the seconds taken by the latest ``name`` span, or None if it never ran."""
+    return _last.get(name)
+
+
+def readout(*names):
+    """Return e.g. ``"filter 3 ms / render 41 ms"`` for the spans ``names`` that have run."""
+    parts = []
+    for name in names:
+        seconds = _last.get(name)
+        if seconds is not None:
+            parts.append(f"{name} {seconds * 1000:.0f} ms" if seconds >= 0.001 else f"{name} <1 ms")
+    return " / ".join(parts)
+
+
+# --------- Tracing ---------
+def tracing():
+    """Return the path of the trace being written, or None."""
+    return _trace.path if _trace is not None else None
+
+
+def start_trace(path):
+    """Write every span to the trace file ``path`` until ``stop_trace``."""
+    global _trace
+    stop_trace()
+    _trace = Trace(path)
+    return path
+
+
+def stop_trace():
+    """Close the current trace file; return its path, or None if not tracing."""
+    global _trace
+    trace, _trace = _trace, None
+    if trace is None:
+        return None
+    trace.close()
+    return trace.path
+
+
+def start_trace_from_env():
+    """Start tracing to the file named by ``MATERIAL_MANAGER_PROFILE``, if it is set."""
+    path = os.environ.get(PROFILE_ENV)
+    return start_trace(path) if path else None
+
+
+atexit.register(stop_trace)
@@ -0,0 +1,413 @@
+"""Search, filter and sort logic behind the main table view."""
+
+import numpy as np
+import pandas as pd
+
+from .lean import float_values, text_values
+from .schema import NUMERIC_COLUMNS, sort_options
+from .similarity import SimilarityIndex
+
+# Columns always sorted as numbers; other columns are when all their values are numeric
+_NUMERIC_SORT_COLUMNS = NUMERIC_COLUMNS
+
+# Categorical columns filtered by exact match from the comboboxes, and the
+# ``mask`` argument filtering each
+CATEGORY_COLUMNS = ["Manufacturing process", "Applications"]
+_CATEGORY_ARGUMENTS = {"Manufacturing process": "mfg_process", "Applications": "application"}
+
+# Columns offered as min/max range filters
+RANGE_COLUMNS = NUMERIC_COLUMNS
+
+# Number of search-text masks and of range masks kept by QueryEngine
+_SEARCH_CACHE_SIZE = 32
+
+# Length of the substrings indexed by TrigramIndex
+_NGRAM = 3
+
+
+def filter_options(df, column):
+    """Return the combobox values for a categorical filter column."""
+    return ["All"] + sorted(df[column].dropna().unique().tolist())
+
+
+def _sorted_numbers(column, offset=0):
+    # (positions of the numeric values sorted ascending, those values, positions of the rest)
+    values = float_values(column)
+    missing = np.isnan(values)
+    order = np.argsort(values, kind='stable')[:len(values) - missing.sum()]  # NaN sorts last
+    return order + offset, values[order], np.flatnonzero(missing) + offset
+
+
+def _grams(term):
+    return {term[i:i + _NGRAM] for i in range(len(term) - _NGRAM + 1)}
+
+
+class TrigramIndex:
+    """Substring index over a column of lower-cased names.
+
+    Names repeat a lot in a material library, so the index is built over
+    the distinct names only and a match is mapped back to rows through the
+    factorized codes. Each trigram has a posting list of the distinct names
+    containing it; a query intersects the posting lists of its trigrams and
+    verifies the few remaining candidates.
+    """
+
+    def __init__(self, names):
+        self.codes, uniques = pd.factorize(names)
+        self.terms = pd.Series(uniques, dtype=object)
+        self._term_ids = {term: term_id for term_id, term in enumerate(uniques)}
+
+        postings = {}
+        for term_id, term in enumerate(uniques):
+            for gram in _grams(term):
+                postings.setdefault(gram, []).append(term_id)
+        self.postings = {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()}
+
+    def extend(self, names):
+        """Index ``names`` as rows appended after the existing ones."""
+        new_terms = []
+        codes = np.empty(len(names), dtype=self.codes.dtype)
+        for i, name in enumerate(names):
+            term_id = self._term_ids.get(name)
+            if term_id is None:
+                term_id = self._term_ids[name] = len(self.terms) + len(new_terms)
+                new_terms.append(name)
+                for gram in _grams(name):
+                    ids = self.postings.get(gram)
+                    self.postings[gram] = np.array([term_id]) if ids is None else np.append(ids, term_id)
+            codes[i] = term_id
+        self.codes = np.concatenate([self.codes, codes])
+        if new_terms:
+            self.terms = pd.concat([self.terms, pd.Series(new_terms, dtype=object)], ignore_index=True)
+
+    def terms_containing(self, text, within=None):
+        """Return the sorted ids of the distinct names containing ``text``.
+
+        ``within`` restricts the search to a previous result, which is valid
+        whenever that result was for a substring of ``text``.
+        """
+        candidates = within
+        if len(text) >= _NGRAM:
+            grams = _grams(text)
+            lists = sorted((self.postings.get(gram, np.empty(0, dtype=np.int64)) for gram in grams), key=len)
+            for ids in lists:
+                if candidates is None:
+                    candidates = ids
+                else:
+                    candidates = np.intersect1d(candidates, ids, assume_unique=True)
+                if not len(candidates):
+                    return candidates
+
+        if candidates is None:
+            candidates = np.arange(len(self.terms))
+        if len(text) == _NGRAM and within is None:
+            return candidates  # The posting list is exact for a single trigram
+        found = self.terms.iloc[candidates].str.contains(text, regex=False).to_numpy(dtype=bool)
+        return candidates[found]
+
+    def mask(self, term_ids):
+        """Row mask for the distinct-name ids ``term_ids``."""
+        term_mask = np.zeros(len(self.terms), dtype=bool)
+        term_mask[term_ids] = True
+        return term_mask[self.codes]
+
+
+class QueryEngine:
+    """Column indexes over a material table, built once and reused per query.
+
+    Holds a trigram index over the lower-cased material names, categorical
+    codes for the filter columns with a cached row bitmap per category, and
+    cached masks for search texts and material types. A query ANDs the
+    relevant masks and returns row positions into ``df``; the frame itself
+    is never copied.
+
+    Numeric columns are presorted once per column, so a range filter is two
+    binary searches. Sorting gathers the rows of a cached per-column sort
+    permutation through the filter mask, and the category counts shown in the filter dropdowns
+    come from the category codes under the mask of the other filters. The nearest-neighbour index for "find similar" is
+    built on first use (see ``similarity_index``) and kept up to date by
+    ``extend``.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.names = TrigramIndex(text_values(df['Material']).astype(str).str.lower())
+        self._last_search = ("", None)  # Previous search text and its matching name ids
+        self._codes = {}
+        self._category_ids = {}
+        for column in CATEGORY_COLUMNS:
+            if column in df.columns:
+                codes, uniques = pd.factorize(df[column])
+                self._codes[column] = codes
+                self._category_ids[column] = {value: i for i, value in enumerate(uniques)}
+        # Rows per category code of the whole table, kept up to date by extend
+        self._category_totals = {column: np.bincount(codes[codes >= 0], minlength=len(self._category_ids[column]))
+                                 for column, codes in self._codes.items()}
+        self._sorted = {}  # Numeric column -> _sorted_numbers
+        self._category_masks = {}
+        self._range_masks = {}
+        self._search_masks = {}
+        self._sort_orders = {}  # (column, descending) -> row positions in that order
+        self._sort_ranks = {}
+        self._similarity = None
+
+    def __len__(self):
+        return len(self.df)
+
+    def extend(self, df):
+        """Index the rows appended to the table since the engine was built.
+
+        ``df`` must start with the rows the engine already indexes.
+        Category counts and presorted columns are updated in place; cached
+        masks and sort orders are dropped and rebuilt on demand.
+        """
+        new_rows = df.iloc[len(self.df):]
+        offset = len(self.df)
+        self.df = df
+        self.names.extend(text_values(new_rows['Material']).astype(str).str.lower().tolist())
+        for column, category_ids in self._category_ids.items():
+            codes = np.array([category_ids.setdefault(value, len(category_ids)) if pd.notna(value) else -1
+                              for value in new_rows[column]], dtype=self._codes[column].dtype)
+            self._codes[column] = np.concatenate([self._codes[column], codes])
+            totals = np.bincount(codes[codes >= 0], minlength=len(category_ids))
+            totals[:len(self._category_totals[column])] += self._category_totals[column]
+            self._category_totals[column] = totals
+        for column, (order, values, missing) in self._sorted.items():
+            # Merge the new rows into the presorted column; ties keep row order
+            new_order, new_values, new_missing = _sorted_numbers(new_rows[column], offset)
+            slots = np.searchsorted(values, new_values, side='right')
+            self._sorted[column] = (np.insert(order, slots, new_order), np.insert(values, slots, new_values),
+                                    np.concatenate([missing, new_missing]))
+        self._category_masks = {}
+        self._range_masks = {}
+        self._search_masks = {}
+        self._sort_orders = {}
+        self._sort_ranks = {}
+        self._last_search = ("", None)
+        if self._similarity is not None:
+            self._similarity.extend(df)
+
+    def similarity_index(self):
+        """Return the ``SimilarityIndex`` of the table, building it on first use."""
+        if self._similarity is None:
+            self._similarity = SimilarityIndex(self.df)
+        return self._similarity
+
+    # --------- Masks ---------
+    def category_mask(self, column, value):
+        """Boolean mask of the rows where ``column == value``."""
+        key = (column, value)
+        mask = self._category_masks.get(key)
+        if mask is None:
+            code = self._category_ids[column].get(value)
+            if code is None:
+                mask = np.zeros(len(self.df), dtype=bool)
+            else:
+                mask = self._codes[column] == code
+            self._category_masks[key] = mask
+        return mask
+
+    def name_mask(self, text, incremental=False):
+        """Boolean mask of the rows whose lower-cased name contains ``text``.
+
+        With ``incremental`` the search refines the previous incremental
+        search when ``text`` extends it, which is the common case while
+        typing into the search box.
+        """
+        text = text.lower()
+        mask = self._search_masks.get(text)
+        if mask is None:
+            within = None
+            if incremental:
+                last_text, last_ids = self._last_search
+                if last_text and last_text in text:
+                    within = last_ids
+            term_ids = self.names.terms_containing(text, within)
+            if incremental:
+                self._last_search = (text, term_ids)
+            mask = self.names.mask(term_ids)
+            if len(self._search_masks) >= _SEARCH_CACHE_SIZE:
+                self._search_masks.pop(next(iter(self._search_masks)))
+            self._search_masks[text] = mask
+        return mask
+
+    def range_mask(self, column, low=None, high=None):
+        """Boolean mask of the rows with ``low <= column <= high``.
+
+        A None bound is open. Rows without a numeric value never match.
+        """
+        key = (column, low, high)
+        mask = self._range_masks.get(key)
+        if mask is None:
+            order, values, _ = self.sorted_numbers(column)
+            start = 0 if low is None else np.searchsorted(values, low, side='left')
+            end = len(values) if high is None else np.searchsorted(values, high, side='right')
+            mask = np.zeros(len(self.df), dtype=bool)
+            mask[order[start:end]] = True
+            if len(self._range_masks) >= _SEARCH_CACHE_SIZE:
+                self._range_masks.pop(next(iter(self._range_masks)))
+            self._range_masks[key] = mask
+        return mask
+
+    def sorted_numbers(self, column):
+        """Return ``(positions, values, missing)`` of a numeric column, built on first use.
+
+        ``positions`` are the rows with a numeric value, ordered by it
+        (ties in row order), ``values`` their sorted values and
+        ``missing`` the other rows.
+        """
+        entry = self._sorted.get(column)
+        if entry is None:
+            entry = self._sorted[column] = _sorted_numbers(self.df[column])
+        return entry
+
+    def _numeric(self, column):
+        values = self.df[column]
+        if column in _NUMERIC_SORT_COLUMNS or pd.api.types.is_numeric_dtype(values):
+            return True
+        return pd.to_numeric(values, errors='coerce').count() == values.count()
+
+    def sort_ranks(self, column):
+        """Dense ranks of ``column`` ascending (equal values share one), -1 where missing.
+
+        Numeric columns rank by value, other columns by case-insensitive
+        text. Built on first use. Raises ``KeyError`` for an unknown column.
+        """
+        ranks = self._sort_ranks.get(column)
+        if ranks is None:
+            if self._numeric(column):
+                order, values, _ = self.sorted_numbers(column)
+                ranks = np.full(len(self.df), -1)
+                if len(values):
+                    ranks[order] = np.concatenate([[0], np.cumsum(values[1:] != values[:-1])])
+            else:
+                values = self.df[column]
+                ranks = pd.factorize(values.astype(str).str.lower().where(values.notna()), sort=True)[0]
+            self._sort_ranks[column] = ranks
+        return ranks
+
+    def _sort_keys(self, column, descending, positions=None):
+        # Integer keys ordering the rows at ``positions`` by ``column``, missing values last
+        ranks = self.sort_ranks(column)
+        if positions is not None:
+            ranks = ranks[positions]
+        if descending:
+            return np.where(ranks < 0, 1, -ranks)
+        return np.where(ranks < 0, len(self.df), ranks)
+
+    def sort_order(self, column, descending=False):
+        """Row positions ordering ``column``, missing values last and ties in row order.
+
+        Built once per column and direction and reused by every query.
+        """
+        key = (column, descending)
+        order = self._sort_orders.get(key)
+        if order is None:
+            keys = self._sort_keys(column, descending)
+            if not descending and column in self._sorted:  # Ranked as numbers: already presorted
+                numeric, _, missing = self._sorted[column]
+                order = np.concatenate([numeric, missing])
+            else:
+                order = np.argsort(keys, kind='stable')
+            self._sort_orders[key] = order
+        return order
+
+    # --------- Queries ---------
+    def mask(self, search_text="", mfg_process="All", application="All", material_type="", ranges=None):
+        """Return the combined boolean mask for the filters, or None when nothing is filtered.
+
+        ``ranges`` maps numeric columns to ``(min, max)`` bounds, either of
+        which may be None.
+        """
+        masks = []
+
+        search_text = search_text.strip().lower()
+        if search_text:
+            masks.append(self.name_mask(search_text, incremental=True))
+        if mfg_process != "All":
+            masks.append(self.category_mask('Manufacturing process', mfg_process))
+        if application != "All":
+            masks.append(self.category_mask('Applications', application))
+        if material_type:
+            masks.append(self.name_mask(material_type))
+        for column, (low, high) in (ranges or {}).items():
+            if low is not None or high is not None:
+                masks.append(self.range_mask(column, low, high))
+
+        if not masks:
+            return None
+        if len(masks) == 1:
+            return masks[0]
+        return np.logical_and.reduce(masks)
+
+    def positions(self, search_text="", mfg_process="All", application="All", material_type="",
+                  sort_column=None, ranges=None, sort_keys=None):
+        """Return the row positions matching the filters, in display order.
+
+        ``sort_keys`` is a list of ``(column, descending)`` pairs, most
+        significant first; it replaces ``sort_column``, which sorts
+        ascending by one of ``sort_options``.
+        Raises ``KeyError`` if a sort column or a ``ranges`` column is not a
+        column of the table.
+        """
+        mask = self.mask(search_text, mfg_process, application, material_type, ranges)
+
+        if not sort_keys and sort_column and sort_column in sort_options and sort_column != "None":
+            sort_keys = [(sort_column, False)]
+        if sort_keys:
+            for column, _ in sort_keys:
+                if column not in self.df.columns:
+                    raise KeyError(column)
+            return self._sorted_positions(mask, sort_keys)
+
+        if mask is None:
+            return np.arange(len(self.df))
+        return np.flatnonzero(mask)
+
+    def _sorted_positions(self, mask, sort_keys):
+        # The primary key is a gather through its cached permutation ...
+        column, descending = sort_keys[0]
+        order = self.sort_order(column, descending)
+        result = order if mask is None else order[mask[order]]
+        if len(sort_keys) == 1 or len(result) < 2:
+            return result
+        # ... and only the rows tied on it are sorted by the secondary keys
+        primary = self.sort_ranks(column)[result]
+        group = np.cumsum(np.concatenate([[True], primary[1:] != primary[:-1]]))
+        tied = np.flatnonzero(np.bincount(group)[group] > 1)
+        if len(tied):
+            rows = result[tied]
+            keys = [self._sort_keys(column, descending, rows) for column, descending in reversed(sort_keys[1:])]
+            result = result.copy()
+            result[tied] = rows[np.lexsort(keys + [group[tied]])]
+        return result
+
+    def category_counts(self, column, **filters):
+        """Return ``{category: rows}`` for ``column`` among the rows matching the other filters.
+
+        ``filters`` are ``mask`` arguments. The filter on ``column`` itself
+        is ignored, so each count is the number of rows that choosing the
+        category would show. Empty if the table has no such column.
+        """
+        if column not in self._codes:
+            return {}
+        filters[_CATEGORY_ARGUMENTS[column]] = "All"
+        mask = self.mask(**filters)
+        if mask is None:
+            counts = self._category_totals[column]
+        else:
+            codes = self._codes[column][mask]
+            counts = np.bincount(codes[codes >= 0], minlength=len(self._category_ids[column]))
+        return {value: int(counts[code]) for value, code in self._category_ids[column].items()}
+
+
+def filter_materials(df, search_text="", mfg_process="All", application="All", material_type="",
+                     sort_column=None):
+    """Return the rows of ``df`` matching the given filters, sorted by ``sort_column``.
+
+    Builds a throwaway ``QueryEngine``; keep one around instead when
+    running many queries against the same table.
+    Raises ``KeyError`` if ``sort_column`` is not a column of ``df``.
+    """
+    positions = QueryEngine(df).positions(search_text, mfg_process, application, material_type, sort_column)
+    return df.iloc[positions]
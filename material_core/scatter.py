@@ -0,0 +1,98 @@
+"""Property-space scatter data with zoom-dependent downsampling.
+
+Plotting a million points one by one is too slow to stay interactive, so
+``ScatterData.sample`` bins the points inside the current view onto a grid
+and returns one representative row per occupied cell together with the
+number of rows in that cell. Zooming in shrinks the cells, so the plot
+converges to the individual points. Rows are identified by their
+DataFrame index labels, the same IDs the table uses for its selection.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Views with at most this many points are drawn without binning
+MAX_POINTS = 10000
+# Grid used for binning larger views
+BINS = (160, 120)
+
+
+def _numeric(df, column):
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+
+
+class ScatterData:
+    """Two numeric columns of a frame, prepared for the scatter explorer."""
+
+    def __init__(self, df, x_column, y_column):
+        self.labels = df.index
+        self.x_column = x_column
+        self.y_column = y_column
+        self.x = _numeric(df, x_column)
+        self.y = _numeric(df, y_column)
+        self.valid = np.isfinite(self.x) & np.isfinite(self.y)
+
+    def _usable(self, log):
+        if not log:
+            return self.valid
+        return self.valid & (self.x > 0) & (self.y > 0)
+
+    def bounds(self, log=False):
+        """Return ``((xmin, xmax), (ymin, ymax))`` of the plottable points, or None."""
+        usable = self._usable(log)
+        if not usable.any():
+            return None
+        x, y = self.x[usable], self.y[usable]
+        return (x.min(), x.max()), (y.min(), y.max())
+
+    def in_view(self, xlim, ylim, log=False, positions=None):
+        """Return the row positions whose point lies inside the view."""
+        (x0, x1), (y0, y1) = sorted(xlim), sorted(ylim)
+        if positions is None:
+            x, y, usable = self.x, self.y, self._usable(log)
+        else:
+            x, y, usable = self.x[positions], self.y[positions], self._usable(log)[positions]
+        inside = usable & (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+        found = np.flatnonzero(inside)
+        return found if positions is None else positions[found]
+
+    def sample(self, xlim, ylim, log=False, positions=None, max_points=MAX_POINTS, bins=BINS):
+        """Return ``(positions, counts)`` for the points to draw in the view.
+
+        ``positions`` restricts the sample to those rows. When the view holds
+        more than ``max_points`` rows, they are binned on a ``bins`` grid
+        (in log space for log axes) and one row per occupied cell is returned,
+        with ``counts`` giving how many rows the cell holds.
+        """
+        found = self.in_view(xlim, ylim, log, positions)
+        if len(found) <= max_points:
+            return found, np.ones(len(found), dtype=np.int64)
+
+        x, y = self.x[found], self.y[found]
+        (x0, x1), (y0, y1) = sorted(xlim), sorted(ylim)
+        if log:
+            x, y = np.log10(x), np.log10(y)
+            x0, x1, y0, y1 = np.log10(np.maximum([x0, x1, y0, y1], np.finfo(float).tiny))
+        nx, ny = bins
+        column = ((x - x0) * (nx / ((x1 - x0) or 1))).astype(np.int64).clip(0, nx - 1)
+        row = ((y - y0) * (ny / ((y1 - y0) or 1))).astype(np.int64).clip(0, ny - 1)
+        cell = row * nx + column
+
+        counts = np.bincount(cell, minlength=nx * ny)
+        representative = np.empty(nx * ny, dtype=np.int64)
+        representative[cell] = found
+        occupied = np.flatnonzero(counts)
+        return representative[occupied], counts[occupied]
+
+    def brush(self, xlim, ylim, log=False):
+        """Return the index labels of the rows inside the brushed rectangle."""
+        return self.labels[self.in_view(xlim, ylim, log)]
+
+    def positions(self, labels):
+        """Return the row positions of ``labels``, ignoring labels no longer present."""
+        if len(labels) == 0:
+            return np.empty(0, dtype=np.int64)
+        found = self.labels.get_indexer(labels)
+        return found[found >= 0]
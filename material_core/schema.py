@@ -0,0 +1,45 @@
+"""Column layout of the material table.
+
+Kept free of pandas so the GUI can build its widgets before the data
+libraries have been imported.
+"""
+
+DATA_FILE = "sample_material_data.xlsx"
+# Rows added while a folder of workbooks is open are saved to this workbook in the folder
+FOLDER_WORKBOOK = "added_materials.xlsx"
+
+# Column layout of the material workbook
+COLUMNS = [
+    "Material",
+    "Youngs modulus",
+    "Poissons ratio",
+    "Density",
+    "%EL",
+    "UTS",
+    "Yield strength",
+    "Endurance Strength",
+    "Standard",
+    "Hardness",
+    "Manufacturing process",
+    "Applications",
+]
+
+# Columns entered and validated as numbers
+NUMERIC_COLUMNS = [
+    "Youngs modulus",
+    "Poissons ratio",
+    "Density",
+    "%EL",
+    "UTS",
+    "Yield strength",
+    "Endurance Strength",
+]
+
+# Extra column of ingested folders recording where each row came from
+PROVENANCE_COLUMN = "Source"
+
+sort_options = ["None", "UTS", "Yield strength", "Endurance Strength"]
+material_types = ["Steel", "Aluminum", "Cast Iron"]
+
+# Hardening models of the multi-point *PLASTIC tables (see material_core.curves)
+HARDENING_MODELS = ["bilinear", "hollomon", "ramberg-osgood", "voce"]
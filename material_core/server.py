@@ -0,0 +1,422 @@
+"""Headless material service for scripts and batch jobs.
+
+Loads the material table once, keeps the query indexes and derived
+properties in memory and answers over local HTTP (or a Unix socket), so
+pre-processing scripts no longer re-parse the workbook::
+
+    python -m material_core.server --source sample_material_data.xlsx --port 8765
+    python -m material_core.server --socket /tmp/materials.sock
+
+Endpoints (GET; JSON unless noted):
+
+``/health``
+    Row count and source.
+``/options``
+    Values for the ``process`` and ``application`` filters.
+``/materials?search=&process=&application=&type=&sort=&offset=0&limit=100``
+    Filtered, sorted page of materials; every row carries its ``id``.
+    ``sort`` lists columns, most significant first, each prefixed with
+    ``-`` for descending order (e.g. ``sort=Manufacturing process,-UTS``).
+``/materials/<id>``, ``/derived/<id>``
+    One material, or its derived properties and their errors.
+``/export/<format>/<id>``
+    The solver deck of one material (text).
+``/export/<format>?<filters>``
+    One combined deck of every material matching the filters (text).
+    Both export endpoints take ``curve=<model>&points=<n>`` to write
+    ``*PLASTIC`` tables of a hardening model (see ``curves``).
+
+Requests are served by a thread each, and responses are cached by request
+target until the source changes on disk, which triggers a reload. The
+``load`` command is a small load generator that reports latency
+percentiles::
+
+    python -m material_core.server load --url http://127.0.0.1:8765 --clients 8 --requests 4000
+"""
+
+import argparse
+import http.client
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .curves import DEFAULT_POINTS
+from .data import load_materials
+from .derived import DerivedCache
+from .journal import Journal
+from .lean import float_value
+from .query import QueryEngine, filter_options
+from .schema import DATA_FILE, FOLDER_WORKBOOK, HARDENING_MODELS
+from .sync import SourceWatcher
+from .writers import WRITERS, get_writer
+
+DEFAULT_PORT = 8765
+RESPONSE_CACHE_SIZE = 512
+# Requests without a limit get at most this many rows
+DEFAULT_LIMIT = 100
+# How often the source is checked for changes, in seconds
+RELOAD_INTERVAL = 2.0
+
+
+class ServiceError(Exception):
+    """A request that cannot be answered; carries the HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    if isinstance(value, np.float32):
+        return float_value(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _records(frame):
+    # Missing values become null; every record leads with its row id
+    frame = frame.astype(object).where(frame.notna(), None)
+    return [{"id": label, **record} for label, record in zip(frame.index.tolist(), frame.to_dict("records"))]
+
+
+class MaterialService:
+    """The loaded table, its indexes and a response cache, shared by all requests."""
+
+    def __init__(self, source=DATA_FILE, cache_size=RESPONSE_CACHE_SIZE):
+        self.source = source
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.generation = 0  # Bumped by every load; older responses are not cached
+        self._cache_lock = threading.Lock()
+        self._query_lock = threading.Lock()  # QueryEngine caches are not thread-safe
+        self.watcher = SourceWatcher(source)
+        self.load()
+
+    def load(self):
+        """(Re)read the source, including edits still in its journal."""
+        if os.path.isdir(self.source):
+            from .ingest import ingest_in_subprocess
+            df = ingest_in_subprocess(self.source).frame
+            journal = Journal(os.path.join(self.source, FOLDER_WORKBOOK))
+        else:
+            df = load_materials(self.source)
+            journal = Journal(self.source)
+        df = journal.apply(df)  # The app owning the journal may be writing to it
+        state = (df, QueryEngine(df), DerivedCache(df))
+        with self._query_lock, self._cache_lock:
+            self.state = state
+            self.generation += 1
+            self._cache.clear()
+
+    def reload_if_changed(self):
+        signature = self.watcher.changed()
+        if signature is not None:
+            self.load()
+            self.watcher.acknowledge(signature)
+
+    @property
+    def df(self):
+        return self.state[0]
+
+    # --------- Requests ---------
+    def handle(self, target):
+        """Return ``(status, content_type, body, headers)`` for the request ``target``."""
+        with self._cache_lock:
+            response = self._cache.get(target)
+            if response is not None:
+                self._cache.move_to_end(target)
+                return response
+            generation = self.generation
+        try:
+            response = self._dispatch(target)
+        except ServiceError as e:
+            return e.status, "application/json", json.dumps({"error": str(e)}).encode(), {}
+        except Exception as e:
+            # A bug in a handler still gets a response instead of a dropped connection
+            message = f"Internal error: {type(e).__name__}: {e}"
+            return 500, "application/json", json.dumps({"error": message}).encode(), {}
+        with self._cache_lock:
+            if generation == self.generation:
+                self._cache[target] = response
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return response
+
+    def _dispatch(self, target):
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        # One consistent table for the whole request, even if a reload lands meanwhile
+        state = df, engine, derived = self.state
+
+        if parts == ["health"]:
+            return self._json({"status": "ok", "materials": len(df), "source": self.source})
+        if parts == ["options"]:
+            return self._json({"process": filter_options(df, "Manufacturing process"),
+                               "application": filter_options(df, "Applications"),
+                               "format": list(WRITERS)})
+        if parts == ["materials"]:
+            positions = self._positions(engine, params)
+            offset = self._int(params, "offset", 0)
+            limit = self._int(params, "limit", DEFAULT_LIMIT)
+            page = df.iloc[positions[offset:offset + limit]]
+            return self._json({"total": len(positions), "offset": offset, "rows": _records(page)})
+        if len(parts) == 2 and parts[0] in ("materials", "derived"):
+            label = self._label(df, parts[1])
+            if parts[0] == "materials":
+                return self._json(_records(df.loc[[label]])[0])
+            values, errors = derived.values(label)
+            return self._json({"id": label, "values": values, "errors": errors})
+        if parts and parts[0] == "export" and len(parts) in (2, 3):
+            try:
+                writer = get_writer(parts[1])
+            except KeyError:
+                raise ServiceError(404, f"Unknown format '{parts[1]}'")
+            curve = params.get("curve")
+            if curve:
+                if curve not in HARDENING_MODELS:
+                    raise ServiceError(400, f"Unknown curve '{curve}'")
+                points = self._int(params, "points", DEFAULT_POINTS)
+                if points < 2:
+                    raise ServiceError(400, "'points' must be at least 2")
+                writer = writer.with_hardening(curve, points)
+            if len(parts) == 3:
+                return self._export_one(state, writer, self._label(df, parts[2]))
+            return self._export_many(state, writer, self._positions(engine, params))
+        raise ServiceError(404, f"Unknown endpoint '{url.path}'")
+
+    @staticmethod
+    def _json(payload):
+        return 200, "application/json", json.dumps(payload, default=_json_default).encode(), {}
+
+    @staticmethod
+    def _int(params, name, default):
+        try:
+            value = int(params.get(name, default))
+        except ValueError:
+            raise ServiceError(400, f"'{name}' must be an integer")
+        if value < 0:
+            raise ServiceError(400, f"'{name}' must not be negative")
+        return value
+
+    @staticmethod
+    def _label(df, text):
+        try:
+            label = int(text)
+        except ValueError:
+            raise ServiceError(404, f"Unknown material id '{text}'")
+        if label not in df.index:
+            raise ServiceError(404, f"Unknown material id '{text}'")
+        return label
+
+    def _positions(self, engine, params):
+        sort = params.get("sort", "")
+        columns = [column.strip() for column in sort.split(",") if column.strip() not in ("", "None")]
+        sort_keys = [(column.lstrip("-"), column.startswith("-")) for column in columns]
+        try:
+            with self._query_lock:
+                return engine.positions(
+                    search_text=params.get("search", ""),
+                    mfg_process=params.get("process", "All"),
+                    application=params.get("application", "All"),
+                    material_type=params.get("type", ""),
+                    sort_keys=sort_keys,
+                )
+        except KeyError:
+            raise ServiceError(400, f"Cannot sort by '{sort}'")
+
+    @staticmethod
+    def _export_one(state, writer, label):
+        df, _, derived = state
+        row = df.loc[label].to_dict()
+        try:
+            text = writer.content(row, derived=derived.values(label))
+        except ValueError as e:
+            raise ServiceError(422, str(e))
+        name = row.get("Material")
+        file_name = writer.file_name("UNKNOWN" if pd.isna(name) else str(name))
+        return 200, "text/plain; charset=utf-8", text.encode(), {"Content-Disposition": f'attachment; filename="{file_name}"'}
+
+    @staticmethod
+    def _export_many(state, writer, positions):
+        df, _, derived = state
+        frame = df.iloc[positions]
+        buffer = io.StringIO()
+        skipped = writer.write(buffer, frame, derived.frame.loc[frame.index])
+        headers = {"Content-Disposition": f'attachment; filename="{writer.combined_file_name()}"',
+                   "X-Skipped-Materials": str(len(skipped))}
+        return 200, "text/plain; charset=utf-8", buffer.getvalue().encode(), headers
+
+
+# --------- HTTP ---------
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse connections
+    # Headers and body go out as separate writes; with Nagle's algorithm the
+    # body would wait for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+    server_version = "MaterialService"
+
+    def do_GET(self):
+        status, content_type, body, headers = self.server.service.handle(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ("unix", 0)
+
+
+def make_server(service, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None, verbose=False):
+    """Return a threading HTTP server for ``service`` on ``host:port`` or ``socket_path``."""
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, _Handler)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def _watch(service, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            service.reload_if_changed()
+        except Exception as e:  # Keep serving the old table until the source reads again
+            print(f"Reload of {service.source} failed: {e}", flush=True)
+
+
+def serve(source=DATA_FILE, host="127.0.0.1", port=DEFAULT_PORT, socket_path=None, verbose=False):
+    start = time.perf_counter()
+    service = MaterialService(source)
+    server = make_server(service, host, port, socket_path, verbose)
+    threading.Thread(target=_watch, args=(service, RELOAD_INTERVAL), daemon=True).start()
+    where = socket_path or f"http://{host}:{server.server_address[1]}"
+    print(f"Serving {len(service.df):,} materials from {source} on {where} "
+          f"(loaded in {time.perf_counter() - start:.2f} s)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+# --------- Load generator ---------
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def run_load(url=None, socket_path=None, paths=("/materials?search=st&sort=UTS",), clients=8, requests=2000):
+    """Fire ``requests`` GETs over ``clients`` keep-alive connections.
+
+    Returns a dict with the request rate and latency percentiles in ms.
+    """
+    if socket_path is None:
+        parsed = urlsplit(url or f"http://127.0.0.1:{DEFAULT_PORT}")
+
+    def connect():
+        if socket_path is not None:
+            return _UnixHTTPConnection(socket_path)
+        return http.client.HTTPConnection(parsed.hostname, parsed.port or 80)
+
+    def client(count, offset):
+        connection = connect()
+        latencies = []
+        for i in range(count):
+            path = paths[(offset + i) % len(paths)]
+            begin = time.perf_counter()
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - begin)
+            if response.status >= 500:
+                raise RuntimeError(f"{path} failed with status {response.status}")
+        connection.close()
+        return latencies
+
+    per_client = [requests // clients + (1 if i < requests % clients else 0) for i in range(clients)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client, per_client, range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies = np.concatenate([np.asarray(r) for r in results]) * 1000
+    return {
+        "requests": len(latencies),
+        "seconds": elapsed,
+        "rate": len(latencies) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m material_core.server", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command")
+
+    load = commands.add_parser("load", help="Measure request latency against a running service")
+    load.add_argument("--url", default=f"http://127.0.0.1:{DEFAULT_PORT}")
+    load.add_argument("--socket", dest="socket_path")
+    load.add_argument("--clients", type=int, default=8)
+    load.add_argument("--requests", type=int, default=2000)
+    load.add_argument("--path", action="append", dest="paths",
+                      help="Request target to cycle through (repeatable)")
+
+    parser.add_argument("--source", default=DATA_FILE, help="Workbook or folder of workbooks to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", dest="socket_path", help="Serve on this Unix socket instead of TCP")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        paths = args.paths or ["/materials?search=st&sort=UTS", "/derived/0", "/export/inp/0"]
+        stats = run_load(args.url, args.socket_path, paths, args.clients, args.requests)
+        print(json.dumps(stats, indent=2))
+    else:
+        serve(args.source, args.host, args.port, args.socket_path, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Nearest-neighbour search for substitute materials.
+
+``SimilarityIndex`` answers "which materials are closest to this one (or to
+these target values)?" by weighted Euclidean distance over the numeric
+properties. Every property is normalized by its median and interquartile
+range, so a difference of one IQR in UTS counts as much as one IQR in
+density; per-query weights scale that further, and properties without a
+target value are ignored.
+
+The rows are partitioned like a KD-tree (median splits of the widest
+dimension) into leaves that are contiguous blocks of a reordered copy of
+the data, each with its bounding box. A query computes the weighted
+distance from the target to every leaf's box in one NumPy expression,
+scores the closest few leaves to bound the k-th distance, and then scores
+every leaf whose box could still beat that bound -- two vectorized passes
+instead of a node-by-node walk. Rows appended after the build are kept in
+a small buffer that is scanned brute-force, and the partition is rebuilt
+once the buffer outgrows it.
+
+A missing property is imputed with the median for the tree and charged
+at least ``MISSING_PENALTY`` (squared IQRs) whenever that property is
+weighted, so incomplete rows rank behind complete ones. Charging at least
+the imputed difference keeps the bounding boxes valid lower bounds.
+"""
+
+import numpy as np
+
+from .lean import float_values
+from .schema import NUMERIC_COLUMNS
+
+# Properties compared by default
+SIMILARITY_COLUMNS = NUMERIC_COLUMNS + ["Hardness"]
+
+# Rows per KD-tree leaf
+LEAF_SIZE = 64
+
+# Squared normalized distance charged for a weighted property the row lacks
+MISSING_PENALTY = 4.0
+
+# Appended rows are scanned brute-force until there are this many (or n / 16)
+MIN_REBUILD_BUFFER = 4096
+
+DEFAULT_K = 10
+
+
+class SimilarityIndex:
+    """KD-tree over the normalized numeric properties of a material table."""
+
+    def __init__(self, df, columns=None, leaf_size=LEAF_SIZE):
+        self.columns = [c for c in (columns or SIMILARITY_COLUMNS) if c in df.columns]
+        self.leaf_size = leaf_size
+        values = self._raw_values(df)
+        with np.errstate(all='ignore'):
+            low, self.center, high = np.nanpercentile(values, [25, 50, 75], axis=0) if len(values) \
+                else np.zeros((3, len(self.columns)))
+        self.center = np.nan_to_num(self.center)
+        scale = np.nan_to_num(high - low)
+        self.scale = np.where(scale > 0, scale, 1.0)
+        self.df = df
+        self._build(self._normalize(values))
+
+    def __len__(self):
+        return len(self.df)
+
+    def _raw_values(self, df):
+        return np.column_stack([float_values(df[c]) for c in self.columns]) if self.columns else np.zeros((len(df), 0))
+
+    def _normalize(self, values):
+        return (values - self.center) / self.scale
+
+    # --------- Building ---------
+    def _build(self, points):
+        """Partition ``points`` (normalized, NaN where missing) into KD-tree leaves."""
+        missing = np.isnan(points)
+        filled = np.where(missing, 0.0, points)
+        order = np.arange(len(filled))
+
+        # Split at the median of the widest dimension until the blocks are leaf-sized;
+        # only the leaves (row range in tree order and bounding box) are kept
+        starts, ends, lows, highs = [], [], [], []
+        stack = [(0, len(filled))] if len(filled) else []
+        while stack:
+            start, end = stack.pop()
+            block = filled[order[start:end]]
+            low, high = block.min(axis=0), block.max(axis=0)
+            spread = high - low
+            if end - start <= self.leaf_size or not spread.any():
+                starts.append(start)
+                ends.append(end)
+                lows.append(low)
+                highs.append(high)
+                continue
+            dim = int(np.argmax(spread))
+            middle = (end - start) // 2
+            order[start:end] = order[start:end][np.argpartition(block[:, dim], middle)]
+            stack.append((start + middle, end))
+            stack.append((start, start + middle))
+
+        self._order = order  # Tree position -> row position
+        self._tree_position = np.empty_like(order)
+        self._tree_position[order] = np.arange(len(order))
+        self._points = filled[order]
+        self._missing = missing[order]
+        self._any_missing = self._missing.any(axis=1)
+        self._starts = np.array(starts, dtype=int)
+        self._ends = np.array(ends, dtype=int)
+        # Bounding boxes are stored per dimension: (dims, leaves)
+        self._lows = np.array(lows).reshape(len(starts), filled.shape[1]).T.copy()
+        self._highs = np.array(highs).reshape(len(starts), filled.shape[1]).T.copy()
+        self._tree_rows = len(filled)
+        self._buffer = np.zeros((0, filled.shape[1]))
+        self._buffer_missing = np.zeros((0, filled.shape[1]), dtype=bool)
+
+    def extend(self, df):
+        """Index the rows appended to the table since the index was built.
+
+        ``df`` must start with the rows the index already holds. New rows
+        are searched brute-force until there are enough of them to make a
+        rebuild worthwhile. The normalization is kept from the build.
+        """
+        new_points = self._normalize(self._raw_values(df.iloc[len(self.df):]))
+        self.df = df
+        if len(df) - self._tree_rows > max(MIN_REBUILD_BUFFER, self._tree_rows // 16):
+            self._build(self._normalize(self._raw_values(df)))
+            return
+        self._buffer = np.vstack([self._buffer, np.nan_to_num(new_points)])
+        self._buffer_missing = np.vstack([self._buffer_missing, np.isnan(new_points)])
+
+    # --------- Queries ---------
+    def _weights(self, weights, missing):
+        weight = np.array([1.0 if weights is None else float(weights.get(c, 1.0)) for c in self.columns])
+        if (weight < 0).any():
+            raise ValueError("Weights must not be negative")
+        weight[missing] = 0.0
+        if not weight.any():
+            raise ValueError("Give a target value with a non-zero weight for at least one property")
+        return weight
+
+    def _distances(self, points, missing, any_missing, query, weight):
+        squared = (points - query) ** 2
+        if any_missing.any():
+            squared = np.where(missing, np.maximum(squared, MISSING_PENALTY), squared)
+        return squared @ weight
+
+    def _leaf_rows(self, leaves):
+        # Tree positions of every row of ``leaves``, concatenated
+        starts, ends = self._starts[leaves], self._ends[leaves]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return offsets + np.arange(lengths.sum())
+
+    def _search(self, query, weight, k, excluded):
+        """Return ``(row positions, squared distances)`` of the ``k`` nearest rows, closest first."""
+        wanted = k + len(excluded)
+        distances = [np.zeros(0)]
+        rows = [np.zeros(0, dtype=int)]
+
+        def score(positions):
+            distances.append(self._distances(self._points[positions], self._missing[positions],
+                                             self._any_missing[positions], query, weight))
+            rows.append(self._order[positions])
+
+        if len(self._buffer):
+            distances.append(self._distances(self._buffer, self._buffer_missing,
+                                             self._buffer_missing.any(axis=1), query, weight))
+            rows.append(np.arange(self._tree_rows, self._tree_rows + len(self._buffer)))
+
+        if self._tree_rows:
+            # Lower bound of the distance to any row of each leaf, one weighted dimension at a time
+            bounds = np.zeros(len(self._starts))
+            for dim in np.flatnonzero(weight):
+                gap = np.clip(query[dim], self._lows[dim], self._highs[dim])
+                gap -= query[dim]
+                gap *= gap
+                gap *= weight[dim]
+                bounds += gap
+            # The closest few leaves give an upper bound for the k-th distance ...
+            first = min(len(bounds), max(4, 2 * -(-wanted // self.leaf_size)))
+            seeds = np.argpartition(bounds, first - 1)[:first]
+            score(self._leaf_rows(seeds))
+            found = np.concatenate(distances)
+            # ... and only leaves that could beat it need scoring
+            if len(found) >= wanted:
+                kth = np.partition(found, wanted - 1)[wanted - 1]
+                candidates = bounds <= kth
+            else:
+                candidates = np.ones(len(bounds), dtype=bool)
+            candidates[seeds] = False
+            if candidates.any():
+                score(self._leaf_rows(np.flatnonzero(candidates)))
+
+        distances = np.concatenate(distances)
+        rows = np.concatenate(rows)
+        if len(excluded):
+            kept = ~np.isin(rows, excluded)
+            distances, rows = distances[kept], rows[kept]
+        if len(distances) > k:
+            top = np.argpartition(distances, k - 1)[:k]
+            # Ties at the k-th distance are broken by row position, as a full sort would
+            top = np.flatnonzero(distances <= distances[top].max())
+            distances, rows = distances[top], rows[top]
+        ranked = np.lexsort((rows, distances))[:k]
+        return rows[ranked], distances[ranked]
+
+    def _point(self, position):
+        # Copies of the normalized values and missing flags of the row at ``position``
+        if position < self._tree_rows:
+            tree_position = self._tree_position[position]
+            return self._points[tree_position].copy(), self._missing[tree_position].copy()
+        return self._buffer[position - self._tree_rows].copy(), self._buffer_missing[position - self._tree_rows].copy()
+
+    def values(self, label):
+        """Return ``{column: value}`` of the compared properties of row ``label``, None where missing."""
+        point, missing = self._point(self.df.index.get_loc(label))
+        raw = point * self.scale + self.center
+        return {column: None if missing[i] else float(raw[i]) for i, column in enumerate(self.columns)}
+
+    def query(self, target, k=DEFAULT_K, weights=None, exclude=()):
+        """Return ``(labels, distances)`` of the ``k`` rows closest to ``target``.
+
+        ``target`` maps column names to values in table units; columns that
+        are absent or None are not compared. ``weights`` maps column names
+        to non-negative weights (default 1). Rows whose index label is in
+        ``exclude`` are skipped. Distances are weighted Euclidean distances
+        in IQR units, closest first.
+        Raises ``ValueError`` when no weighted target value is given.
+        """
+        values = np.array([np.nan if target.get(c) is None else float(target[c]) for c in self.columns])
+        weight = self._weights(weights, np.isnan(values))
+        excluded = self.df.index.get_indexer(list(exclude)) if len(exclude) else np.zeros(0, dtype=int)
+        rows, distances = self._search(np.nan_to_num(self._normalize(values)), weight, k, excluded[excluded >= 0])
+        return self.df.index[rows], np.sqrt(distances)
+
+    def like(self, label, k=DEFAULT_K, weights=None, changes=None):
+        """Return ``query`` results for the materials closest to row ``label`` (excluding itself).
+
+        Properties the row lacks are not compared. ``changes`` overrides
+        some of its values, e.g. ``{"UTS": 600}`` for "like this one, with
+        a bit more UTS".
+        """
+        position = self.df.index.get_loc(label)
+        query, missing = self._point(position)
+        for column, value in (changes or {}).items():
+            i = self.columns.index(column)
+            missing[i] = value is None
+            query[i] = 0.0 if value is None else (float(value) - self.center[i]) / self.scale[i]
+        rows, distances = self._search(query, self._weights(weights, missing), k, np.array([position]))
+        return self.df.index[rows], np.sqrt(distances)
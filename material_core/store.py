@@ -0,0 +1,107 @@
+"""Typed, columnar access to the rows of a material table.
+
+``MaterialStore`` keeps one array per column of a table (the frame's own
+arrays, not copies) and answers row lookups by index label, which is also
+the row's Treeview item ID (as text). ``MaterialRecord`` is a small view of
+one row: it holds only the store and a row position, and reads typed
+values (float/int, str or None) straight from the column arrays, so
+looking up the selection never goes through the widget or builds a
+DataFrame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .lean import float_value
+
+
+class MaterialRecord:
+    """One row of a ``MaterialStore``; values are Python numbers, str or None."""
+
+    __slots__ = ("store", "position")
+
+    def __init__(self, store, position):
+        self.store = store
+        self.position = position
+
+    @property
+    def label(self):
+        return self.store.labels[self.position]
+
+    @property
+    def item_id(self):
+        return str(self.label)
+
+    def __getitem__(self, column):
+        return self.store.value(self.position, column)
+
+    def get(self, column, default=None):
+        if column not in self.store.columns:
+            return default
+        return self.store.value(self.position, column)
+
+    def to_dict(self):
+        """Return the row as a ``column -> value`` dict."""
+        return {column: self.store.value(self.position, column) for column in self.store.columns}
+
+    def __repr__(self):
+        return f"MaterialRecord({self.label!r}, {self.get('Material')!r})"
+
+
+class MaterialStore:
+    """Column arrays of ``frame`` addressed by row label or position.
+
+    Building a store copies nothing; it must be rebuilt when the table is
+    replaced (every edit produces a new frame).
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.labels = frame.index
+        self.columns = list(frame.columns)
+        # Numeric columns as NumPy arrays, the rest as the frame's own (e.g. Arrow string) arrays
+        self._arrays = {column: frame[column].to_numpy() if pd.api.types.is_numeric_dtype(frame[column])
+                        else frame[column].array for column in self.columns}
+        self._numeric = {column for column in self.columns if isinstance(self._arrays[column], np.ndarray)}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __contains__(self, label):
+        return label in self.labels
+
+    def value(self, position, column):
+        value = self._arrays[column][position]
+        if pd.isna(value):
+            return None
+        if isinstance(value, np.float32):
+            return float_value(value)
+        return value.item() if column in self._numeric else value
+
+    def position(self, label):
+        """Row position of ``label``; raises ``KeyError`` if it is not in the table."""
+        return self.labels.get_loc(label)
+
+    def record(self, label):
+        return MaterialRecord(self, self.position(label))
+
+    def records(self, labels):
+        """Return the records of ``labels``, in order; raises ``KeyError`` for unknown labels."""
+        positions = self.labels.get_indexer(list(labels))
+        if (positions < 0).any():
+            raise KeyError([label for label, position in zip(labels, positions) if position < 0])
+        return [MaterialRecord(self, position) for position in positions.tolist()]
+
+    def item_label(self, item_id):
+        """Return the row label of the Treeview item ``item_id`` (the label as text)."""
+        if pd.api.types.is_integer_dtype(self.labels):
+            return int(item_id)
+        return item_id
+
+    def record_for_item(self, item_id):
+        return self.record(self.item_label(item_id))
+
+    def rows(self, positions):
+        """Return the raw values of the rows at ``positions`` as tuples, for display."""
+        positions = np.asarray(positions)
+        return list(zip(*(self._arrays[column][positions] for column in self.columns)))
@@ -0,0 +1,129 @@
+"""Live reload of the data source.
+
+``SourceWatcher`` notices when the workbook (or any source in a folder)
+changes on disk, and ``reconcile`` lines a freshly parsed table up with the
+one in memory by ``material_keys``. Rows of the same material keep their
+index label across reloads, so the table's selection and the derived
+property cache carry over and only the rows that actually changed need to
+be redrawn or recomputed.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .data import material_keys
+from .lean import float_values
+
+# The GUI checks the source for changes this often
+POLL_INTERVAL_MS = 2000
+
+
+def source_signature(path):
+    """Return a value that changes whenever the source at ``path`` changes.
+
+    For a folder this covers every workbook and CSV file in it. Returns
+    None when the source does not exist (for example mid-save).
+    """
+    try:
+        if not os.path.isdir(path):
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        entries = []
+        for entry in sorted(os.scandir(path), key=lambda e: e.name):
+            if entry.name.lower().endswith(('.xlsx', '.csv')) and not entry.name.startswith(('.', '~')):
+                stat = entry.stat()
+                entries.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+    except OSError:
+        return None
+
+
+class SourceWatcher:
+    """Polls a workbook or folder for changes.
+
+    A change is only reported once the signature has been the same for two
+    polls in a row, so a file that is still being written is not read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.seen = source_signature(path)
+        self._candidate = None
+
+    def changed(self):
+        """Return the new signature if the source changed, else None."""
+        signature = source_signature(self.path)
+        if signature is None or signature == self.seen:
+            self._candidate = None
+            return None
+        if signature != self._candidate:
+            self._candidate = signature
+            return None
+        return signature
+
+    def acknowledge(self, signature=None):
+        """Mark ``signature`` (default: the current state) as already loaded."""
+        self.seen = source_signature(self.path) if signature is None else signature
+        self._candidate = None
+
+
+class TableDiff:
+    """Index labels of the rows a reload added, changed and removed."""
+
+    def __init__(self, added, updated, deleted):
+        self.added = added
+        self.updated = updated
+        self.deleted = deleted
+
+    def __bool__(self):
+        return bool(len(self.added) or len(self.updated) or len(self.deleted))
+
+    def __str__(self):
+        return f"{len(self.added):,} added, {len(self.updated):,} updated, {len(self.deleted):,} deleted"
+
+
+def _same_values(old, new):
+    # Element-wise equality of two equally shaped frames, NaN == NaN
+    same = np.ones(len(new), dtype=bool)
+    for column in new.columns:
+        if np.float32 in (old[column].dtype, new[column].dtype):
+            a, b = float_values(old[column]), float_values(new[column])
+        else:
+            a, b = old[column].to_numpy(), new[column].to_numpy()
+        same &= (a == b) | (pd.isna(a) & pd.isna(b))
+    return same
+
+
+def reconcile(old, new):
+    """Return ``(table, diff)`` for reloading ``old`` with the contents of ``new``.
+
+    ``table`` holds the rows of ``new`` in its order, labelled with the
+    index labels of the matching ``old`` rows; rows without a match get
+    fresh labels after the largest old one. When nothing changed ``old``
+    itself is returned.
+    """
+    lookup = material_keys(old).get_indexer(material_keys(new))
+    matched = lookup >= 0
+    next_label = int(old.index.max()) + 1 if len(old) else 0
+    fresh = next_label + np.cumsum(~matched) - 1
+    labels = np.where(matched, old.index.to_numpy()[lookup.clip(0)], fresh)
+
+    table = new.copy()
+    table.index = pd.Index(labels)
+    deleted = old.index.delete(lookup[matched]) if matched.any() else old.index
+    added = table.index[~matched]
+
+    kept = table.index[matched]
+    if set(old.columns) == set(new.columns):
+        same = _same_values(old.loc[kept], table.loc[kept])
+        updated = kept[~same]
+    else:
+        updated = kept
+    diff = TableDiff(added, updated, deleted)
+
+    # A pure reorder of unchanged rows still needs the new order
+    if not diff and old.index.equals(table.index):
+        return old, diff
+    return table, diff
@@ -0,0 +1,123 @@
+"""Background task scheduler for long-running operations.
+
+Work runs on a thread pool; everything a task reports (progress, result,
+error) is put on a queue that the owning thread drains with ``poll``. The
+GUI calls ``poll`` from ``root.after``, so task callbacks -- and therefore
+every widget update -- run on the Tk main thread.
+"""
+
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task that noticed it was cancelled."""
+
+
+class Task:
+    """Handle of a submitted task, passed to the task function as ``task``."""
+
+    def __init__(self, task_id, name, scheduler, cancellable):
+        self.id = task_id
+        self.name = name
+        self.cancellable = cancellable
+        self.done = 0
+        self.total = 0
+        self.finished = False
+        self._scheduler = scheduler
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Ask the task to stop at its next ``check_cancelled``/``cancelled`` call."""
+        if self.cancellable:
+            self._cancel_event.set()
+
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Raise ``TaskCancelled`` if the task was cancelled."""
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report(self, done, total):
+        """Report progress; may be called from the worker thread."""
+        self._scheduler._results.put(("progress", self, (done, total)))
+
+
+class TaskScheduler:
+    """Runs functions on a thread pool and delivers their outcome via ``poll``."""
+
+    def __init__(self, max_workers=4):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self._results = queue.Queue()
+        self._ids = itertools.count(1)
+        self._callbacks = {}
+        self.tasks = {}  # Running tasks by ID, in submission order
+
+    def submit(self, name, fn, *args, on_done=None, on_error=None, on_progress=None, on_cancel=None,
+               cancellable=True, **kwargs):
+        """Run ``fn(*args, task=task, **kwargs)`` in the background and return the ``Task``.
+
+        The callbacks are invoked from ``poll``: ``on_done(result)``,
+        ``on_error(exception)``, ``on_progress(task)`` and ``on_cancel()``.
+        """
+        task = Task(next(self._ids), name, self, cancellable)
+        self.tasks[task.id] = task
+        self._callbacks[task.id] = (on_done, on_error, on_progress, on_cancel)
+
+        def run():
+            try:
+                result = fn(*args, task=task, **kwargs)
+            except TaskCancelled:
+                self._results.put(("cancelled", task, None))
+            except Exception as e:
+                self._results.put(("error", task, e))
+            else:
+                if task.cancelled():
+                    self._results.put(("cancelled", task, None))
+                else:
+                    self._results.put(("done", task, result))
+
+        self._pool.submit(run)
+        return task
+
+    def poll(self):
+        """Deliver queued task events to their callbacks; returns True while tasks are running."""
+        while True:
+            try:
+                kind, task, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            on_done, on_error, on_progress, on_cancel = self._callbacks.get(task.id, (None,) * 4)
+            if kind == "progress":
+                task.done, task.total = payload
+                if on_progress is not None:
+                    on_progress(task)
+                continue
+
+            task.finished = True
+            self.tasks.pop(task.id, None)
+            self._callbacks.pop(task.id, None)
+            if kind == "done" and on_done is not None:
+                on_done(payload)
+            elif kind == "error":
+                if on_error is None:
+                    raise payload
+                on_error(payload)
+            elif kind == "cancelled" and on_cancel is not None:
+                on_cancel()
+
+        return bool(self.tasks)
+
+    def running(self, name):
+        """Return True if a task called ``name`` is still running."""
+        return any(task.name == name for task in self.tasks.values())
+
+    def shutdown(self, wait=True):
+        for task in self.tasks.values():
+            task.cancel()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,313 @@
+"""Solver deck writers (Abaqus .inp, Nastran .bdf).
+
+Each solver format is a ``MaterialWriter`` registered in ``WRITERS``. A
+writer renders whole chunks of materials at once: numeric fields are
+formatted column-wise with NumPy and only the final per-material string
+assembly loops in Python. ``write`` streams the chunks into a buffered file
+handle, so the size of a combined deck does not affect memory use.
+
+FEMFAT (.ffj) has no writer yet: it needs the FEMFAT material database
+format and files exported from FEMFAT to test against. A writer for it
+registers like the others, with ``register_writer``.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .curves import DEFAULT_POINTS, curve_cache
+from .derived import DERIVED_PROPERTIES, derived_frame, source_values
+from .lean import float_values
+
+# Materials rendered per chunk when streaming a deck
+CHUNK_SIZE = 4096
+
+# Buffer size of the file handles opened by write_deck
+BUFFER_SIZE = 1 << 20
+
+# Writer name -> writer instance
+WRITERS = {}
+
+
+def register_writer(writer_class):
+    """Class decorator adding an instance of ``writer_class`` to ``WRITERS``."""
+    WRITERS[writer_class.name] = writer_class()
+    return writer_class
+
+
+def get_writer(name):
+    """Return the registered writer called ``name``; raises ``KeyError`` if unknown."""
+    return WRITERS[name]
+
+
+def _column(frame, column, default=np.nan):
+    if column in frame.columns:
+        return frame[column]
+    return pd.Series(default, index=frame.index)
+
+
+def _numbers(frame, column, missing=np.nan):
+    # Column as a float array, non-numeric values replaced by ``missing``
+    values = float_values(_column(frame, column))
+    return np.where(np.isnan(values), missing, values)
+
+
+# Stands for the material ID in block templates (see ``MaterialWriter.templates``); workbook cells cannot hold it
+ID_MARK = "\x00"
+
+
+class _IdSlot:
+    # Rendered in place of a material ID: leaves its format spec between two ID_MARKs
+    def __format__(self, spec):
+        return f"{ID_MARK}{spec}{ID_MARK}"
+
+
+ID_SLOT = _IdSlot()
+
+
+def _ids(frame, first_id):
+    # Material IDs of the rows of ``frame``: consecutive from ``first_id``, or given one per row
+    if np.ndim(first_id):
+        return np.asarray(first_id).tolist()
+    return range(first_id, first_id + len(frame))
+
+
+def _fmt(spec, values):
+    # Column-wise printf-style formatting of a float array
+    return np.char.mod(spec, values).tolist()
+
+
+class MaterialWriter:
+    """Base class of the solver format writers."""
+
+    name = None  # Registry key, also the file extension
+    description = None  # Shown in file dialogs
+    # Bump whenever the output of ``render`` changes, so cached exports are rendered again
+    version = 1
+    # Materials skipped by ``render`` are reported with this message
+    missing_data_message = "Not enough data to write this material."
+
+    def file_name(self, material_name):
+        return f"{material_name.replace(' ', '_')}.{self.name}"
+
+    def combined_file_name(self):
+        return f"materials.{self.name}"
+
+    def with_hardening(self, model, points=DEFAULT_POINTS):
+        """Return a writer whose plastic tables follow the hardening ``model`` (see ``curves``).
+
+        Formats without a plastic table return themselves.
+        """
+        return self
+
+    def cache_key(self):
+        """Identify the writer's output for the export cache: format, version and settings."""
+        return f"{self.name}/{self.version}"
+
+    def render(self, frame, derived=None, first_id=1):
+        """Return one block of text per row of ``frame`` (None for rows that cannot be written).
+
+        ``derived`` is the frame of derived properties for the same rows;
+        it is calculated when omitted. Rows get consecutive material IDs
+        starting at ``first_id``, or the IDs in ``first_id`` if it is a
+        sequence with one ID per row.
+        """
+        raise NotImplementedError
+
+    def templates(self, frame, derived=None):
+        """Return ``render`` output with the material IDs left open (None for rows that cannot be written).
+
+        A template is a tuple alternating text and the format specs of the
+        IDs; ``fill_id`` turns it into the block of any material ID. Writers
+        only use IDs through f-string format specs, so a filled template is
+        the block ``render`` would return for that ID.
+        """
+        blocks = self.render(frame, derived, first_id=[ID_SLOT] * len(frame))
+        return [None if block is None else tuple(block.split(ID_MARK)) for block in blocks]
+
+    @staticmethod
+    def fill_id(template, material_id):
+        """Return the block of ``template`` (see ``templates``) with ``material_id`` filled in."""
+        parts = list(template)
+        parts[1::2] = [format(material_id, spec) for spec in template[1::2]]
+        return "".join(parts)
+
+    def content(self, row, derived=None, material_id=1):
+        """Return the text for one material row (a column -> value mapping).
+
+        ``derived`` is the ``(values, errors)`` pair of the row as returned
+        by ``DerivedCache.values``. Raises ``ValueError`` if the row cannot
+        be written.
+        """
+        frame = pd.DataFrame([row])
+        derived_rows = None
+        if derived is not None:
+            values, _ = derived
+            derived_rows = pd.DataFrame([{key: np.nan if values[key] is None else values[key]
+                                          for key in DERIVED_PROPERTIES}])
+        block = self.render(frame, derived_rows, first_id=material_id)[0]
+        if block is None:
+            raise ValueError(f"{self.missing_data_message} ({row.get('Material', 'N/A')})")
+        return block
+
+    def write(self, f, frame, derived=None, first_id=1, chunk_size=CHUNK_SIZE):
+        """Stream every row of ``frame`` into the open file ``f``.
+
+        Returns the positions (within ``frame``) of the rows that were skipped.
+        """
+        skipped = []
+        for start in range(0, len(frame), chunk_size):
+            chunk = frame.iloc[start:start + chunk_size]
+            chunk_derived = None if derived is None else derived.iloc[start:start + chunk_size]
+            blocks = self.render(chunk, chunk_derived, first_id=first_id + start)
+            f.writelines(block for block in blocks if block is not None)
+            skipped.extend(start + i for i, block in enumerate(blocks) if block is None)
+        return skipped
+
+
+def write_deck(path, writer_name, frame, derived=None):
+    """Write all rows of ``frame`` as one include deck; returns the skipped row positions."""
+    with open(path, "w", buffering=BUFFER_SIZE) as f:
+        return get_writer(writer_name).write(f, frame, derived)
+
+
+@register_writer
+class InpWriter(MaterialWriter):
+    """Abaqus ``*MATERIAL`` blocks with a ``*PLASTIC`` table.
+
+    The table has the three points yield, true yield and true UTS unless a
+    ``hardening`` model is set, in which case it is the ``points``-point
+    table of that model from ``curves.curve_cache``.
+    """
+
+    name = "inp"
+    description = "INP files"
+    missing_data_message = "Not enough data to build the *PLASTIC table"
+
+    def __init__(self, hardening=None, points=DEFAULT_POINTS):
+        self.hardening = hardening
+        self.points = points
+        if hardening:
+            self.missing_data_message = (f"Cannot fit the {hardening} curve (needs UTS above the yield strength "
+                                         "and a positive plastic strain at UTS)")
+
+    def file_name(self, material_name):
+        return f"NL_{material_name.replace(' ', '_')}.inp"
+
+    def with_hardening(self, model, points=DEFAULT_POINTS):
+        return InpWriter(model, points)
+
+    def cache_key(self):
+        key = super().cache_key()
+        return f"{key}/{self.hardening}/{self.points}" if self.hardening else key
+
+    def _plastic_tables(self, frame):
+        # One "*PLASTIC" data block per row from the hardening model, None where it cannot be fitted
+        stress, plastic, valid = curve_cache.tables(source_values(frame), self.hardening, self.points)
+        stress_text = np.char.mod('%.2f', stress).tolist()
+        plastic_text = np.char.mod('%.5f', plastic).tolist()
+        return [
+            "".join(f"{s}\t  ,{p}   ,0.0\n" for s, p in zip(row_stress, row_plastic)) if ok else None
+            for row_stress, row_plastic, ok in zip(stress_text, plastic_text, valid.tolist())
+        ]
+
+    def render(self, frame, derived=None, first_id=1):
+        if derived is None:
+            derived = derived_frame(frame)
+
+        youngs_modulus = _numbers(frame, 'Youngs modulus')
+        percent_elongation = _numbers(frame, '%EL')
+        yield_strength = _numbers(frame, 'Yield strength')
+        at_yield_true_stress = derived['at_yield_true_stress'].to_numpy(dtype=float)
+        at_yield_true_strain = derived['at_yield_true_strain'].to_numpy(dtype=float)
+        at_uts_true_stress = derived['at_uts_true_stress'].to_numpy(dtype=float)
+        plastic_strain_at_uts = derived['plastic_strain_at_uts'].to_numpy(dtype=float)
+
+        valid = ~np.isnan(np.vstack([youngs_modulus, percent_elongation, yield_strength, at_yield_true_stress,
+                                     at_yield_true_strain, at_uts_true_stress, plastic_strain_at_uts])).any(axis=0)
+
+        names = _column(frame, 'Material', 'N/A').astype(str).tolist()
+        densities = _column(frame, 'Density', 'N/A').astype(str).tolist()
+        if self.hardening:
+            tables = self._plastic_tables(frame)
+        else:
+            tables = [f"{yield_stress}	  ,0.00000   ,0.0\n"
+                      f"{yield_true_stress}	  ,{yield_true_strain}   ,0.0\n"
+                      f"{uts_true_stress}	  ,{uts_plastic_strain}   ,0.0\n"
+                      for yield_stress, yield_true_stress, yield_true_strain, uts_true_stress, uts_plastic_strain
+                      in zip(_fmt('%.2f', yield_strength), _fmt('%.2f', at_yield_true_stress),
+                             _fmt('%.5f', at_yield_true_strain), _fmt('%.2f', at_uts_true_stress),
+                             _fmt('%.5f', plastic_strain_at_uts))]
+        columns = zip(
+            _ids(frame, first_id), names, densities,
+            youngs_modulus.astype(str).tolist(), (percent_elongation / 100.00).astype(str).tolist(),
+            tables, valid.tolist(),
+        )
+        return [
+            (f"**\n"
+             f"**HMNAME MATS {material_id:>10} {name}     3\n"
+             f"*MATERIAL, NAME={name}\n"
+             f"DENSITY\n"
+             f"{density},0.0 \n"
+             f"*ELASTIC, TYPE = ISOTROPIC\n"
+             f"{modulus}  ,{elongation}      ,0.0 \n"
+             f"*PLASTIC\n"
+             f"{table}"
+             f"*****\n") if ok and table is not None else None
+            for material_id, name, density, modulus, elongation, table, ok in columns
+        ]
+
+
+@register_writer
+class BdfWriter(MaterialWriter):
+    """Nastran ``MAT1`` cards in small (8-character) field format."""
+
+    name = "bdf"
+    description = "BDF files"
+
+    def render(self, frame, derived=None, first_id=1):
+        youngs_modulus = _numbers(frame, "Youngs modulus", 0.0)
+        poissons_ratio = _numbers(frame, "Poissons ratio", 0.0)
+        density = _numbers(frame, "Density", 0.0)
+
+        # Nastran exponent notation drops the 'e': 1.12e+09 -> 1.12+09
+        bdf_density = np.char.replace(np.char.mod('%.2e', density), 'e', '').tolist()
+        names = _column(frame, 'Material', 'UNKNOWN').astype(str).tolist()
+        columns = zip(_ids(frame, first_id), names, _fmt('%-10.1f', youngs_modulus),
+                      _fmt('%-6.2f', poissons_ratio), bdf_density)
+        return [
+            f'$HMNAME MAT {material_id:>20}"{name}" "MAT1"\n'
+            f"$HWCOLOR MAT {material_id:>19}       3\n"
+            f"MAT1    {material_id:<8}{modulus}      {poisson}  {rho}\n"
+            f"$2345678$2345678$2345678$2345678$2345678$2345678\n"
+            f"| material name |  ID(1)   |  Young's modulus| blank | poissons ratio|density|\n"
+            for material_id, name, modulus, poisson, rho in columns
+        ]
+
+
+def inp_filename(material_name):
+    return WRITERS["inp"].file_name(material_name)
+
+
+def bdf_filename(material_name):
+    return WRITERS["bdf"].file_name(material_name)
+
+
+def inp_content(row, derived=None, material_id=1):
+    """Return the Abaqus ``*MATERIAL`` block for one material row.
+
+    ``material_id`` is the HyperMesh material ID written to the header.
+    ``derived`` is the ``(values, errors)`` pair of the row, as returned by
+    ``DerivedCache.values``; it is calculated from ``row`` when omitted.
+    Raises ``ValueError`` if the properties needed for the ``*PLASTIC``
+    table are missing or not numeric.
+    """
+    return WRITERS["inp"].content(row, derived, material_id)
+
+
+def bdf_content(row, material_id=1):
+    """Return the Nastran ``MAT1`` card for one material row.
+
+    ``material_id`` is the MID of the card, which must be unique within a
+    combined deck.
+    """
+    return WRITERS["bdf"].content(row, material_id=material_id)
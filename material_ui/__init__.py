@@ -0,0 +1,6 @@
+"""Tk widgets used by the Material Manager GUI."""
+
+from .status_bar import TaskStatusBar
+from .virtual_tree import VirtualTreeview
+
+__all__ = ["TaskStatusBar", "VirtualTreeview"]
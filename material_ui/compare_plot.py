@@ -0,0 +1,133 @@
+"""Stress-strain comparison window for any number of materials.
+
+One Figure and canvas are created the first time a comparison is opened
+and reused for every later comparison; closing the window only hides it.
+All curves are drawn as a single ``LineCollection``, and highlighting a
+curve or toggling the legend is blitted over a cached background instead
+of redrawing the whole figure.
+
+The figure is a plain ``matplotlib.figure.Figure`` rather than a pyplot
+figure, so nothing is registered with pyplot's figure manager and repeated
+comparisons do not accumulate figures.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+# Up to this many curves get a legend entry each
+MAX_LEGEND_ENTRIES = 15
+
+
+class ComparisonPlot:
+    """Persistent stress-strain overlay window."""
+
+    def __init__(self, master):
+        self.master = master
+        self.window = tk.Toplevel(master)
+        self.window.title("Stress-Strain Curve Comparison")
+        self.window.geometry("1000x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.window.withdraw)
+
+        # Material list on the right; selecting an entry highlights its curve
+        side_frame = ttk.Frame(self.window, padding=5)
+        side_frame.pack(side='right', fill='y')
+        self.legend_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(side_frame, text="Show legend", variable=self.legend_var,
+                        command=self._blit_overlays).pack(anchor='w')
+        self.listbox = tk.Listbox(side_frame, width=30, exportselection=False)
+        self.listbox.pack(fill='y', expand=True, pady=(5, 0))
+        self.listbox.bind('<<ListboxSelect>>', self._on_list_select)
+
+        self.figure = Figure(figsize=(8, 5))
+        self.ax = self.figure.add_subplot()
+        self.ax.set_title("Stress-Strain Comparison")
+        self.ax.set_xlabel("Strain")
+        self.ax.set_ylabel("Stress (MPa)")
+        self.ax.grid(True)
+
+        self.lines = LineCollection([], linewidths=2)
+        self.ax.add_collection(self.lines)
+        # Drawn only through blitting, on top of the cached background
+        self.highlight, = self.ax.plot([], [], color='black', linewidth=4, animated=True)
+        self.legend = None
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+        self.names = []
+        self.points = np.zeros((0, 3, 2))
+        self._background = None
+        self._highlighted = None
+
+    def show(self, names, points):
+        """Replace the plotted curves with ``points`` (an ``(n, k, 2)`` array) named ``names``."""
+        self.names = list(names)
+        self.points = points
+        self._highlighted = None
+
+        if len(names) <= 10:
+            colors = colormaps['tab10'](np.arange(len(names)))
+        else:
+            colors = colormaps['turbo'](np.linspace(0, 1, len(names)))
+        self.lines.set_segments(list(points))
+        self.lines.set_color(colors)
+
+        if self.legend is not None:
+            self.legend.remove()
+            self.legend = None
+        if 0 < len(names) <= MAX_LEGEND_ENTRIES:
+            handles = [Line2D([], [], color=color, linewidth=2) for color in colors]
+            self.legend = self.ax.legend(handles, self.names, loc='lower right')
+            self.legend.set_animated(True)
+
+        if len(points):
+            self.ax.set_xlim(0, np.nanmax(points[:, :, 0]) * 1.05 or 1)
+            self.ax.set_ylim(0, np.nanmax(points[:, :, 1]) * 1.05 or 1)
+        self.ax.set_title(f"Stress-Strain Comparison ({len(names)} materials)")
+
+        self.listbox.delete(0, 'end')
+        self.listbox.insert('end', *self.names)
+
+        self.window.deiconify()
+        self.window.lift()
+        self.canvas.draw_idle()
+
+    def highlight_curve(self, index):
+        """Highlight the curve at ``index`` (None clears the highlight)."""
+        self._highlighted = index
+        self._blit_overlays()
+
+    def destroy(self):
+        self.window.destroy()
+
+    def _on_list_select(self, event):
+        selection = self.listbox.curselection()
+        self.highlight_curve(selection[0] if selection else None)
+
+    def _on_draw(self, event):
+        # Cache everything except the animated overlays, then draw the overlays on top
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_overlays()
+
+    def _draw_overlays(self):
+        if self._highlighted is not None and self._highlighted < len(self.points):
+            curve = self.points[self._highlighted]
+            self.highlight.set_data(curve[:, 0], curve[:, 1])
+            self.ax.draw_artist(self.highlight)
+        if self.legend is not None and self.legend_var.get():
+            self.ax.draw_artist(self.legend)
+
+    def _blit_overlays(self):
+        if self._background is None:
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_overlays()
+        self.canvas.blit(self.figure.bbox)
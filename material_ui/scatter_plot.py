@@ -0,0 +1,172 @@
+"""Whole-database property scatter explorer (Ashby-style).
+
+Every row of the table is plotted against two numeric properties. The
+points are drawn as a single collection that is resampled with
+``ScatterData.sample`` whenever the view changes, so the plot stays
+responsive with a million rows: zoomed out, each marker stands for a grid
+cell and is coloured by how many rows it holds; zoomed in, the markers are
+the individual rows.
+
+Dragging a rectangle brushes the rows inside it and passes their index
+labels to ``on_brush``; ``highlight`` marks rows selected elsewhere (the
+main table) by the same labels.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+from matplotlib.widgets import RectangleSelector
+
+from material_core.scatter import ScatterData
+from material_core.schema import NUMERIC_COLUMNS
+
+
+class ScatterExplorer:
+    """Persistent scatter explorer window over the whole material table."""
+
+    def __init__(self, master, on_brush=None, x_column='Density', y_column='UTS'):
+        self.master = master
+        self.on_brush = on_brush
+        self.window = tk.Toplevel(master)
+        self.window.title("Material Property Explorer")
+        self.window.geometry("900x650")
+        self.window.protocol("WM_DELETE_WINDOW", self.window.withdraw)
+
+        controls = ttk.Frame(self.window, padding=5)
+        controls.pack(side='top', fill='x')
+        self.x_var = tk.StringVar(value=x_column)
+        self.y_var = tk.StringVar(value=y_column)
+        self.log_var = tk.BooleanVar(value=True)
+        ttk.Label(controls, text="X:").pack(side='left')
+        x_combo = ttk.Combobox(controls, textvariable=self.x_var, values=NUMERIC_COLUMNS,
+                               state='readonly', width=20)
+        x_combo.pack(side='left', padx=(2, 10))
+        ttk.Label(controls, text="Y:").pack(side='left')
+        y_combo = ttk.Combobox(controls, textvariable=self.y_var, values=NUMERIC_COLUMNS,
+                               state='readonly', width=20)
+        y_combo.pack(side='left', padx=(2, 10))
+        ttk.Checkbutton(controls, text="Log scale", variable=self.log_var,
+                        command=self.reset_view).pack(side='left')
+        x_combo.bind('<<ComboboxSelected>>', lambda event: self._change_axes())
+        y_combo.bind('<<ComboboxSelected>>', lambda event: self._change_axes())
+        self.status_var = tk.StringVar()
+        ttk.Label(controls, textvariable=self.status_var).pack(side='right')
+
+        self.figure = Figure(figsize=(8, 6))
+        self.ax = self.figure.add_subplot()
+        self.ax.grid(True, which='both', alpha=0.3)
+        self.points = self.ax.scatter([], [], s=8, c=[], cmap='viridis', norm=LogNorm(vmin=1, vmax=2),
+                                      linewidths=0)
+        self.highlighted = self.ax.scatter([], [], s=40, facecolors='none', edgecolors='red', linewidths=1.5)
+        self.colorbar = None
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=self.window)
+        toolbar = NavigationToolbar2Tk(self.canvas, self.window, pack_toolbar=False)
+        toolbar.pack(side='bottom', fill='x')
+        self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        # Left-drag brushes rows; the toolbar's zoom/pan modes take over while active
+        self.selector = RectangleSelector(self.ax, self._on_select, useblit=True, button=[1],
+                                          minspanx=0, minspany=0, spancoords='pixels')
+        self.ax.callbacks.connect('xlim_changed', self._schedule_resample)
+        self.ax.callbacks.connect('ylim_changed', self._schedule_resample)
+
+        self.df = None
+        self.data = None
+        self._highlight_positions = np.empty(0, dtype=np.int64)
+        self._resample_pending = False
+
+    # --------- Data ---------
+    def set_data(self, df):
+        """Plot ``df``; the current view is kept when the axes columns are unchanged."""
+        first = self.data is None
+        self.df = df
+        self.data = ScatterData(df, self.x_var.get(), self.y_var.get())
+        if first:
+            self.reset_view()
+        else:
+            self.resample()
+
+    def highlight(self, labels):
+        """Mark the rows with index ``labels`` in the plot."""
+        if self.data is None:
+            return
+        self._highlight_positions = self.data.positions(labels)
+        self.resample()
+
+    def show(self):
+        self.window.deiconify()
+        self.window.lift()
+
+    def _change_axes(self):
+        if self.df is not None:
+            self.data = ScatterData(self.df, self.x_var.get(), self.y_var.get())
+            self._highlight_positions = np.empty(0, dtype=np.int64)
+            self.reset_view()
+
+    # --------- View ---------
+    def reset_view(self):
+        """Zoom out to all plottable points."""
+        if self.data is None:
+            return
+        log = self.log_var.get()
+        self.ax.set_xlabel(self.data.x_column)
+        self.ax.set_ylabel(self.data.y_column)
+        self.ax.set_title(f"{self.data.y_column} vs {self.data.x_column}")
+
+        # Limits are set on linear axes so a log scale never sees a non-positive range
+        self.ax.set_xscale('linear')
+        self.ax.set_yscale('linear')
+        bounds = self.data.bounds(log)
+        if bounds is not None:
+            for limits, setter in zip(bounds, (self.ax.set_xlim, self.ax.set_ylim)):
+                low, high = limits
+                if log:
+                    setter(low / 1.1, high * 1.1)
+                else:
+                    pad = (high - low) * 0.05 or 1
+                    setter(low - pad, high + pad)
+        if log:
+            self.ax.set_xscale('log')
+            self.ax.set_yscale('log')
+        self.resample()
+
+    def _schedule_resample(self, ax=None):
+        # xlim_changed and ylim_changed fire together; resample once
+        if not self._resample_pending:
+            self._resample_pending = True
+            self.window.after_idle(self.resample)
+
+    def resample(self):
+        self._resample_pending = False
+        if self.data is None:
+            return
+        xlim, ylim, log = self.ax.get_xlim(), self.ax.get_ylim(), self.log_var.get()
+        positions, counts = self.data.sample(xlim, ylim, log)
+        self.points.set_offsets(np.column_stack([self.data.x[positions], self.data.y[positions]]))
+        self.points.set_array(counts)
+        self.points.set_clim(1, max(counts.max(initial=1), 2))
+        if self.colorbar is None and counts.max(initial=1) > 1:
+            self.colorbar = self.figure.colorbar(self.points, ax=self.ax, label="Materials per marker")
+
+        marked, _ = self.data.sample(xlim, ylim, log, positions=self._highlight_positions)
+        self.highlighted.set_offsets(np.column_stack([self.data.x[marked], self.data.y[marked]]))
+
+        shown = int(counts.sum())
+        binned = "" if len(positions) == shown else f" as {len(positions):,} markers"
+        self.status_var.set(f"{shown:,} of {len(self.data.labels):,} materials in view{binned}")
+        self.canvas.draw_idle()
+
+    def _on_select(self, press, release):
+        if self.data is None or press.xdata is None or release.xdata is None:
+            return
+        labels = self.data.brush((press.xdata, release.xdata), (press.ydata, release.ydata),
+                                 self.log_var.get())
+        self._highlight_positions = self.data.positions(labels)
+        self.resample()
+        if self.on_brush is not None:
+            self.on_brush(labels)
@@ -0,0 +1,88 @@
+"""Status bar showing background task progress with a cancel button."""
+
+import tkinter as tk
+from tkinter import ttk
+
+# How often the task scheduler is polled for results
+POLL_MS = 50
+
+
+class TaskStatusBar(ttk.Frame):
+    """Polls a ``TaskScheduler`` from the Tk main loop and shows its progress.
+
+    Polling happens with ``after`` on the main thread, so the callbacks of
+    finished tasks can safely update widgets.
+    """
+
+    def __init__(self, master, scheduler, poll_ms=POLL_MS, **kwargs):
+        super().__init__(master, padding=(10, 2), **kwargs)
+        self.scheduler = scheduler
+        self.poll_ms = poll_ms
+
+        self.message_var = tk.StringVar(value="Ready")
+        ttk.Label(self, textvariable=self.message_var, font=('Segoe UI', 9)).pack(side='left')
+        # Latency of the last table update, e.g. "filter 3 ms / render 41 ms / 12,034 rows"
+        self.timing_var = tk.StringVar(value="")
+        ttk.Label(self, textvariable=self.timing_var, font=('Segoe UI', 9), foreground='#666666').pack(side='right')
+
+        self.cancel_button = ttk.Button(self, text="Cancel", width=8, command=self.cancel_current)
+        self.progress = ttk.Progressbar(self, length=200, mode='determinate')
+
+        self._current = None
+        self.after(self.poll_ms, self._poll)
+
+    def show_message(self, text):
+        """Show ``text`` while no task is running."""
+        self.message_var.set(text)
+
+    def show_timings(self, text):
+        """Show ``text`` in the latency readout at the right end of the bar."""
+        self.timing_var.set(text)
+
+    def cancel_current(self):
+        if self._current is not None:
+            self._current.cancel()
+            self.message_var.set(f"{self._current.name}: cancelling...")
+
+    def _poll(self):
+        # Reschedule first so an exception raised by a task callback does not stop polling
+        self.after(self.poll_ms, self._poll)
+        try:
+            self.scheduler.poll()
+        finally:
+            self._refresh()
+
+    def _refresh(self):
+        tasks = list(self.scheduler.tasks.values())
+        if not tasks:
+            if self._current is not None:
+                self._current = None
+                self.progress.stop()
+                self.progress.pack_forget()
+                self.cancel_button.pack_forget()
+            return
+
+        task = tasks[-1]
+        if task is not self._current:
+            self._current = task
+            self.progress.pack(side='right', padx=(5, 0))
+            if task.cancellable:
+                self.cancel_button.pack(side='right', padx=(5, 0))
+            else:
+                self.cancel_button.pack_forget()
+
+        if task.cancelled():
+            return
+        text = task.name
+        if task.total:
+            if str(self.progress['mode']) != 'determinate':
+                self.progress.stop()
+                self.progress.configure(mode='determinate')
+            self.progress.configure(maximum=task.total, value=task.done)
+            text += f" ({task.done:,}/{task.total:,})"
+        elif str(self.progress['mode']) != 'indeterminate':
+            self.progress.configure(mode='indeterminate')
+            self.progress.start(15)
+        if len(tasks) > 1:
+            text += f"  +{len(tasks) - 1} more"
+        self.message_var.set(text + "...")
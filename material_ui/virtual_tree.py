@@ -0,0 +1,263 @@
+"""Virtualized row rendering for a ``ttk.Treeview``.
+
+Only the rows in the visible window (plus a small overscan) exist as
+Treeview items, so memory and redraw time do not depend on the number of
+rows in the table. Each item's ID is its row's DataFrame index label; when
+the window moves or the data is reloaded, rows that stay visible keep their
+item and are only rewritten if their text changed. Row data is read from a
+``MaterialStore``, never back from the widget.
+"""
+
+# Rows created below the visible window so resizing never shows blanks
+OVERSCAN = 5
+
+
+class VirtualTreeview:
+    """Drives ``tree`` and its vertical ``scrollbar`` from a ``MaterialStore``.
+
+    The rows shown are the store rows at ``positions``; passing positions
+    instead of a filtered copy means a query result costs one integer array.
+    Selection is tracked by DataFrame index label, so rows stay selected
+    while they are scrolled out of view and survive re-filtering (and
+    reloads that keep the labels) as long as they are still shown.
+    """
+
+    def __init__(self, tree, scrollbar, row_height=25, overscan=OVERSCAN):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_height = row_height
+        self.overscan = overscan
+
+        self.store = None
+        self.positions = None
+        self.labels = None  # Index labels of the shown rows, in display order
+        self.offset = 0
+        self.visible_rows = 20
+        self._items = []  # Treeview item IDs of the rendered rows, in display order
+        self._item_labels = {}  # Item ID -> index label of the row it shows
+        self._item_text = {}  # Item ID -> (cell text, tag) last written to the item
+        self._selected = set()  # Index labels of selected rows
+        self._replace_selection = False  # Next select event replaces off-screen selection too
+        self._announced = set()  # Selection as last reported to the <<TreeviewSelect>> handlers
+        self._syncing = 0  # Select events still to come from render's own selection_set calls
+
+        tree.tag_configure('evenrow', background='white')
+        tree.tag_configure('oddrow', background='#e6f2ff')
+
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.configure(yscrollcommand=lambda first, last: None)
+        tree.bind('<Configure>', self._on_configure, add='+')
+        tree.bind('<<TreeviewSelect>>', self._on_tree_select, add='+')
+        tree.bind('<Button-1>', self._on_click, add='+')
+        tree.bind('<MouseWheel>', self._on_mousewheel)
+        tree.bind('<Button-4>', lambda event: self._scroll_event(-3))
+        tree.bind('<Button-5>', lambda event: self._scroll_event(3))
+        tree.bind('<Up>', lambda event: self._on_arrow(-1, event))
+        tree.bind('<Down>', lambda event: self._on_arrow(1, event))
+        tree.bind('<Shift-Up>', lambda event: self._on_arrow(-1, event))
+        tree.bind('<Shift-Down>', lambda event: self._on_arrow(1, event))
+        tree.bind('<Prior>', lambda event: self._scroll_event(-self.visible_rows))
+        tree.bind('<Next>', lambda event: self._scroll_event(self.visible_rows))
+
+    # --------- Data ---------
+    def set_data(self, store, positions=None, keep_top=False):
+        """Show the rows of ``store`` at ``positions`` (all rows when ``positions`` is None).
+
+        The selection of rows that are still shown is kept. With
+        ``keep_top`` the row at the top of the window stays there if it is
+        still shown; otherwise the scroll offset is kept.
+        """
+        top = self.labels[self.offset] if keep_top and self.offset < self.row_count() else None
+        self.store = store
+        self.positions = positions
+        self.labels = store.labels if positions is None else store.labels[positions]
+        self._keep_present_selection()
+        if top is not None and top in self.labels:
+            self.offset = self.labels.get_loc(top)
+        self.offset = min(self.offset, self._max_offset())
+        self.render()
+
+    def row_count(self):
+        return 0 if self.labels is None else len(self.labels)
+
+    def selection(self):
+        """Return the index labels of the selected rows, in display order."""
+        if not self._selected or self.labels is None:
+            return []
+        return self.labels[self.labels.isin(list(self._selected))].tolist()
+
+    def selected_records(self):
+        """Return the ``MaterialRecord`` of every selected row, in display order."""
+        labels = self.selection()
+        if not labels:
+            return []
+        return self.store.records(labels)
+
+    def record(self, item_id):
+        """Return the ``MaterialRecord`` of the row shown by the Treeview item ``item_id``."""
+        label = self._item_labels.get(item_id)
+        return self.store.record(label) if label is not None else self.store.record_for_item(item_id)
+
+    def set_selection(self, labels):
+        self._selected = set(labels)
+        self._keep_present_selection()
+        self.render()
+
+    # --------- Rendering ---------
+    def render(self):
+        total = self.row_count()
+        wanted = max(0, min(self.visible_rows + self.overscan, total - self.offset))
+        if wanted > 0:
+            if self.positions is None:
+                window = self.store.rows(range(self.offset, self.offset + wanted))
+            else:
+                window = self.store.rows(self.positions[self.offset:self.offset + wanted])
+            labels = list(self.labels[self.offset:self.offset + wanted])
+        else:
+            window, labels = None, []
+
+        # Items are keyed by row label: a row keeps its item while it stays
+        # in the window, and only items whose text changed are rewritten
+        items = [str(label) for label in labels]
+        item_labels = dict(zip(items, labels))
+        stale = [iid for iid in self._items if iid not in item_labels]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self._item_text[iid]
+        order = [iid for iid in self._items if iid in item_labels]
+
+        selected_items = []
+        if window is not None:
+            for i, (iid, values) in enumerate(zip(items, window)):
+                tag = 'evenrow' if (self.offset + i) % 2 == 0 else 'oddrow'
+                text = (tuple(map(str, values)), tag)
+                cached = self._item_text.get(iid)
+                if cached is None:
+                    self.tree.insert('', 'end', iid=iid, values=list(values), tags=(tag,))
+                    order.append(iid)
+                elif cached[0] != text[0]:
+                    self.tree.item(iid, values=list(values), tags=(tag,))
+                elif cached[1] != tag:  # Rows inserted or removed above shift the striping
+                    self.tree.item(iid, tags=(tag,))
+                self._item_text[iid] = text
+                if item_labels[iid] in self._selected:
+                    selected_items.append(iid)
+        if order != items:
+            for index, iid in enumerate(items):
+                self.tree.move(iid, '', index)
+
+        self._items = items
+        self._item_labels = item_labels
+        self._sync_selection(selected_items)
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = self.row_count()
+        if total == 0:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self.offset / total
+        last = min(1.0, (self.offset + self.visible_rows) / total)
+        self.scrollbar.set(first, last)
+
+    # --------- Scrolling ---------
+    def _max_offset(self):
+        return max(0, self.row_count() - self.visible_rows)
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), self._max_offset()))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def see(self, label):
+        """Scroll so that the row with index ``label`` is visible."""
+        position = self.labels.get_loc(label)
+        if position < self.offset:
+            self.scroll_to(position)
+        elif position >= self.offset + self.visible_rows:
+            self.scroll_to(position - self.visible_rows + 1)
+
+    def _on_scrollbar(self, action, *args):
+        if action == 'moveto':
+            self.scroll_to(round(float(args[0]) * self.row_count()))
+        elif action == 'scroll':
+            amount, unit = int(args[0]), args[1]
+            step = self.visible_rows if unit == 'pages' else 1
+            self.scroll_to(self.offset + amount * step)
+
+    def _scroll_event(self, rows):
+        self.scroll_to(self.offset + rows)
+        return 'break'
+
+    def _on_mousewheel(self, event):
+        return self._scroll_event(-3 if event.delta > 0 else 3)
+
+    def _on_arrow(self, direction, event):
+        # Keyboard navigation past the edge of the window pages in the next row
+        focus = self.tree.focus()
+        if focus not in self._item_labels:
+            return None
+        index = self._items.index(focus)
+        at_edge = index == 0 if direction < 0 else index >= self.visible_rows - 1
+        if not at_edge:
+            return None
+        new_offset = self.offset + direction
+        if new_offset < 0 or new_offset > self._max_offset():
+            return None
+
+        label = self.labels[self.offset + index + direction]
+        if not event.state & 0x0001:  # Without Shift the selection moves with the focus
+            self._selected = set()
+        self._selected.add(label)
+        self.scroll_to(new_offset)
+        self.tree.focus(self._items[index])
+        return 'break'
+
+    def _on_configure(self, event):
+        # The heading takes roughly one row of the widget height
+        visible_rows = max(1, event.height // self.row_height - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.offset = min(self.offset, self._max_offset())
+            self.render()
+
+    # --------- Selection ---------
+    def _keep_present_selection(self):
+        if self._selected and self.labels is not None:
+            self._selected = set(self.labels[self.labels.isin(list(self._selected))])
+
+    def _sync_selection(self, selected_items):
+        # Show the selected rows of the window as selected items. The select
+        # event this causes reaches the other handlers only if the selection
+        # itself changed (not when rows were merely scrolled into view).
+        changed = self._selected != self._announced
+        if set(selected_items) != set(self.tree.selection()):
+            if not changed:
+                self._syncing += 1
+            self.tree.selection_set(selected_items)
+        elif changed:
+            self.tree.event_generate('<<TreeviewSelect>>')
+        self._announced = set(self._selected)
+
+    def _on_click(self, event):
+        # A plain click (no Shift/Control) on a row starts a new selection; heading clicks keep it
+        on_row = self.tree.identify_region(event.x, event.y) in ('cell', 'tree')
+        self._replace_selection = on_row and not event.state & 0x0005
+
+    def _on_tree_select(self, event=None):
+        if self._syncing:
+            self._syncing -= 1
+            return 'break'
+        if self._replace_selection:
+            self._replace_selection = False
+            self._selected = set()
+        selected_items = set(self.tree.selection())
+        for iid, label in self._item_labels.items():
+            if iid in selected_items:
+                self._selected.add(label)
+            else:
+                self._selected.discard(label)
+        self._announced = set(self._selected)
@@ -0,0 +1,36 @@
+"""Shared fixtures: the sample workbook and synthetic libraries."""
+
+import os
+import shutil
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from material_core.data import load_materials  # noqa: E402
+from material_core.schema import DATA_FILE  # noqa: E402
+from synthetic import synthetic_materials  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def sample():
+    """The sample workbook, parsed from Excel."""
+    return load_materials(os.path.join(REPO_ROOT, DATA_FILE), use_cache=False)
+
+
+@pytest.fixture(scope="session")
+def library():
+    """A 2,000-row synthetic library, with missing values in about one row in a hundred."""
+    return synthetic_materials(2000)
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """A copy of the sample workbook in a temporary directory."""
+    path = tmp_path / DATA_FILE
+    shutil.copy(os.path.join(REPO_ROOT, DATA_FILE), path)
+    return str(path)
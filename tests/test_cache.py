@@ -0,0 +1,95 @@
+"""Round-trip of the columnar cache next to the workbook."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import material_core.cache as cache_module
+from material_core.cache import POINTER_NAME, cache_dir, read_cache, write_cache
+from material_core.data import load_materials, save_materials
+
+
+def assert_same_table(cached, df):
+    # Cached numeric columns are memory-mapped; compare them as plain arrays
+    plain = pd.DataFrame({column: pd.Series(np.asarray(cached[column].to_numpy()), dtype=cached[column].dtype)
+                          for column in cached.columns}, index=cached.index)
+    pd.testing.assert_frame_equal(plain, df)
+
+
+def test_round_trip_keeps_values_and_dtypes(tmp_path, library):
+    path = str(tmp_path / "library.xlsx")
+    open(path, "wb").close()  # The cache is keyed by the workbook's mtime and size only
+    df = library.copy()
+    df.loc[::7, "Standard"] = np.nan
+    assert write_cache(df, path)
+
+    cached = read_cache(path)
+    assert_same_table(cached, df)
+
+
+def test_cache_is_ignored_after_the_workbook_changes(workbook):
+    df = load_materials(workbook, use_cache=False)
+    assert write_cache(df, workbook)
+    assert read_cache(workbook) is not None
+
+    stat = os.stat(workbook)
+    os.utime(workbook, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert read_cache(workbook) is None
+
+
+def test_load_refreshes_the_cache(workbook):
+    parsed = load_materials(workbook, use_cache=False)
+    assert read_cache(workbook) is None
+    load_materials(workbook)
+    assert_same_table(read_cache(workbook), parsed)
+    assert_same_table(load_materials(workbook), parsed)
+
+
+def test_saving_writes_the_cache_of_the_saved_table(workbook):
+    df = load_materials(workbook, use_cache=False)
+    df.loc[0, "UTS"] = 123.0
+    save_materials(df, workbook)
+    assert_same_table(read_cache(workbook), df)
+    pd.testing.assert_frame_equal(load_materials(workbook, use_cache=False), df)
+
+
+def test_unstorable_columns_leave_no_cache(tmp_path):
+    path = str(tmp_path / "odd.xlsx")
+    open(path, "wb").close()
+    df = pd.DataFrame({"Material": ["A", "B"], "Extra": [object(), object()]})
+    assert not write_cache(df, path)
+    assert not os.path.exists(cache_dir(path))
+    assert read_cache(path) is None
+
+
+@pytest.mark.parametrize("dtype", ["str", "object"])
+def test_text_columns_keep_their_dtype(tmp_path, dtype):
+    path = str(tmp_path / "text.xlsx")
+    open(path, "wb").close()
+    df = pd.DataFrame({"Material": pd.Series(["A", np.nan, "C", "A"], dtype=dtype), "UTS": [1.0, 2.0, np.nan, 4.0]})
+    assert write_cache(df, path)
+    assert_same_table(read_cache(path), df)
+
+
+def test_saving_while_the_cache_is_mapped(workbook, monkeypatch):
+    load_materials(workbook)
+    loaded = load_materials(workbook)  # Memory-mapped from the cache
+    expected = load_materials(workbook, use_cache=False)
+
+    # Windows cannot delete mapped files: the old cache must stay usable and a new one must still be switched to
+    monkeypatch.setattr(cache_module.shutil, "rmtree", lambda *args, **kwargs: None)
+    df = expected.copy()
+    df.loc[0, "UTS"] = 123.0
+    save_materials(df, workbook)
+    assert_same_table(read_cache(workbook), df)
+    assert_same_table(loaded, expected)
+    assert len(os.listdir(cache_dir(workbook))) == 3  # Pointer, old and new cache
+    monkeypatch.undo()
+
+    # The next write removes the caches nothing maps any more
+    save_materials(df, workbook)
+    entries = os.listdir(cache_dir(workbook))
+    assert len(entries) == 2 and POINTER_NAME in entries
+    assert_same_table(read_cache(workbook), df)
@@ -0,0 +1,93 @@
+"""DerivedCache against the scalar formulas of the original download handler."""
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from material_core.derived import DERIVED_PROPERTIES, DerivedCache, calculate_properties
+
+
+def baseline_properties(yield_strength, uts, percent_elongation, youngs_modulus):
+    # The step-by-step calculation of download_selected_row_details before the refactor
+    values = dict.fromkeys(DERIVED_PROPERTIES)
+    if yield_strength is not None and youngs_modulus is not None and youngs_modulus != 0:
+        values["nominal_strain_at_yield"] = yield_strength / youngs_modulus
+    if percent_elongation is not None:
+        values["nominal_strain_at_uts"] = percent_elongation / 100.0
+    engg = values["at_yield_engg_strain"] = values["nominal_strain_at_yield"]
+    if engg is not None and (1 + engg) > 0:
+        values["at_yield_true_strain"] = math.log(1 + engg)
+    if yield_strength is not None and engg is not None:
+        values["at_yield_true_stress"] = yield_strength * (1 + engg)
+    nominal_uts = values["nominal_strain_at_uts"]
+    if nominal_uts is not None and (1 + nominal_uts) > 0:
+        values["at_uts_true_strain"] = math.log(1 + nominal_uts)
+    if uts is not None and nominal_uts is not None:
+        values["at_uts_true_stress"] = uts * (1 + nominal_uts)
+    if (values["at_yield_true_strain"] is not None and values["at_yield_true_stress"] is not None
+            and youngs_modulus is not None and youngs_modulus != 0):
+        values["plastic_strain_at_yield"] = (values["at_yield_true_strain"]
+                                             - values["at_yield_true_stress"] / youngs_modulus)
+    if (values["at_uts_true_strain"] is not None and values["at_uts_true_stress"] is not None
+            and youngs_modulus is not None and youngs_modulus != 0):
+        values["plastic_strain_at_uts"] = values["at_uts_true_strain"] - values["at_uts_true_stress"] / youngs_modulus
+    return values
+
+
+def _source(row):
+    def number(column):
+        value = row[column]
+        return None if pd.isna(value) else float(value)
+    return number("Yield strength"), number("UTS"), number("%EL"), number("Youngs modulus")
+
+
+def assert_matches_baseline(df, frame):
+    for label, row in df.iterrows():
+        expected = baseline_properties(*_source(row))
+        for key in DERIVED_PROPERTIES:
+            value = frame.at[label, key]
+            if expected[key] is None:
+                assert np.isnan(value), (label, key)
+            else:
+                assert value == pytest.approx(expected[key], rel=1e-12, abs=1e-15), (label, key)
+
+
+@pytest.mark.parametrize("table", ["sample", "library"])
+def test_cache_matches_scalar_formulas(table, request):
+    df = request.getfixturevalue(table)
+    assert_matches_baseline(df, DerivedCache(df).frame)
+
+
+def test_edge_values_match_scalar_formulas():
+    df = pd.DataFrame({
+        "Material": ["zero modulus", "missing EL", "negative strain", "all missing"],
+        "Yield strength": [300.0, 300.0, -250.0, np.nan],
+        "UTS": [400.0, 400.0, 400.0, np.nan],
+        "%EL": [10.0, np.nan, -120.0, np.nan],
+        "Youngs modulus": [0.0, 200.0, 200.0, np.nan],
+    })
+    assert_matches_baseline(df, DerivedCache(df).frame)
+
+
+def test_update_recomputes_changed_and_added_rows(library):
+    cache = DerivedCache(library)
+    edited = library.copy()
+    edited.loc[[3, 17], "UTS"] += 50
+    edited.loc[41, "%EL"] = np.nan
+    edited.loc[len(edited)] = edited.loc[5]
+    cache.update(edited)
+    assert_matches_baseline(edited, cache.frame)
+
+
+def test_calculate_properties_reports_missing_values():
+    values, errors = calculate_properties({"Yield strength": 300, "UTS": 400, "%EL": None, "Youngs modulus": 200})
+    assert values["nominal_strain_at_yield"] == pytest.approx(1.5)
+    assert values["nominal_strain_at_uts"] is None
+    assert errors == [
+        "Nominal strain at UTS: Missing %EL.",
+        "At UTS true strain: Cannot calculate log (1+nominal strain at UTS <= 0).",
+        "At UTS true stress: Missing UTS or Nominal strain at UTS.",
+        "Plastic strain at UTS: Missing required values for calculation or Young's Modulus is zero.",
+    ]
@@ -0,0 +1,166 @@
+"""Batch export: cached re-exports, ZIP bundles and cancelling."""
+
+import os
+import zipfile
+
+import pytest
+
+from material_core.derived import DerivedCache
+from material_core.export import export_materials
+from material_core.export_cache import MANIFEST_NAME, ExportCache, record_hashes
+from material_core.lean import compact_frame
+
+
+@pytest.fixture
+def table(library):
+    return library.iloc[:300].copy()
+
+
+def export(df, target, cache=None, **options):
+    return export_materials(df, df.index, str(target), derived_cache=DerivedCache(df), chunk_size=64,
+                            cache=cache if cache is not None else ExportCache(), **options)
+
+
+def read_folder(directory):
+    return {name: open(os.path.join(directory, name)).read() for name in sorted(os.listdir(directory))
+            if name != MANIFEST_NAME}
+
+
+def read_bundle(path):
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name).decode() for name in sorted(archive.namelist())}
+
+
+def mtimes(directory):
+    return {name: os.stat(os.path.join(directory, name)).st_mtime_ns for name in os.listdir(directory)}
+
+
+def cancel_after(polls):
+    calls = []
+
+    def cancelled():
+        calls.append(None)
+        return len(calls) > polls
+    return cancelled
+
+
+def test_row_hashes_ignore_lean_dtypes_and_see_every_change(table):
+    hashes = record_hashes(table)
+    assert record_hashes(compact_frame(table)) == hashes
+    assert len(set(hashes)) == len(table)
+    edited = table.copy()
+    edited.iloc[4, edited.columns.get_loc("UTS")] += 1e-9
+    edited.iloc[9, edited.columns.get_loc("Standard")] = "changed"
+    assert [i for i, (a, b) in enumerate(zip(hashes, record_hashes(edited))) if a != b] == [4, 9]
+
+
+@pytest.mark.parametrize("combined", [False, True], ids=["files", "combined"])
+def test_cached_export_matches_uncached(tmp_path, table, combined):
+    export_materials(table, table.index, str(tmp_path / "plain"), combined=combined, cache=None)
+    cache = ExportCache()
+    export(table, tmp_path / "first", cache, combined=combined)
+    assert cache.misses and not cache.hits
+    export(table, tmp_path / "second", cache, combined=combined)  # A new folder: rendered from the cache
+    assert cache.hits == cache.misses
+    assert read_folder(tmp_path / "first") == read_folder(tmp_path / "plain")
+    assert read_folder(tmp_path / "second") == read_folder(tmp_path / "plain")
+
+
+@pytest.mark.parametrize("combined", [False, True], ids=["files", "combined"])
+def test_resorted_or_filtered_export_is_served_from_the_cache(tmp_path, table, combined):
+    cache = ExportCache()
+    export(table, tmp_path / "first", cache, combined=combined)
+    misses = cache.misses
+    for name, rows in [("sorted", table.sort_values("UTS", ascending=False)), ("filtered", table.iloc[::3])]:
+        hits = cache.hits
+        export(rows, tmp_path / name, cache, combined=combined)
+        assert cache.misses == misses  # Every material is a hit, at its new material ID
+        assert cache.hits - hits == 2 * len(rows)
+        export_materials(rows, rows.index, str(tmp_path / f"{name}-plain"), combined=combined, cache=None)
+        assert read_folder(tmp_path / name) == read_folder(tmp_path / f"{name}-plain")
+
+
+def test_unchanged_files_are_not_rewritten(tmp_path, table):
+    directory = tmp_path / "decks"
+    first = export(table, directory)
+    before = mtimes(directory)
+
+    again = export(table, directory)
+    assert again.unchanged == len(first.files)
+    assert sorted(again.files) == sorted(first.files)
+    assert again.errors == first.errors
+    assert mtimes(directory) == before
+
+    edited = table.copy()
+    edited.iloc[2, edited.columns.get_loc("Youngs modulus")] += 1
+    result = export(edited, directory)
+    rewritten = {name for name, mtime in mtimes(directory).items() if mtime != before[name]}
+    assert rewritten - {MANIFEST_NAME} == {f"NL_{table['Material'].iloc[2].replace(' ', '_')}.inp",
+                                           f"{table['Material'].iloc[2].replace(' ', '_')}.bdf"}
+    assert result.unchanged == len(first.files) - 2
+
+
+def test_files_changed_by_hand_are_rewritten(tmp_path, table):
+    directory = tmp_path / "decks"
+    export(table, directory)
+    expected = read_folder(directory)
+    name = next(iter(expected))
+    with open(directory / name, "a") as f:
+        f.write("edited\n")
+    assert export(table, directory).unchanged == len(expected) - 1
+    assert read_folder(directory) == expected
+
+
+@pytest.mark.parametrize("combined", [False, True], ids=["files", "combined"])
+def test_bundle_holds_the_folder_export(tmp_path, table, combined):
+    export(table, tmp_path / "decks", combined=combined)
+    result = export(table, tmp_path / "decks.zip", combined=combined)
+    assert result.files == [str(tmp_path / "decks.zip")]
+    assert read_bundle(tmp_path / "decks.zip") == read_folder(tmp_path / "decks")
+    assert zipfile.ZipFile(tmp_path / "decks.zip").testzip() is None
+
+
+def test_unchanged_bundle_is_not_rewritten(tmp_path, table):
+    path = tmp_path / "decks.zip"
+    first = export(table, path)
+    before = os.stat(path).st_mtime_ns
+
+    again = export(table, path, cache=ExportCache())  # A new session: only the archive comment is read
+    assert os.stat(path).st_mtime_ns == before
+    assert again.unchanged == len(read_bundle(path))
+    assert again.errors == first.errors
+
+    edited = table.copy()
+    edited.iloc[0, edited.columns.get_loc("UTS")] += 1
+    assert export(edited, path).unchanged == 0
+    assert os.stat(path).st_mtime_ns != before
+
+
+@pytest.mark.parametrize("combined", [False, True], ids=["files", "combined"])
+def test_cancelled_bundle_keeps_the_previous_one(tmp_path, table, combined):
+    path = tmp_path / "decks.zip"
+    export(table, path, combined=combined)
+    expected = read_bundle(path)
+
+    edited = table.copy()
+    edited.iloc[0, edited.columns.get_loc("UTS")] += 1
+    result = export(edited, path, combined=combined, cancelled=cancel_after(2))
+    assert result.files == []
+    assert read_bundle(path) == expected
+    assert os.listdir(tmp_path) == ["decks.zip"]
+
+
+def test_cancelled_combined_export_keeps_the_previous_decks(tmp_path, table):
+    directory = tmp_path / "decks"
+    export(table, directory, combined=True)
+    expected = read_folder(directory)
+
+    edited = table.copy()
+    edited.iloc[0, edited.columns.get_loc("UTS")] += 1
+    export(edited, directory, combined=True, cancelled=cancel_after(2))
+    assert read_folder(directory) == expected
+
+    # The manifest still describes the old decks, so the next export writes the new ones
+    result = export(edited, directory, combined=True)
+    assert result.unchanged == 0
+    assert read_folder(directory) != expected
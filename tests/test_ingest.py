@@ -0,0 +1,63 @@
+"""Folder ingest: merging sources and what is saved back to the folder's own workbook."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from material_core.ingest import added_rows, ingest_directory, ingest_in_subprocess
+from material_core.schema import COLUMNS, FOLDER_WORKBOOK, PROVENANCE_COLUMN
+
+
+def write_source(path, rows):
+    frame = pd.DataFrame(rows, columns=["Material", "Standard", "UTS", "Density"])
+    if str(path).endswith(".csv"):
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_excel(path, index=False)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    write_source(tmp_path / FOLDER_WORKBOOK, [["Steel A", "EN 1", 500.0, np.nan], ["Own B", "EN 2", 300.0, 7.8]])
+    write_source(tmp_path / f"old_{FOLDER_WORKBOOK}", [["Old C", "EN 3", 200.0, 2.7]])
+    write_source(tmp_path / "catalogue.csv", [["Steel A", "EN 1", 510.0, 7.85]])
+    return tmp_path
+
+
+def test_sources_are_merged_with_provenance(folder):
+    result = ingest_directory(str(folder), workers=1)
+    frame = result.frame.set_index("Material")
+    assert sorted(frame.index) == ["Old C", "Own B", "Steel A"]
+    assert frame.at["Steel A", "Density"] == 7.85  # Filled in from the catalogue
+    assert frame.at["Steel A", PROVENANCE_COLUMN] == f"{FOLDER_WORKBOOK}:Sheet1:2; catalogue.csv:2"
+
+
+def test_only_the_folder_workbook_and_its_own_cells_are_saved(folder):
+    frame = ingest_directory(str(folder), workers=1).frame
+    added = pd.DataFrame([{"Material": "New D", "UTS": 100.0, PROVENANCE_COLUMN: FOLDER_WORKBOOK}])
+    frame = pd.concat([frame, added], ignore_index=True)
+
+    rows = added_rows(frame, str(folder)).set_index("Material")
+    assert list(rows.columns) == COLUMNS[1:]
+    assert sorted(rows.index) == ["New D", "Own B", "Steel A"]  # Not the rows of old_added_materials.xlsx
+    assert rows.at["Steel A", "UTS"] == 500.0
+    assert np.isnan(rows.at["Steel A", "Density"])  # Not the catalogue's 7.85
+    assert rows.at["Own B", "Density"] == 7.8
+
+
+def test_subprocess_ingest_reports_progress(folder):
+    reports = []
+    result = ingest_in_subprocess(str(folder), workers=1, progress=lambda done, total: reports.append((done, total)))
+    assert reports[-1] == (3, 3)
+    assert sorted(result.frame["Material"]) == ["Old C", "Own B", "Steel A"]
+
+
+def test_cancel_does_not_wait_for_output(tmp_path):
+    # An empty folder prints no progress at all, like a worker busy with one large source
+    polls = []
+
+    def cancelled():
+        polls.append(None)
+        return True
+    assert ingest_in_subprocess(str(tmp_path), cancelled=cancelled) is None
+    assert len(polls) == 1
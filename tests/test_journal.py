@@ -0,0 +1,170 @@
+"""Journal replay and compaction, including crashes part-way through."""
+
+import os
+
+import pandas as pd
+import pytest
+
+import material_core.journal as journal_module
+from material_core.data import load_materials, update_material
+from material_core.journal import Journal
+
+
+def reopened(workbook):
+    # What the app does at startup: load the workbook and replay the journal onto it
+    journal = Journal(workbook)
+    return journal, journal.replay(load_materials(workbook))
+
+
+def added(df, base):
+    return df["Material"].iloc[len(base):].tolist()
+
+
+def test_replay_applies_adds_and_updates(workbook):
+    base = load_materials(workbook)
+    journal, df = reopened(workbook)
+    journal.record_add({"Material": "A", "UTS": 500.0})
+    journal.record_add_many(pd.DataFrame({"Material": ["B", "C"], "UTS": [510.0, None]}))
+    journal.record_update(0, {"UTS": 999.0})
+
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A", "B", "C"]
+    assert df.at[0, "UTS"] == 999.0
+    assert pd.isna(df["UTS"].iloc[-1])
+    assert journal.pending() == 3
+
+
+def test_update_rejects_unknown_columns(workbook):
+    df = load_materials(workbook)
+    expected = df.copy()
+    with pytest.raises(KeyError):
+        update_material(df, 0, {"UTS": 999.0, "UTS ": 1.0})
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_compaction_writes_the_workbook_and_empties_the_journal(workbook):
+    base = load_materials(workbook)
+    journal, df = reopened(workbook)
+    journal.record_add({"Material": "A"})
+    journal.record_add({"Material": "B"})
+    journal, df = reopened(workbook)
+    journal.compact(df)
+    assert journal.pending() == 0
+    assert os.path.getsize(journal.path) == 0
+
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A", "B"]
+    assert journal.pending() == 0
+
+
+def test_compaction_keeps_entries_after_the_snapshot(workbook):
+    base = load_materials(workbook)
+    journal, df = reopened(workbook)
+    journal.record_add({"Material": "A"})
+    journal, snapshot = reopened(workbook)
+    upto = journal.sequence()
+    journal.record_add({"Material": "B"})  # Journaled while the snapshot is being saved
+    journal.compact(snapshot, upto=upto)
+    assert journal.pending() == 1
+
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A", "B"]
+
+
+def test_torn_last_line_is_cut_off_before_new_entries(workbook):
+    base = load_materials(workbook)
+    journal, df = reopened(workbook)
+    journal.record_add({"Material": "A"})
+    with open(journal.path, "a") as f:
+        f.write('{"op": "add", "row": {"Mat')  # A crash in the middle of a write
+
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A"]
+    journal.record_add({"Material": "B"})
+    journal.record_add({"Material": "C"})
+
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A", "B", "C"]
+
+
+def test_entry_without_newline_counts_as_torn(workbook):
+    base = load_materials(workbook)
+    journal, df = reopened(workbook)
+    journal.record_add({"Material": "A"})
+    with open(journal.path, "a") as f:
+        f.write('{"op": "add", "row": {"Material": "B"}, "seq": 2}')  # Complete JSON, newline missing
+
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A"]
+    journal.record_add({"Material": "C"})
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A", "C"]
+
+
+def test_apply_leaves_the_journal_and_its_counters_alone(workbook):
+    base = load_materials(workbook)
+    journal, df = reopened(workbook)
+    journal.record_add({"Material": "A"})
+    journal.record_update(0, {"UTS": 999.0})
+    with open(journal.path, "a") as f:
+        f.write('{"op": "add", "row": {"Mat')  # An entry being written right now
+    size, seq, pending = os.path.getsize(journal.path), journal.sequence(), journal.pending()
+
+    reloaded = journal.apply(load_materials(workbook))
+    assert added(reloaded, base) == ["A"]
+    assert reloaded.at[0, "UTS"] == 999.0
+    assert (os.path.getsize(journal.path), journal.sequence(), journal.pending()) == (size, seq, pending)
+
+
+def test_crash_between_workbook_and_journal_rewrite(workbook, monkeypatch):
+    base = load_materials(workbook)
+    journal, df = reopened(workbook)
+    journal.record_add({"Material": "A"})
+    journal.record_add({"Material": "B"})
+    journal, df = reopened(workbook)
+
+    replace = os.replace
+
+    def crash_on_journal(source, target):
+        if target == journal.path:
+            raise KeyboardInterrupt("crash")
+        replace(source, target)
+
+    monkeypatch.setattr(journal_module.os, "replace", crash_on_journal)
+    with pytest.raises(KeyboardInterrupt):
+        journal.compact(df)
+    monkeypatch.undo()
+
+    # The workbook holds A and B and the journal still lists them: they must not be added twice
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A", "B"]
+    assert journal.pending() == 0
+
+    # New entries are numbered after the compacted ones and are not skipped
+    journal.record_add({"Material": "C"})
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A", "B", "C"]
+
+
+def test_crash_before_the_workbook_is_replaced_loses_nothing(workbook, monkeypatch):
+    base = load_materials(workbook)
+    journal, df = reopened(workbook)
+    journal.record_add({"Material": "A"})
+    journal, df = reopened(workbook)
+
+    replace = os.replace
+
+    def crash_on_workbook(source, target):
+        if target == workbook:
+            raise KeyboardInterrupt("crash")
+        replace(source, target)
+
+    monkeypatch.setattr(journal_module.os, "replace", crash_on_workbook)
+    with pytest.raises(KeyboardInterrupt):
+        journal.compact(df)
+    monkeypatch.undo()
+
+    # The compaction marker was written, but for a workbook that never replaced the old one
+    assert os.path.exists(journal.marker_path)
+    journal, df = reopened(workbook)
+    assert added(df, base) == ["A"]
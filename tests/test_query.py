@@ -0,0 +1,124 @@
+"""QueryEngine filters, sorts, ranges and category counts against plain pandas."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from material_core.lean import compact_frame
+from material_core.query import QueryEngine
+
+
+def pandas_mask(df, search_text="", mfg_process="All", application="All", material_type="", ranges=None):
+    # The filters of the original update_view, plus inclusive numeric ranges
+    names = df["Material"].astype(str).str.lower()
+    mask = pd.Series(True, index=df.index)
+    if search_text.strip():
+        mask &= names.str.contains(search_text.strip().lower(), regex=False) & df["Material"].notna()
+    if mfg_process != "All":
+        mask &= df["Manufacturing process"] == mfg_process
+    if application != "All":
+        mask &= df["Applications"] == application
+    if material_type:
+        mask &= names.str.contains(material_type.lower(), regex=False) & df["Material"].notna()
+    for column, (low, high) in (ranges or {}).items():
+        values = pd.to_numeric(df[column], errors="coerce")
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+    return mask.to_numpy()
+
+
+def pandas_order(df, rows, sort_keys):
+    # Stable multi-key sort: numbers by value, text case-insensitively, missing values last
+    frame = pd.DataFrame({"position": rows})
+    keys = []
+    for i, (column, _) in enumerate(sort_keys):
+        values = df[column].iloc[rows].reset_index(drop=True)
+        if pd.api.types.is_numeric_dtype(values):
+            values = values.astype(float)
+        else:
+            values = values.astype(str).str.lower().where(values.notna())
+        frame[f"key{i}"] = values
+        keys.append(f"key{i}")
+    frame = frame.sort_values(keys, ascending=[not descending for _, descending in sort_keys],
+                              na_position="last", kind="stable")
+    return frame["position"].to_numpy()
+
+
+FILTERS = [
+    {},
+    {"search_text": "steel"},
+    {"search_text": " AL 1"},
+    {"mfg_process": "Forging"},
+    {"application": "Automotive", "mfg_process": "Casting"},
+    {"material_type": "Aluminum", "search_text": "um 2"},
+    {"mfg_process": "No such process"},
+    {"ranges": {"UTS": (500, 800)}},
+    {"ranges": {"UTS": (None, 300), "Density": (7, None)}, "mfg_process": "Rolling"},
+    {"ranges": {"Yield strength": (400, 400)}},
+]
+SORT_KEYS = [
+    [("UTS", False)],
+    [("UTS", True)],
+    [("Material", False)],
+    [("Manufacturing process", False), ("UTS", True)],
+    [("Density", False), ("Yield strength", True), ("Material", False)],
+]
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["normal", "lean"])
+def engine(request, library):
+    return QueryEngine(compact_frame(library) if request.param else library)
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+def test_filters_match_pandas(engine, library, filters):
+    expected = np.flatnonzero(pandas_mask(library, **filters))
+    np.testing.assert_array_equal(engine.positions(**filters), expected)
+
+
+@pytest.mark.parametrize("sort_keys", SORT_KEYS)
+@pytest.mark.parametrize("filters", [FILTERS[0], FILTERS[3], FILTERS[7]])
+def test_sorts_match_pandas(engine, library, filters, sort_keys):
+    rows = np.flatnonzero(pandas_mask(library, **filters))
+    np.testing.assert_array_equal(engine.positions(sort_keys=sort_keys, **filters),
+                                  pandas_order(library, rows, sort_keys))
+
+
+def test_sort_column_sorts_ascending(engine, library):
+    rows = np.arange(len(library))
+    np.testing.assert_array_equal(engine.positions(sort_column="Endurance Strength"),
+                                  pandas_order(library, rows, [("Endurance Strength", False)]))
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("column, argument", [("Manufacturing process", "mfg_process"),
+                                              ("Applications", "application")])
+def test_category_counts_match_pandas(engine, library, filters, column, argument):
+    # Each count is the number of rows choosing that category would show
+    others = dict(filters, **{argument: "All"})
+    expected = library[column][pandas_mask(library, **others)].value_counts()
+    counts = engine.category_counts(column, **filters)
+    assert {value: count for value, count in counts.items() if count} == expected.to_dict()
+    assert set(counts) == set(library[column].dropna())
+
+
+def test_unknown_sort_column_raises(engine):
+    with pytest.raises(KeyError):
+        engine.positions(sort_keys=[("No such column", False)])
+
+
+def test_unknown_range_column_raises(engine):
+    with pytest.raises(KeyError):
+        engine.positions(ranges={"No such column": (0, 1)})
+
+
+def test_extend_matches_a_fresh_engine(library):
+    engine = QueryEngine(library.iloc[:1500])
+    engine.positions(search_text="steel", sort_keys=[("UTS", True)])  # Fill the caches first
+    engine.extend(library)
+    fresh = QueryEngine(library)
+    for filters in FILTERS:
+        np.testing.assert_array_equal(engine.positions(sort_keys=[("UTS", True)], **filters),
+                                      fresh.positions(sort_keys=[("UTS", True)], **filters))
@@ -0,0 +1,45 @@
+"""The material service's request handling, without a socket."""
+
+import json
+
+import numpy as np
+import pytest
+
+from material_core.data import load_materials, save_materials
+from material_core.server import MaterialService
+
+
+def body(response):
+    status, content_type, data, headers = response
+    return status, json.loads(data) if content_type == "application/json" else data.decode()
+
+
+@pytest.fixture
+def service(workbook):
+    df = load_materials(workbook)
+    df.loc[1, "Material"] = np.nan
+    save_materials(df, workbook)
+    return MaterialService(workbook)
+
+
+def test_material_and_unknown_ids(service):
+    status, row = body(service.handle("/materials/0"))
+    assert status == 200 and row["id"] == 0
+    assert body(service.handle("/materials/99999"))[0] == 404
+    assert body(service.handle("/export/xyz/0"))[0] == 404
+
+
+def test_export_of_a_material_without_a_name(service):
+    status, content_type, data, headers = service.handle("/export/bdf/1")
+    assert status == 200
+    assert headers["Content-Disposition"] == 'attachment; filename="UNKNOWN.bdf"'
+    assert data.decode().startswith("$HMNAME MAT")
+
+
+def test_unexpected_errors_answer_500(service, monkeypatch):
+    def broken(target):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(service, "_dispatch", broken)
+    status, payload = body(service.handle("/health"))
+    assert status == 500
+    assert payload == {"error": "Internal error: RuntimeError: boom"}
@@ -0,0 +1,118 @@
+"""inp/bdf output against the per-row writers of the original GUI, in normal and lean dtypes."""
+
+import io
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from material_core.derived import DerivedCache
+from material_core.lean import compact_frame
+from material_core.writers import WRITERS, bdf_content, get_writer, inp_content
+
+from test_derived import baseline_properties
+
+
+def baseline_inp(row):
+    # download_selected_row_details before the refactor; the row's values went through the Treeview as text
+    text = {column: str(value) for column, value in row.items()}
+    numbers = [float(text[column]) for column in ("Yield strength", "UTS", "%EL", "Youngs modulus")]
+    if any(math.isnan(number) for number in numbers):
+        return None  # The original formatted None or nan here; the writers skip the material instead
+    yield_strength, uts, percent_elongation, youngs_modulus = numbers
+    values = baseline_properties(*numbers)
+    output_content = f"**\n"
+    output_content += f"**HMNAME MATS          1 {text['Material']}     3\n"
+    output_content += f"*MATERIAL, NAME={text['Material']}\n"
+    output_content += f"DENSITY\n"
+    output_content += f"{text['Density']},0.0 \n"
+    output_content += f"*ELASTIC, TYPE = ISOTROPIC\n"
+    output_content += f"{youngs_modulus}  ,{percent_elongation/100.00}      ,0.0 \n"
+    output_content += f"*PLASTIC\n"
+    output_content += f"{yield_strength:.2f}	  ,0.00000   ,0.0\n"
+    output_content += f"{values['at_yield_true_stress']:.2f}	  ,{values['at_yield_true_strain']:.5f}   ,0.0\n"
+    output_content += f"{values['at_uts_true_stress']:.2f}	  ,{values['plastic_strain_at_uts']:.5f}   ,0.0\n"
+    output_content += f"*****\n"
+    return output_content
+
+
+def baseline_bdf(row):
+    # download_bdf_files before the refactor
+    def number(column):
+        try:
+            return float(str(row[column]))
+        except ValueError:
+            return 0.0
+    material_name = str(row["Material"])
+    youngs_modulus, poissons_ratio, density = (number(column) for column in
+                                               ("Youngs modulus", "Poissons ratio", "Density"))
+    youngs_modulus, poissons_ratio, density = (0.0 if math.isnan(value) else value
+                                               for value in (youngs_modulus, poissons_ratio, density))
+    bdf_content = ""
+    bdf_content += f'$HMNAME MAT                    1"{material_name}" "MAT1"\n'
+    bdf_content += f"$HWCOLOR MAT                   1       3\n"
+    exp_density = f"{density:.2e}"
+    mantissa, exponent = exp_density.split('e')
+    sign = '+' if int(exponent) >= 0 else '-'
+    bdf_density = f"{mantissa}{sign}{abs(int(exponent)):02d}"
+    bdf_content += f"MAT1    1       {youngs_modulus:<10.1f}      {poissons_ratio:<6.2f}  {bdf_density}\n"
+    bdf_content += f"$2345678$2345678$2345678$2345678$2345678$2345678\n"
+    bdf_content += f"| material name |  ID(1)   |  Young's modulus| blank | poissons ratio|density|\n"
+    return bdf_content
+
+
+BASELINES = {"inp": baseline_inp, "bdf": baseline_bdf}
+
+
+def test_registry_holds_the_solver_formats():
+    assert list(WRITERS) == ["inp", "bdf"]
+
+
+@pytest.mark.parametrize("lean", [False, True], ids=["normal", "lean"])
+@pytest.mark.parametrize("fmt", ["inp", "bdf"])
+@pytest.mark.parametrize("table", ["sample", "library"])
+def test_render_matches_baseline(table, fmt, lean, request):
+    df = request.getfixturevalue(table)
+    frame = compact_frame(df) if lean else df
+    blocks = get_writer(fmt).render(frame, DerivedCache(frame).frame, first_id=[1] * len(frame))
+    expected = [BASELINES[fmt](row) for _, row in df.iterrows()]
+    assert blocks == expected
+
+
+def test_lean_tables_are_compacted(library):
+    # Otherwise the lean runs above would test nothing
+    lean = compact_frame(library)
+    assert any(isinstance(dtype, pd.CategoricalDtype) or dtype == np.float32 for dtype in lean.dtypes)
+
+
+@pytest.mark.parametrize("fmt", ["inp", "bdf"])
+def test_streamed_deck_numbers_materials_and_skips_incomplete_rows(library, fmt):
+    writer = get_writer(fmt)
+    derived = DerivedCache(library).frame
+    f = io.StringIO()
+    skipped = writer.write(f, library, derived, first_id=1, chunk_size=300)
+    blocks = writer.render(library, derived, first_id=1)
+    assert f.getvalue() == "".join(block for block in blocks if block is not None)
+    assert skipped == [i for i, block in enumerate(blocks) if block is None]
+    if fmt == "inp":
+        assert skipped  # The library has rows with missing mechanical properties
+    material_id = f"MATS {7:>10} " if fmt == "inp" else f"MAT1    {7:<8}"
+    assert material_id in blocks[6]
+
+
+def test_single_row_helpers_match_render(sample):
+    row = sample.iloc[1]
+    assert inp_content(row.to_dict()) == baseline_inp(row)
+    assert bdf_content(row.to_dict()) == baseline_bdf(row)
+
+
+@pytest.mark.parametrize("fmt", ["inp", "bdf"])
+def test_templates_fill_in_any_material_id(library, fmt):
+    writer = get_writer(fmt)
+    frame = library.iloc[:200]
+    derived = DerivedCache(frame).frame
+    ids = list(range(10**7, 10**7 - 200, -1))
+    filled = [None if template is None else writer.fill_id(template, material_id)
+              for template, material_id in zip(writer.templates(frame, derived), ids)]
+    assert filled == writer.render(frame, derived, first_id=ids)